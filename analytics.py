@@ -0,0 +1,163 @@
+"""
+SignHub - Cohort Analytics
+Columnar views of progress data for the admin analytics page
+"""
+
+import io
+import threading
+import time
+
+import pandas as pd
+
+from progress_log import apply_events
+
+PASS_PERCENTAGE = 70
+
+# ============================================================
+# LOADING
+# ============================================================
+EVENT_COLUMNS = ["seq", "ts", "user", "type", "quiz", "score", "total", "percentage", "answers", "questions"]
+
+def parse_events(chunk):
+    """DataFrame from a bytes chunk of complete JSON lines from the progress log"""
+    if not chunk.strip():
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    df = pd.read_json(io.BytesIO(chunk), lines=True, dtype=False)
+    df = df.reindex(columns=EVENT_COLUMNS)
+    df["ts"] = pd.to_datetime(df["ts"], format="ISO8601")
+    return df
+
+def progress_frames(store, log):
+    """(learners, results) frames from every stored snapshot plus the uncompacted tail.
+
+    learners: one row per user (quizzes_taken, total_points).
+    results: one row per (user, quiz) with the latest score.
+    """
+    seq, tail = log.snapshot_tail()
+    users, taken, points = [], [], []
+    r_user, r_quiz, r_score, r_total, r_pct = [], [], [], [], []
+    for username, prog in store.iter_progress():
+        apply_events(prog, [e for e in tail.get(username, ()) if e["seq"] <= seq])
+        users.append(username)
+        taken.append(prog.get("quizzes_taken", 0))
+        points.append(prog.get("total_points", 0))
+        for quiz, result in prog.get("quiz_scores", {}).items():
+            r_user.append(username)
+            r_quiz.append(quiz)
+            r_score.append(result.get("score", 0))
+            r_total.append(result.get("total", 0))
+            r_pct.append(result.get("percentage", 0))
+    learners = pd.DataFrame({"user": users, "quizzes_taken": taken, "total_points": points})
+    results = pd.DataFrame({"user": r_user, "quiz": r_quiz, "score": r_score, "total": r_total,
+                            "percentage": pd.to_numeric(pd.Series(r_pct, dtype="object"), errors="coerce")})
+    return seq, learners, results
+
+# ============================================================
+# METRICS (all vectorized over the frames)
+# ============================================================
+def score_distribution(results):
+    """Learners per (quiz, 10-point percentage bucket), from each learner's latest attempt"""
+    if results.empty:
+        return pd.DataFrame(columns=["quiz", "bucket", "learners"])
+    low = (results["percentage"].fillna(0).clip(0, 100) // 10 * 10).clip(upper=90).astype(int)
+    out = results.groupby([results["quiz"], low.rename("low")]).size().rename("learners").reset_index()
+    out["bucket"] = out["low"].astype(str) + "–" + (out["low"] + 10).astype(str) + "%"
+    return out[["quiz", "bucket", "learners"]]
+
+def completion_funnel(learners, results, n_quizzes, registered=None):
+    started = learners["quizzes_taken"].gt(0) | learners["user"].isin(results["user"])
+    per_user = results.groupby("user")
+    passed = per_user["percentage"].max().ge(PASS_PERCENTAGE)
+    finished = per_user["quiz"].nunique().ge(n_quizzes)
+    return pd.DataFrame({
+        "stage": ["Registered", "Took a quiz", f"Passed a quiz (≥{PASS_PERCENTAGE}%)", "Completed every quiz"],
+        "learners": [registered if registered is not None else len(learners), int(started.sum()), int(passed.sum()), int(finished.sum())],
+    })
+
+def daily_active(events):
+    """Distinct learners with any progress event per calendar day"""
+    if events.empty:
+        return pd.DataFrame(columns=["day", "learners"])
+    out = events.groupby(events["ts"].dt.floor("D"))["user"].nunique().rename("learners").reset_index()
+    out.columns = ["day", "learners"]
+    return out
+
+def question_difficulty(events):
+    """Share of correct answers per (quiz, question), worst first.
+
+    question is the bank id for drawn quizzes and the position (as text)
+    for fixed ones.
+    """
+    attempts = events.loc[(events["type"] == "quiz_completed") & events["answers"].notna(), ["quiz", "answers", "questions"]]
+    if attempts.empty:
+        return pd.DataFrame(columns=["quiz", "question", "attempts", "correct_rate"])
+    attempts = attempts.assign(question=[q if isinstance(q, list) and len(q) == len(a) else [str(i) for i in range(len(a))]
+                                         for a, q in zip(attempts["answers"], attempts["questions"])])
+    answers = attempts.explode(["answers", "question"]).dropna(subset=["answers"])
+    answers["answers"] = answers["answers"].astype(int)
+    out = answers.groupby(["quiz", "question"])["answers"].agg(attempts="size", correct_rate="mean").reset_index()
+    return out.sort_values("correct_rate", kind="stable")
+
+# ============================================================
+# CACHED ENGINE
+# ============================================================
+class Analytics:
+    """Keeps the frames and computed metrics between page views.
+
+    The event frame grows incrementally from the log's byte offset. The
+    progress frames and metrics are recomputed only when a progress write
+    has happened since (the log's last seq moved), and at most once every
+    min_refresh seconds, so a busy server doesn't rescan every learner on
+    each admin rerun.
+    """
+
+    def __init__(self, store, log, n_quizzes, min_refresh=30):
+        self.store = store
+        self.log = log
+        self.n_quizzes = n_quizzes
+        self.min_refresh = min_refresh
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._events = pd.DataFrame(columns=EVENT_COLUMNS)
+        self._seq = None
+        self._built = 0.0
+        self._report = None
+
+    def _read_new_events(self):
+        with open(self.log.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        if end:
+            new = parse_events(chunk[:end])
+            self._events = new if self._events.empty else pd.concat([self._events, new], ignore_index=True)
+            self._offset += end
+
+    def report(self, force=False):
+        """Dict of metric frames plus build metadata; cached until progress changes"""
+        with self._lock:
+            seq = self.log.last_seq()
+            fresh = self._report is not None and seq == self._seq
+            throttled = self._report is not None and time.monotonic() - self._built < self.min_refresh
+            if not force and (fresh or throttled):
+                return self._report
+            start = time.perf_counter()
+            self._read_new_events()
+            seq, learners, results = progress_frames(self.store, self.log)
+            registered = self.store.count_users()
+            # A callable follows content packs that gain or lose quizzes while running
+            n_quizzes = self.n_quizzes() if callable(self.n_quizzes) else self.n_quizzes
+            self._report = {
+                "learners": registered,
+                "attempts": int((self._events["type"] == "quiz_completed").sum()),
+                "score_distribution": score_distribution(results),
+                "funnel": completion_funnel(learners, results, n_quizzes, registered),
+                "daily_active": daily_active(self._events),
+                "question_difficulty": question_difficulty(self._events),
+                "seq": seq,
+                "built_at": time.time(),
+                "build_seconds": time.perf_counter() - start,
+            }
+            self._seq = seq
+            self._built = time.monotonic()
+            return self._report
@@ -4,11 +4,33 @@ Beautiful Login + Professional Dashboard + Advanced Features
 """
 
 import streamlit as st
-import json
+import atexit
+import functools
 import hashlib
+import os
+import random
+import re
 import time
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeout
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+from streamlit.runtime.scriptrunner import RerunException, StopException, get_script_run_ctx
+
+import metrics
+import numpy as np
+import plotly.express as px
+import passwords
+import recognition
+from analytics import Analytics
+from attempts import AttemptHistory, downsample, quiz_summary, unpack_answers
+from certificates import FORMATS as CERTIFICATE_FORMATS, CertificateRenderer
+from content import ContentLibrary
+from leaderboard import Leaderboard
+from progress_log import Compactor, Flusher, ProgressLog, certificate_issued, points_awarded, quiz_completed
+from PIL import Image
+from reviews import ReviewScheduler
+from spelling_game import DIFFICULTIES as SPELLING_DIFFICULTIES, FingerspellingChallenge, open_dictionary
+from storage import CachedStorage, RecordCache, normalize_email, open_storage
 
 st.set_page_config(
     page_title="SignHub - Master Sign Language",
@@ -17,79 +39,48 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+def shared_resource(fn):
+    """st.cache_resource under `streamlit run`; a plain process-wide memo when app is imported headless"""
+    if get_script_run_ctx() is not None:
+        return st.cache_resource(fn)
+    return functools.lru_cache(maxsize=None)(fn)
+
 # ============================================================
-# ASL ALPHABET DATA
+# RERUN METRICS
 # ============================================================
-ASL_ALPHABET = {
-    'A': '👊', 'B': '✋', 'C': '👌', 'D': '☝️', 'E': '✊',
-    'F': '🤏', 'G': '👈', 'H': '✌️', 'I': '🤙', 'J': '🤙',
-    'K': '✌️', 'L': '👆', 'M': '👊', 'N': '✌️', 'O': '👌',
-    'P': '☝️', 'Q': '👇', 'R': '✌️', 'S': '✊', 'T': '👊',
-    'U': '✌️', 'V': '✌️', 'W': '🤟', 'X': '☝️', 'Y': '🤙', 'Z': '☝️'
-}
-
-ASL_DESCRIPTIONS = {
-    'A': 'Closed fist with thumb alongside', 'B': 'Flat hand, fingers together',
-    'C': 'Hand curved in C shape', 'D': 'Index finger up', 'E': 'Fingers curled',
-    'F': 'Index and thumb form circle', 'G': 'Index and thumb point horizontally',
-    'H': 'Index and middle fingers together', 'I': 'Pinky finger up',
-    'J': 'Pinky up with J-motion', 'K': 'Index up, middle out, thumb between',
-    'L': 'Thumb and index form L shape', 'M': 'Thumb under first three fingers',
-    'N': 'Thumb under first two fingers', 'O': 'All fingers curved forming O',
-    'P': 'K handshape pointing down', 'Q': 'Index and thumb point down',
-    'R': 'Index and middle crossed', 'S': 'Fist with thumb across fingers',
-    'T': 'Thumb between index and middle', 'U': 'Index and middle fingers up',
-    'V': 'Index and middle apart', 'W': 'Three fingers up',
-    'X': 'Index bent in hook shape', 'Y': 'Thumb and pinky extended',
-    'Z': 'Draw Z in the air with index'
-}
-
-# Learning Levels - Basic to Advanced
-LEARNING_LEVELS = {
-    "Basic": {
-        "title": "Level 1: Basic Alphabet",
-        "description": "Learn A-Z signs",
-        "letters": list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"),
-        "youtube": "https://www.youtube.com/watch?v=v1desDduz5M"
-    },
-    "Intermediate": {
-        "title": "Level 2: Common Words",
-        "description": "Everyday vocabulary",
-        "words": ["Hello", "Thanks", "Please", "Sorry", "Help"],
-        "youtube": "https://www.youtube.com/watch?v=v1desDduz5M"
-    },
-    "Advanced": {
-        "title": "Level 3: Sentences",
-        "description": "Full conversations",
-        "sentences": ["How are you?", "Nice to meet you", "What is your name?"],
-        "youtube": "https://www.youtube.com/watch?v=v1desDduz5M"
-    }
-}
-
-QUIZZES = {
-    "ASL Alphabet Quiz": {
-        "questions": [
-            {"q": "What does letter 'A' look like?", "options": ["Closed fist", "Open palm", "Point finger", "Peace"], "emojis": ["👊", "✋", "☝️", "✌️"], "correct": 0, "points": 10},
-            {"q": "How to sign 'B'?", "options": ["Flat hand", "Closed fist", "Two fingers", "Thumb between"], "emojis": ["✋", "👊", "✌️", "🤏"], "correct": 0, "points": 10},
-            {"q": "Which is 'C'?", "options": ["C shape", "Open palm", "Pointing", "Peace sign"], "emojis": ["👌", "✋", "☝️", "✌️"], "correct": 0, "points": 10},
-            {"q": "Sign for 'D'?", "options": ["Index up", "Closed fist", "Flat hand", "Pinky up"], "emojis": ["☝️", "👊", "✋", "🤙"], "correct": 0, "points": 10},
-            {"q": "How is 'E' signed?", "options": ["Fingers curled", "Open palm", "Two fingers", "Thumb up"], "emojis": ["✊", "✋", "✌️", "👍"], "correct": 0, "points": 10}
-        ]
-    },
-    "Numbers Quiz": {
-        "questions": [
-            {"q": "Sign for '1'?", "options": ["Index up", "Thumb up", "Open palm", "Closed fist"], "emojis": ["☝️", "👍", "✋", "👊"], "correct": 0, "points": 10},
-            {"q": "Number '5'?", "options": ["All fingers", "Index only", "Two fingers", "Thumb only"], "emojis": ["✋", "☝️", "✌️", "👍"], "correct": 0, "points": 10},
-            {"q": "Sign for '3'?", "options": ["Three fingers", "One finger", "Two fingers", "All fingers"], "emojis": ["✋", "☝️", "✌️", "👊"], "correct": 0, "points": 10},
-        ]
-    },
-    "Greetings Quiz": {
-        "questions": [
-            {"q": "Say 'Hello'?", "options": ["Wave hand", "Salute", "Shake hands", "Nod"], "emojis": ["👋", "✌️", "🤝", "😊"], "correct": 0, "points": 10},
-            {"q": "Say 'Thanks'?", "options": ["Hand on chest", "Clap", "Thumbs up", "Wave"], "emojis": ["🙏", "👏", "👍", "👋"], "correct": 0, "points": 10},
-        ]
-    }
-}
+DATA_DIR = Path(os.environ.get("SIGNHUB_DATA_DIR", "data"))
+metrics.configure(
+    metrics_file=os.environ.get("SIGNHUB_METRICS_FILE", str(DATA_DIR / "metrics.prom")),
+    export_interval=float(os.environ.get("SIGNHUB_METRICS_INTERVAL", "10")),
+    profile_slow_ms=float(os.environ.get("SIGNHUB_PROFILE_SLOW_MS", "0")),
+    profile_dir=os.environ.get("SIGNHUB_PROFILE_DIR", str(DATA_DIR / "profiles")),
+    state_sample_every=int(os.environ.get("SIGNHUB_STATE_SAMPLE_EVERY", "50")),
+)
+METRICS_PORT = int(os.environ.get("SIGNHUB_METRICS_PORT", "0"))
+
+if __name__ == "__main__":
+    # app.py re-executes top to bottom on every rerun, so this times the whole run
+    metrics.begin_rerun()
+    metrics.instrument_markdown(st)
+
+# ============================================================
+# LEARNING CONTENT
+# ============================================================
+CONTENT_DIR = Path(os.environ.get("SIGNHUB_CONTENT_DIR", str(Path(__file__).parent / "content")))
+CONTENT_CHECK_INTERVAL = float(os.environ.get("SIGNHUB_CONTENT_CHECK_INTERVAL", "2"))
+PHRASE_CACHE = int(os.environ.get("SIGNHUB_PHRASE_CACHE", "2048"))
+
+@shared_resource
+def get_content_library():
+    # Alphabet, levels and quizzes live in content/*.json|toml packs
+    return ContentLibrary(CONTENT_DIR, CONTENT_CHECK_INTERVAL, PHRASE_CACHE)
+
+# Rebound on every rerun, so an edited pack is live on the next interaction
+CONTENT = get_content_library().current()
+ASL_ALPHABET = CONTENT.alphabet
+ASL_DESCRIPTIONS = CONTENT.descriptions
+LEARNING_LEVELS = CONTENT.levels
+QUIZZES = CONTENT.quizzes
 
 GAMES = [
     {
@@ -121,13 +112,53 @@ GAMES = [
 # ============================================================
 # PROFESSIONAL GEN-Z CSS
 # ============================================================
+# Assets live in "public " (the directory name has a trailing space) and are
+# copied into static/ for Streamlit's static file serving
+PUBLIC_DIR = Path(__file__).parent / "public "
+STATIC_DIR = Path(__file__).parent / "static"
+STATIC_URL = "app/static/"
+# "self": Inter from public /fonts, "google": Google Fonts, "system": no font requests at all.
+# The Inter file isn't shipped, so self-hosting is the default only once it has been added
+INTER_FONT = "fonts/Inter-Variable.woff2"
+FONT_MODE = os.environ.get("SIGNHUB_FONTS", "self" if (PUBLIC_DIR / INTER_FONT).is_file() else "system")
+
+def publish_asset(name):
+    """Copy public/<name> into static/ and return its versioned URL path, or None if absent.
+
+    The ?v=<hash> query makes Tornado's static handler send a
+    10-year Cache-Control, and changes whenever the file does.
+    """
+    src = PUBLIC_DIR / name
+    if not src.is_file():
+        return None
+    data = src.read_bytes()
+    dest = STATIC_DIR / name
+    if not dest.is_file() or dest.read_bytes() != data:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.write_bytes(data)
+    return f"{name}?v={hashlib.sha256(data).hexdigest()[:12]}"
+
+def get_asset_css():
+    """@font-face and illustration rules pointing at self-hosted files"""
+    rules = []
+    if FONT_MODE == "google":
+        rules.append("@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&display=swap');")
+    elif FONT_MODE == "self":
+        font = publish_asset(INTER_FONT)
+        if not font:
+            print(f"⚠️ SIGNHUB_FONTS=self but {PUBLIC_DIR / INTER_FONT} is missing; using a local Inter or system fonts")
+        src = "local('Inter'),local('Inter Variable')" + (f",url('{STATIC_URL}{font}') format('woff2')" if font else "")
+        rules.append(f"@font-face{{font-family:'Inter';font-style:normal;font-weight:100 900;font-display:swap;src:{src}}}")
+    illustration = publish_asset("welcome-illustration.png")
+    if illustration:
+        rules.append(f".welcome-illustration{{background:url('{STATIC_URL}{illustration}') center/contain no-repeat}}")
+    return "".join(rules)
+
 def get_professional_css():
     return """
     <style>
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&display=swap');
-
         * {
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
+            font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             box-sizing: border-box;
             margin: 0;
             padding: 0;
@@ -200,7 +231,6 @@ def get_professional_css():
         .welcome-illustration {
             width: 100%;
             height: 280px;
-            background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 400 350"><defs><linearGradient id="g1" x1="0" x2="0" y1="1" y2="0"><stop offset="0%25" stop-color="%232a6f64"/><stop offset="100%25" stop-color="%2397bb72"/></linearGradient></defs><rect width="400" height="350" fill="url(%23g1)" rx="20"/><circle cx="320" cy="90" r="25" fill="%23fff" opacity="0.7"/><circle cx="280" cy="120" r="35" fill="%23e8f0de"/><rect x="170" y="150" width="70" height="40" fill="%23e6daca" rx="5"/><rect x="230" y="180" width="70" height="40" fill="%23c8d6c2" rx="5"/><polygon points="60,270 75,250 95,270 75,300" fill="%231f3a33"/></svg>') center/contain no-repeat;
             margin-top: auto;
         }
 
@@ -462,6 +492,40 @@ def get_professional_css():
             animation: fadeIn 0.5s;
         }
 
+        /* Fingerspelled text */
+        .fs-line {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 0.75rem;
+            margin: 0.5rem 0;
+        }
+
+        .fs-word {
+            display: inline-flex;
+            gap: 0.25rem;
+            padding: 0.25rem 0.5rem;
+            background: white;
+            border: 1px solid var(--border);
+            border-radius: 10px;
+        }
+
+        .fs-glyph {
+            display: inline-flex;
+            flex-direction: column;
+            align-items: center;
+            min-width: 2rem;
+        }
+
+        .fs-emoji {
+            font-size: 1.5rem;
+        }
+
+        .fs-letter {
+            font-size: 0.75rem;
+            font-weight: 700;
+            color: var(--primary);
+        }
+
         @keyframes fadeIn {
             from { opacity: 0; }
             to { opacity: 1; }
@@ -531,47 +595,107 @@ def get_professional_css():
     </style>
     """
 
-st.markdown(get_professional_css(), unsafe_allow_html=True)
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+def compact_html(markup):
+    """Drop comments and inter-tag whitespace from an HTML block"""
+    markup = re.sub(r"<!--.*?-->", "", markup, flags=re.S)
+    return re.sub(r">\s+<", "><", markup.strip())
 
-print("✅ Part 1: Professional CSS + Data Structures")
+def html_block(markup):
+    st.markdown(compact_html(markup), unsafe_allow_html=True)
+
+@shared_resource
+def get_css_payload():
+    """Minified stylesheet, built once per process.
+
+    Streamlit's static route serves anything but images as text/plain with
+    nosniff, which browsers refuse as a stylesheet, so the CSS stays inline;
+    the font and illustration it references are cacheable static files.
+    """
+    css = minify_css(get_professional_css())[len("<style>"):-len("</style>")]
+    return f"<style>{get_asset_css()}{css}</style>"
+
+st.markdown(get_css_payload(), unsafe_allow_html=True)
 
 # ============================================================
 # DATA MANAGEMENT
 # ============================================================
-DATA_DIR = Path("data")
-DATA_DIR.mkdir(exist_ok=True)
+DATA_DIR.mkdir(parents=True, exist_ok=True)
 USERS_FILE = DATA_DIR / "users.json"
 PROGRESS_FILE = DATA_DIR / "progress.json"
+STORAGE_BACKEND = os.environ.get("SIGNHUB_STORAGE", "sqlite")
+CACHE_SIZE = int(os.environ.get("SIGNHUB_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.environ.get("SIGNHUB_CACHE_TTL", "300"))
+STORAGE_FSYNC = os.environ.get("SIGNHUB_FSYNC", "1") != "0"
+COMPACT_INTERVAL = float(os.environ.get("SIGNHUB_COMPACT_INTERVAL", "60"))
+COMPACT_MAX_PENDING = int(os.environ.get("SIGNHUB_COMPACT_MAX_PENDING", "1000"))
+WRITE_BEHIND = os.environ.get("SIGNHUB_WRITE_BEHIND", "0") == "1"
+FLUSH_INTERVAL = float(os.environ.get("SIGNHUB_FLUSH_INTERVAL", "2"))
+FLUSH_MAX_EVENTS = int(os.environ.get("SIGNHUB_FLUSH_MAX_EVENTS", "500"))
+ANALYTICS_MIN_REFRESH = float(os.environ.get("SIGNHUB_ANALYTICS_MIN_REFRESH", "30"))
+RESULTS_PAGE_SIZE = int(os.environ.get("SIGNHUB_RESULTS_PAGE_SIZE", "10"))
+CERTIFICATE_DIR = Path(os.environ.get("SIGNHUB_CERTIFICATE_DIR", str(DATA_DIR / "certificates")))
+CERTIFICATE_WORKERS = int(os.environ.get("SIGNHUB_CERTIFICATE_WORKERS", "2"))
+RECOGNITION_QUEUE = int(os.environ.get("SIGNHUB_RECOGNITION_QUEUE", "8"))
+TEMPLATE_INDEX_DIR = Path(os.environ.get("SIGNHUB_TEMPLATE_INDEX", str(DATA_DIR / "templates")))
+# Test mode: a recorded landmark file (.npz/.jsonl) stands in for the webcam
+RECOGNITION_REPLAY = os.environ.get("SIGNHUB_RECOGNITION_REPLAY", "")
+# Word list (one word per line) or an already compiled file; a list is compiled into DATA_DIR when it changes
+WORDLIST = os.environ.get("SIGNHUB_WORDLIST", str(CONTENT_DIR / "words.txt"))
+
+@shared_resource
+def get_store():
+    # One store + record cache per server process, shared by every session
+    return CachedStorage(open_storage(STORAGE_BACKEND, DATA_DIR, STORAGE_FSYNC), RecordCache(CACHE_SIZE, CACHE_TTL))
+
+def cache_stats():
+    return get_store().cache.stats()
+
+passwords.configure(
+    scheme=os.environ.get("SIGNHUB_PASSWORD_SCHEME"),
+    scrypt_n=int(os.environ.get("SIGNHUB_SCRYPT_N", "0")),
+    scrypt_r=int(os.environ.get("SIGNHUB_SCRYPT_R", "0")),
+    scrypt_p=int(os.environ.get("SIGNHUB_SCRYPT_P", "0")),
+    pbkdf2_iterations=int(os.environ.get("SIGNHUB_PBKDF2_ITERATIONS", "0")),
+)
 
 def hash_password(p):
-    return hashlib.sha256(p.encode()).hexdigest()
-
-def load_json(p, default=None):
-    if default is None: default = {}
-    try:
-        if Path(p).exists():
-            with open(p, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except:
-        pass
-    return default
-
-def save_json(p, data):
-    try:
-        with open(p, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        return True
-    except:
-        return False
+    # Blocks this session's script thread only; scrypt releases the GIL so other sessions keep rerunning
+    return passwords.hash_password_limited(p)
 
+@shared_resource
 def initialize():
-    if not USERS_FILE.exists():
-        save_json(USERS_FILE, {
-            "admin": {"password": hash_password("admin123"), "email": "admin@signhub.com", "full_name": "Admin User", "country": "USA", "phone": "", "bio": "", "joined": datetime.now().isoformat()},
-            "demo": {"password": hash_password("demo123"), "email": "demo@signhub.com", "full_name": "Demo User", "country": "India", "phone": "", "bio": "", "joined": datetime.now().isoformat()}
-        })
-    if not PROGRESS_FILE.exists():
-        save_json(PROGRESS_FILE, {})
+    # Once per process: counting users is a full scan on the JSON backend
+    get_compactor()
+    store = get_store()
+    # Bind the store itself: exporter threads have no script context to resolve get_store() in
+    metrics.register_gauges("record_cache", lambda: {f"signhub_record_cache_{k}": v for k, v in store.cache.stats().items()})
+    library = get_content_library()
+    metrics.register_gauges("phrase_cache", lambda: {f"signhub_phrase_cache_{k}": v for k, v in library.current().speller.stats().items()})
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+    if not store.count_users():
+        seed_store(store)
+    get_leaderboard()
+    get_attempt_history()
+    get_review_scheduler()
+
+def new_progress():
+    return {"level": 1, "quizzes_taken": 0, "quiz_scores": {}, "total_points": 0, "certificates": []}
+
+def seed_store(store):
+    # First run on this backend: pull in legacy users.json/progress.json if present
+    if STORAGE_BACKEND != "json" and store.import_legacy(USERS_FILE, PROGRESS_FILE):
+        return
+    store.import_records({
+        "admin": {"password": hash_password("admin123"), "email": "admin@signhub.com", "full_name": "Admin User", "country": "USA", "phone": "", "bio": "", "joined": datetime.now().isoformat()},
+        "demo": {"password": hash_password("demo123"), "email": "demo@signhub.com", "full_name": "Demo User", "country": "India", "phone": "", "bio": "", "joined": datetime.now().isoformat()}
+    }, {"admin": new_progress(), "demo": new_progress()})
 
 def register_user(name, email, password, password2):
     if password != password2:
@@ -579,67 +703,187 @@ def register_user(name, email, password, password2):
     if len(password) < 6:
         return False, "Password must be 6+ characters"
 
-    users = load_json(USERS_FILE, {})
-    for username, data in users.items():
-        if data.get('email') == email:
-            return False, "Email already registered"
-
-    username = email.split('@')[0].lower()
-    counter = 1
-    original = username
-    while username in users:
-        username = f"{original}{counter}"
-        counter += 1
+    store = get_store()
+    if store.find_username(email):
+        return False, "Email already registered"
 
-    users[username] = {"password": hash_password(password), "email": email, "full_name": name, "country": "", "phone": "", "bio": "", "joined": datetime.now().isoformat()}
-    prog = load_json(PROGRESS_FILE, {})
-    prog[username] = {"level": 1, "quizzes_taken": 0, "quiz_scores": {}, "total_points": 0, "certificates": []}
-    save_json(USERS_FILE, users)
-    save_json(PROGRESS_FILE, prog)
-    return True, f"Success! Your username is: {username}"
+    user = {"password": hash_password(password), "email": email, "full_name": name, "country": "", "phone": "", "bio": "", "joined": datetime.now().isoformat()}
+    for _ in range(3):
+        username = store.allocate_username(normalize_email(email).split('@')[0])
+        if store.add_user(username, user, new_progress()):
+            return True, f"Success! Your username is: {username}"
+        if store.find_username(email):
+            return False, "Email already registered"
+        # Another registration took the allocated username first; allocate the next one
+    return False, "Could not create your account right now. Please try again."
 
 def login_user(email, password):
-    users = load_json(USERS_FILE, {})
-    username = None
-    for uname, data in users.items():
-        if data.get('email') == email:
-            username = uname
-            break
+    store = get_store()
+    username = store.find_username(email)
 
     if not username:
         return False, None, "User not found"
-    if users[username]["password"] != hash_password(password):
+    stored = store.get_user(username).get("password", "")
+    if not passwords.verify_password_limited(password, stored):
         return False, None, "Incorrect password"
+    if passwords.needs_rehash(stored):
+        # Legacy SHA-256 or outdated cost: upgrade now that we know the password
+        update_user(username, {"password": hash_password(password)})
     return True, username, "Login successful"
 
 def get_user(username):
-    return load_json(USERS_FILE, {}).get(username, {})
+    return get_store().get_user(username)
 
 def update_user(username, updates):
-    users = load_json(USERS_FILE, {})
-    if username in users:
-        users[username].update(updates)
-        save_json(USERS_FILE, users)
+    get_store().update_user(username, updates)
+
+@shared_resource
+def get_progress_log():
+    return ProgressLog(DATA_DIR / "progress_events.jsonl", get_store(), STORAGE_FSYNC, WRITE_BEHIND, FLUSH_MAX_EVENTS)
+
+@shared_resource
+def get_compactor():
+    compactor = Compactor(get_progress_log(), COMPACT_INTERVAL, COMPACT_MAX_PENDING)
+    compactor.start()
+    atexit.register(compactor.stop)
+    if WRITE_BEHIND:
+        # Registered last so it runs first at exit, before the final compaction
+        flusher = Flusher(get_progress_log(), FLUSH_INTERVAL)
+        flusher.start()
+        atexit.register(flusher.stop)
+    return compactor
+
+@shared_resource
+def get_leaderboard():
+    board = Leaderboard(DATA_DIR / "leaderboard.json", STORAGE_FSYNC)
+    if not board.exists():
+        # First start with leaderboards: rank everyone already in the store
+        board.rebuild(get_store(), get_progress_log())
+        board.save()
+    # Points reach the board as progress events, from this process or any other
+    board.attach(get_progress_log())
+    get_compactor().on_compact.append(board.save)
+    return board
+
+@shared_resource
+def get_attempt_history():
+    history = AttemptHistory(DATA_DIR / "attempts.db", STORAGE_FSYNC)
+    # On first start this replays the whole audit trail, so earlier attempts are backfilled
+    history.attach(get_progress_log())
+    history.flush()
+    get_compactor().on_compact.append(history.flush)
+    return history
+
+@shared_resource
+def get_review_scheduler():
+    scheduler = ReviewScheduler(DATA_DIR / "reviews.db", STORAGE_FSYNC)
+    scheduler.attach(get_progress_log())
+    scheduler.flush()
+    get_compactor().on_compact.append(scheduler.flush)
+    return scheduler
+
+@shared_resource
+def get_recognition_pipeline():
+    # One worker for every session, so frames from concurrent players are classified in shared batches
+    landmarker = recognition.HandLandmarker() if recognition.mp is not None and not RECOGNITION_REPLAY else None
+    # Memory-mapped reference library; samples added with `recognition.py --add` are picked up live
+    recognizer = recognition.default_recognizer(str(TEMPLATE_INDEX_DIR))
+    return recognition.RecognitionPipeline(recognizer, landmarker, RECOGNITION_QUEUE, RECOGNITION_QUEUE)
+
+@shared_resource
+def get_replay_recording():
+    """(landmarks, {letter: frame indexes}) of the test-mode recording"""
+    landmarks, labels, _ = recognition.load_recording(RECOGNITION_REPLAY)
+    frames = {}
+    for i, label in enumerate(labels or ()):
+        frames.setdefault(label, []).append(i)
+    return landmarks, frames
+
+@shared_resource
+def get_word_dictionary():
+    # Memory-mapped: every session draws from the same pages
+    return open_dictionary(WORDLIST, DATA_DIR / "dictionary.words")
+
+@shared_resource
+def get_certificate_renderer():
+    return CertificateRenderer(CERTIFICATE_DIR, CERTIFICATE_WORKERS)
+
+@shared_resource
+def get_analytics():
+    library = get_content_library()
+    return Analytics(get_store(), get_progress_log(), lambda: len(library.current().quizzes), ANALYTICS_MIN_REFRESH)
+
+def record_progress(username, events):
+    get_progress_log().record(username, events)
+    get_compactor().nudge()
+
+def get_progress_summary(username):
+    """username's progress (store snapshot plus logged events) without the certificate list; certificate_count holds its length"""
+    prog = get_progress_log().overlay(username, get_store().get_progress_summary(username))
+    # The overlay adds certificates still in the log as a list of just those
+    prog['certificate_count'] = prog.get('certificate_count', 0) + len(prog.pop('certificates', []))
+    return prog
+
+def get_certificates(username, offset, limit):
+    """Newest-first page of username's certificates; only that page is read from the store"""
+    store, log = get_store(), get_progress_log()
+    fresh = 0
+    for _ in range(3):
+        # The newest certificates may still be in the log; the rest of the page comes from the store
+        from_log = max(0, min(limit, fresh - offset))
+        stored, _, seq = store.get_certificates(username, max(0, offset - fresh), limit - from_log)
+        recent = [e["cert"] for e in log.tail_events(username, seq) if e["type"] == "certificate_issued"][::-1]
+        if len(recent) == fresh:
+            break
+        # A compaction or a new certificate moved the boundary; slice again
+        fresh = len(recent)
+    return recent[offset:offset + limit] + stored
+
+# ============================================================
+# PAGINATION
+# ============================================================
+def pager(key, total, per_page=None):
+    """Newer/Older controls over total items; returns (offset, per_page) of the page to show"""
+    per_page = per_page or RESULTS_PAGE_SIZE
+    pages = max(1, -(-total // per_page))
+    page = min(st.session_state.get(key, 0), pages - 1)
+    if pages > 1:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("◀ Newer", key=f"{key}_newer", disabled=page == 0):
+                page -= 1
+        with col3:
+            if st.button("Older ▶", key=f"{key}_older", disabled=page >= pages - 1):
+                page += 1
+        with col2:
+            st.markdown(f"<div style='text-align: center; font-weight: 600;'>Page {page + 1} of {pages} • {total} total</div>", unsafe_allow_html=True)
+    st.session_state[key] = page
+    return page * per_page, per_page
 
-def get_progress(username):
-    return load_json(PROGRESS_FILE, {}).get(username, {})
+# ============================================================
+# FLASH MESSAGES
+# ============================================================
+def flash(msg):
+    """Queue a message for the next render instead of sleeping before st.rerun()"""
+    st.session_state.flash = msg
 
-def update_progress(username, updates):
-    prog = load_json(PROGRESS_FILE, {})
-    if username in prog:
-        prog[username].update(updates)
-        save_json(PROGRESS_FILE, prog)
+def show_flash():
+    msg = st.session_state.pop("flash", None)
+    if msg:
+        # Toasts fade out in the browser, so no server thread waits on them
+        st.toast(msg)
 
 # ============================================================
 # EXACT LOGIN PAGE - RIGHT SIDE FORM
 # ============================================================
+@metrics.timed_page
 def page_login():
     """Exact login design with form on RIGHT side"""
 
     if 'login_mode' not in st.session_state:
         st.session_state.login_mode = 'login'
 
-    st.markdown("""
+    html_block("""
     <div class="login-container-exact">
         <!-- LEFT: Welcome Side -->
         <div class="welcome-side-exact">
@@ -649,7 +893,7 @@ def page_login():
 
         <!-- RIGHT: Form Side -->
         <div class="form-side-exact">
-    """, unsafe_allow_html=True)
+    """)
 
     # Tab Selection
     col1, col2 = st.columns(2)
@@ -681,8 +925,7 @@ def page_login():
                 if ok:
                     st.session_state.authenticated = True
                     st.session_state.username = username
-                    st.success("✅ " + msg)
-                    time.sleep(0.5)
+                    flash("✅ " + msg)
                     st.rerun()
                 else:
                     st.error("❌ " + msg)
@@ -695,14 +938,14 @@ def page_login():
         st.markdown('<div class="form-title-exact">Hello!<br>We are glad to see you :)</div>', unsafe_allow_html=True)
 
         # Social Buttons
-        st.markdown("""
+        html_block("""
         <div class="social-buttons-exact">
             <button class="social-btn-exact google-btn"><span style="font-weight:900;">G</span> Google</button>
             <button class="social-btn-exact facebook-btn"><span style="font-weight:900;">f</span> Facebook</button>
             <button class="social-btn-exact twitter-btn"><span style="font-weight:900;">t</span> Twitter</button>
         </div>
         <div class="or-divider-exact"><span></span><small>Or</small><span></span></div>
-        """, unsafe_allow_html=True)
+        """)
 
         with st.form("register_form"):
             col1, col2 = st.columns(2)
@@ -737,71 +980,76 @@ def page_login():
 
     st.markdown("</div></div>", unsafe_allow_html=True)
 
-print("✅ Part 2: Data + Exact Login Page")
-
 # ============================================================
 # PROFESSIONAL DASHBOARD WITH BACK BUTTON
 # ============================================================
+@metrics.timed_page
 def page_dashboard():
     u = st.session_state.username
     user = get_user(u)
-    prog = get_progress(u)
+    prog = get_progress_summary(u)
 
     # Navigation
-    st.markdown(f"""
+    html_block(f"""
     <div class="dashboard-nav">
         <h1 class="dashboard-title">🤟 SignHub</h1>
         <div style="display: flex; gap: 10px;">
             <button class="btn-modern btn-logout" onclick="location.reload()">Logout</button>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """)
 
     if st.button("🚪 Logout", key="logout_btn"):
         st.session_state.authenticated = False
         st.rerun()
 
     st.markdown(f"### Welcome back, **{user.get('full_name', u)}**! 👋")
+    if u == "admin":
+        stats = cache_stats()
+        st.caption(f"Record cache: {stats['hits']} hits • {stats['misses']} misses • {stats['hit_rate']:.0%} hit rate • {stats['size']} entries")
+        if st.button("📈 Cohort Analytics", key="btn_analytics"):
+            st.session_state.page = "analytics"
+            st.rerun()
     st.markdown("<br>", unsafe_allow_html=True)
 
     # Stats
     c1, c2, c3, c4 = st.columns(4)
 
     with c1:
-        st.markdown(f"""
+        html_block(f"""
         <div class="stat-card-modern">
             <div class="stat-icon">🎯</div>
             <div class="stat-value">{prog.get('quizzes_taken', 0)}</div>
             <div class="stat-label">Quizzes</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
 
     with c2:
-        st.markdown(f"""
+        html_block(f"""
         <div class="stat-card-modern">
             <div class="stat-icon">⭐</div>
             <div class="stat-value">{prog.get('level', 1)}</div>
             <div class="stat-label">Level</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
 
     with c3:
-        st.markdown(f"""
+        html_block(f"""
         <div class="stat-card-modern">
             <div class="stat-icon">🏆</div>
-            <div class="stat-value">{len(prog.get('certificates', []))}</div>
+            <div class="stat-value">{prog.get('certificate_count', 0)}</div>
             <div class="stat-label">Certificates</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
 
     with c4:
-        st.markdown(f"""
+        html_block(f"""
         <div class="stat-card-modern">
             <div class="stat-icon">✨</div>
             <div class="stat-value">{prog.get('total_points', 0)}</div>
             <div class="stat-label">Points</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
 
     st.markdown("<br><br>", unsafe_allow_html=True)
 
@@ -809,49 +1057,49 @@ def page_dashboard():
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.markdown("""
+        html_block("""
         <div class="action-card">
             <div class="action-icon">📚</div>
             <div class="action-title">Learn</div>
             <div class="action-desc">Basic to Advanced</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
         if st.button("Start Learning", key="btn_learn", use_container_width=True):
             st.session_state.page = "learning"
             st.rerun()
 
     with col2:
-        st.markdown("""
+        html_block("""
         <div class="action-card">
             <div class="action-icon">✍️</div>
             <div class="action-title">Quizzes</div>
             <div class="action-desc">Test knowledge</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
         if st.button("Take Quiz", key="btn_quiz", use_container_width=True):
             st.session_state.page = "quizzes"
             st.rerun()
 
     with col3:
-        st.markdown("""
+        html_block("""
         <div class="action-card">
             <div class="action-icon">🎮</div>
             <div class="action-title">Games</div>
             <div class="action-desc">Fun challenges</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
         if st.button("Play Games", key="btn_games", use_container_width=True):
             st.session_state.page = "games"
             st.rerun()
 
     with col4:
-        st.markdown("""
+        html_block("""
         <div class="action-card">
             <div class="action-icon">📜</div>
             <div class="action-title">Results</div>
             <div class="action-desc">View scores</div>
         </div>
-        """, unsafe_allow_html=True)
+        """)
         if st.button("View Results", key="btn_results", use_container_width=True):
             st.session_state.page = "results"
             st.rerun()
@@ -859,6 +1107,7 @@ def page_dashboard():
 # ============================================================
 # LEARNING PAGE - BASIC TO ADVANCED + YOUTUBE
 # ============================================================
+@metrics.timed_page
 def page_learning():
     # Back Button
     if st.button("← Back to Dashboard", key="back_learn"):
@@ -869,8 +1118,30 @@ def page_learning():
     st.markdown("Progress through levels: **Basic → Intermediate → Advanced**")
     st.markdown("<br>", unsafe_allow_html=True)
 
+    # Spaced repetition: letters the learner's quiz answers say are due again
+    scheduler = get_review_scheduler()
+    due = [letter for letter, _ in scheduler.due(st.session_state.username, limit=7) if letter in ASL_ALPHABET]
+    if due:
+        st.markdown("### 🔁 Due for Review")
+        cols = st.columns(7)
+        for idx, letter in enumerate(due):
+            with cols[idx]:
+                st.markdown(f"""
+                <div style="background: white; border: 2px solid #F59E0B; border-radius: 10px; padding: 1rem; text-align: center;">
+                    <div style="font-size: 2rem;">{ASL_ALPHABET[letter]}</div>
+                    <div style="font-weight: 700; color: #2E7867;">{letter}</div>
+                    <div style="font-size: 0.8rem;">{ASL_DESCRIPTIONS[letter]}</div>
+                </div>
+                """, unsafe_allow_html=True)
+        st.caption("Picked from your quiz answers. Practise these, then take an alphabet quiz to review them.")
+        st.markdown("<br>", unsafe_allow_html=True)
+    else:
+        upcoming = scheduler.next_review(st.session_state.username)
+        if upcoming:
+            st.caption(f"🔁 Nothing to review right now. Next up: **{upcoming[0]}** on {datetime.fromtimestamp(upcoming[1], timezone.utc):%b %d}")
+
     # Level Tabs
-    level = st.radio("Select Level:", ["Basic", "Intermediate", "Advanced"], horizontal=True)
+    level = st.radio("Select Level:", list(LEARNING_LEVELS), horizontal=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -885,7 +1156,7 @@ def page_learning():
     <div style="background: white; padding: 1.5rem; border-radius: 12px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
         <h4>📺 Watch Video Tutorial</h4>
         <p>Learn ASL with step-by-step video guidance</p>
-        <a href="{level_data['youtube']}" target="_blank" style="color: #2E7867; font-weight: 600;">
+        <a href="{level_data.get('youtube', '')}" target="_blank" style="color: #2E7867; font-weight: 600;">
             ▶️ Open YouTube Tutorial
         </a>
     </div>
@@ -900,10 +1171,10 @@ def page_learning():
     if st.session_state.get('show_keyboard', False):
         st.markdown("### ASL Alphabet Reference")
         cols = st.columns(7)
-        for idx, letter in enumerate(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')):
+        for idx, letter in enumerate(CONTENT.letters):
             with cols[idx % 7]:
                 st.markdown(f"""
-                <div style="background: white; border: 2px solid #2E7867; border-radius: 10px; padding: 1rem; text-align: center;">
+                <div style="background: white; border: 2px solid {'#F59E0B' if letter in due else '#2E7867'}; border-radius: 10px; padding: 1rem; text-align: center;">
                     <div style="font-size: 2rem;">{ASL_ALPHABET[letter]}</div>
                     <div style="font-weight: 700; color: #2E7867;">{letter}</div>
                 </div>
@@ -911,26 +1182,44 @@ def page_learning():
 
     st.markdown("<br>", unsafe_allow_html=True)
 
-    # Content based on level
-    if level == "Basic":
+    # Content based on what the level's pack entry lists
+    if 'letters' in level_data:
         st.markdown("### Alphabet Practice")
-        st.info("Click 'Show ASL Keyboard Reference' above to see all 26 letters with their signs")
+        st.info(f"Click 'Show ASL Keyboard Reference' above to see all {len(CONTENT.letters)} letters with their signs")
 
-    elif level == "Intermediate":
+    if 'words' in level_data:
         st.markdown("### Common Words")
-        words = level_data.get('words', [])
-        for word in words:
-            st.markdown(f"- **{word}**")
+        for word in level_data['words']:
+            # Rendered once per process; reruns hit the phrase cache
+            st.markdown(f"**{word}**\n\n{CONTENT.speller.render(word)}", unsafe_allow_html=True)
 
-    else:  # Advanced
+    if 'sentences' in level_data:
         st.markdown("### Full Sentences")
-        sentences = level_data.get('sentences', [])
-        for sentence in sentences:
-            st.markdown(f"- **{sentence}**")
+        for sentence in level_data['sentences']:
+            st.markdown(f"**{sentence}**\n\n{CONTENT.speller.render(sentence)}", unsafe_allow_html=True)
+
+    st.markdown("### ✍️ Fingerspell Anything")
+    text = st.text_area("Type a name, word or passage to see it letter by letter", max_chars=2000, key="fingerspell_text")
+    if text.strip():
+        # One element per line of tiles rather than one giant block
+        with st.container():
+            for line in CONTENT.speller.stream(text):
+                st.markdown(line, unsafe_allow_html=True)
+        with st.expander("📋 Step-by-step"):
+            lines, n = [], 0
+            for step in CONTENT.speller.steps(text):
+                if step is None:
+                    lines.append("")
+                    continue
+                char, emoji, description = step
+                n += 1
+                lines.append(f"{n}. **{char}** {emoji or ''} {description or 'Sign the number'}")
+            st.markdown("\n".join(lines))
 
 # ============================================================
 # QUIZ PAGE - SLIDESHOW STYLE + DIRECT RESULTS ACCESS
 # ============================================================
+@metrics.timed_page
 def page_quizzes():
     # Back Button
     if st.button("← Back to Dashboard", key="back_quiz"):
@@ -956,27 +1245,38 @@ def page_quizzes():
                 st.markdown(f"""
                 <div class="action-card">
                     <h3>{quiz_name}</h3>
-                    <p>{len(QUIZZES[quiz_name]['questions'])} questions • {sum(q['points'] for q in QUIZZES[quiz_name]['questions'])} points</p>
+                    <p>{CONTENT.quiz_lengths[quiz_name]} questions • {CONTENT.quiz_points[quiz_name]} points</p>
                 </div>
                 """, unsafe_allow_html=True)
             with col2:
                 if st.button(f"Start", key=f"start_{quiz_name}"):
                     st.session_state.quiz_started = True
                     st.session_state.quiz_name = quiz_name
+                    st.session_state.quiz_digest = CONTENT.quiz_digests[quiz_name]
+                    # Only the drawn question positions and the seed live in the session
+                    st.session_state.quiz_seed = random.getrandbits(32)
+                    st.session_state.quiz_questions = CONTENT.draw(quiz_name, st.session_state.quiz_seed)
                     st.session_state.current_question = 0
                     st.session_state.quiz_score = 0
+                    st.session_state.quiz_answers = []
+                    st.session_state.quiz_saved = False
                     st.rerun()
+    elif CONTENT.quiz_digests.get(st.session_state.quiz_name) != st.session_state.get('quiz_digest'):
+        # The pack was edited mid-attempt: question indexes no longer line up
+        st.session_state.quiz_started = False
+        flash("🔄 This quiz was just updated. Please start it again.")
+        st.rerun()
     else:
         quiz_name = st.session_state.quiz_name
-        questions = QUIZZES[quiz_name]['questions']
+        drawn = st.session_state.quiz_questions
         current_q = st.session_state.current_question
 
-        if current_q < len(questions):
+        if current_q < len(drawn):
             # Quiz Slideshow
-            question = questions[current_q]
+            question = CONTENT.question(quiz_name, drawn[current_q], st.session_state.quiz_seed)
 
-            st.progress((current_q + 1) / len(questions))
-            st.markdown(f"**Question {current_q + 1} of {len(questions)}**")
+            st.progress((current_q + 1) / len(drawn))
+            st.markdown(f"**Question {current_q + 1} of {len(drawn)}**")
 
             st.markdown(f"""
             <div class="quiz-slide">
@@ -991,34 +1291,34 @@ def page_quizzes():
                     st.markdown(f"<div style='font-size: 2.5rem; text-align: center;'>{emoji}</div>", unsafe_allow_html=True)
                 with col2:
                     if st.button(option, key=f"opt_{idx}", use_container_width=True):
-                        if idx == question['correct']:
+                        correct = idx == question['correct']
+                        if correct:
                             st.session_state.quiz_score += question['points']
-                            st.success("✅ Correct!")
+                            flash("✅ Correct!")
                         else:
-                            st.error("❌ Incorrect")
+                            flash("❌ Incorrect")
+                        st.session_state.setdefault('quiz_answers', []).append(int(correct))
                         st.session_state.current_question += 1
-                        time.sleep(1)
                         st.rerun()
         else:
             # Quiz Complete - Direct Results
-            total_points = sum(q['points'] for q in questions)
+            total_points = CONTENT.quiz_points[quiz_name]
             score = st.session_state.quiz_score
             percentage = (score / total_points) * 100
 
-            # Save results
-            u = st.session_state.username
-            prog = get_progress(u)
-            prog['quizzes_taken'] = prog.get('quizzes_taken', 0) + 1
-            scores = prog.get('quiz_scores', {})
-            scores[quiz_name] = {"score": score, "total": total_points, "percentage": percentage, "date": datetime.now().strftime("%Y-%m-%d %H:%M")}
-            prog['quiz_scores'] = scores
-            prog['total_points'] = prog.get('total_points', 0) + score
-
-            # Certificate
-            cert = {"quiz": quiz_name, "score": f"{score}/{total_points}", "percentage": f"{percentage:.1f}%", "date": datetime.now().strftime("%Y-%m-%d")}
-            prog['certificates'] = prog.get('certificates', []) + [cert]
-
-            update_progress(u, prog)
+            # Save results once per attempt, however many times this screen reruns
+            if not st.session_state.get('quiz_saved'):
+                cert = {"quiz": quiz_name, "score": f"{score}/{total_points}", "percentage": f"{percentage:.1f}%", "date": datetime.now().strftime("%Y-%m-%d")}
+                record_progress(st.session_state.username, [
+                    quiz_completed(quiz_name, score, total_points, percentage, datetime.now().strftime("%Y-%m-%d %H:%M"),
+                                   st.session_state.get('quiz_answers'), CONTENT.question_keys(quiz_name, drawn),
+                                   CONTENT.question_letters(quiz_name, drawn)),
+                    points_awarded(score),
+                    certificate_issued(cert),
+                ])
+                st.session_state.quiz_saved = True
+                # Drawn off the script thread; the results page offers the files once they exist
+                get_certificate_renderer().submit(st.session_state.username, get_user(st.session_state.username).get('full_name', st.session_state.username), cert)
 
             st.markdown(f"""
             <div class="certificate-modern">
@@ -1045,21 +1345,28 @@ def page_quizzes():
                     st.session_state.quiz_started = False
                     st.rerun()
 
-print("✅ Part 3: Dashboard, Learning, Quiz Pages")
-
 # ============================================================
 # GAMES PAGE - ATTRACTIVE SLIDESHOW
 # ============================================================
+@metrics.timed_page
 def page_games():
     # Back Button
     if st.button("← Back to Dashboard", key="back_games"):
         st.session_state.page = "dashboard"
         st.session_state.current_game = 0
+        st.session_state.active_game = None
         st.rerun()
 
     if 'current_game' not in st.session_state:
         st.session_state.current_game = 0
 
+    if st.session_state.get('active_game') == "Speed Recognition":
+        game_speed_recognition()
+        return
+    if st.session_state.get('active_game') == "Fingerspelling Challenge":
+        game_fingerspelling()
+        return
+
     st.markdown("# 🎮 ASL Games")
     st.markdown("Learn through fun challenges!")
     st.markdown("<br>", unsafe_allow_html=True)
@@ -1098,13 +1405,183 @@ def page_games():
 
     st.markdown("<br>", unsafe_allow_html=True)
 
+    if game['name'] == "Fingerspelling Challenge":
+        st.radio("Difficulty", list(SPELLING_DIFFICULTIES), horizontal=True, key="spelling_difficulty")
+
     if st.button("▶️ Play This Game", use_container_width=True, key=f"play_{game['name']}"):
+        if game['name'] == "Speed Recognition":
+            start_speed_round()
+            st.session_state.active_game = game['name']
+            st.rerun()
+        if game['name'] == "Fingerspelling Challenge":
+            start_spelling_round(st.session_state.get('spelling_difficulty', "Easy"))
+            st.session_state.active_game = game['name']
+            st.rerun()
         st.success(f"Starting {game['name']}...")
         st.info("Game functionality coming soon! This is a demo version.")
 
+SPEED_ROUND = 10
+
+def start_speed_round():
+    # The letters are re-derived from the seed on each rerun
+    st.session_state.speed = {"seed": random.getrandbits(32), "index": 0, "hits": 0, "tries": 0,
+                              "started": time.time(), "guesses": None}
+
+def recognize_sign(target, tries):
+    """Top guesses [(letter, score)] for the player's sign, None if no hand was found; False if nothing was shown yet"""
+    pipeline = get_recognition_pipeline()
+    if RECOGNITION_REPLAY:
+        landmarks, frames = get_replay_recording()
+        if not frames.get(target):
+            st.warning(f"The test recording has no frames of {target}.")
+            return False
+        if not st.button("📼 Replay Recorded Sign", use_container_width=True, key="speed_replay"):
+            return False
+        future = pipeline.submit_landmarks(landmarks[frames[target][tries % len(frames[target])]])
+    elif pipeline.landmarker is not None:
+        photo = st.camera_input("Show the sign to your camera", key=f"speed_cam_{target}_{tries}")
+        if photo is None:
+            return False
+        future = pipeline.submit(np.array(Image.open(photo).convert("RGB")))
+    else:
+        st.info("Webcam recognition needs the optional `mediapipe` package: `pip install mediapipe`.")
+        return False
+    try:
+        return future.result(timeout=5)
+    except (CancelledError, FutureTimeout):
+        # Dropped under load: the newest frames win
+        st.warning("The recognizer is busy right now. Please try again.")
+        return False
+
+def game_speed_recognition():
+    state = st.session_state.speed
+    letters = random.Random(state["seed"]).sample(CONTENT.letters, min(SPEED_ROUND, len(CONTENT.letters)))
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.markdown("# ⚡ Speed Recognition")
+    with col2:
+        if st.button("✖ Exit Game", key="speed_exit"):
+            st.session_state.active_game = None
+            st.rerun()
+
+    if state["index"] >= len(letters):
+        elapsed = time.time() - state["started"]
+        st.markdown(f"""
+        <div class="certificate-modern">
+            <h1>⚡ Round Complete!</h1>
+            <h2>{state['hits']}/{len(letters)} Signs Recognized</h2>
+            <h3>{elapsed:.0f}s • {state['hits'] * 60 / max(elapsed, 1):.1f} signs per minute</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        if st.button("🔄 Play Again", use_container_width=True, key="speed_again"):
+            start_speed_round()
+            st.rerun()
+        return
+
+    target = letters[state["index"]]
+    st.progress(state["index"] / len(letters))
+    st.markdown(f"**Sign {state['index'] + 1} of {len(letters)}** • {state['hits']} recognized")
+    st.markdown(f"""
+    <div class="quiz-slide">
+        <h2>Sign the letter {target}</h2>
+    </div>
+    """, unsafe_allow_html=True)
+    with st.expander("💡 Hint"):
+        st.markdown(f"{ASL_ALPHABET[target]} {ASL_DESCRIPTIONS[target]}")
+
+    guesses = recognize_sign(target, state["tries"])
+    if guesses is None:
+        state["tries"] += 1
+        state["guesses"] = None
+        st.warning("No hand found. Keep your whole hand in the frame.")
+    elif guesses:
+        if guesses[0][0] == target:
+            state.update(index=state["index"] + 1, hits=state["hits"] + 1, tries=0, guesses=None)
+            flash(f"✅ {target} recognized!")
+            st.rerun()
+        state["tries"] += 1
+        state["guesses"] = guesses
+
+    if state["guesses"]:
+        st.info("Looks like " + ", ".join(f"**{letter}** ({score:.0%})" for letter, score in state["guesses"])
+                + f". Try {target} again.")
+
+    if st.button("⏭ Skip", key="speed_skip"):
+        state.update(index=state["index"] + 1, tries=0, guesses=None)
+        st.rerun()
+
+SPELLING_ROUND = 10
+
+def start_spelling_round(difficulty):
+    # The words are re-drawn from the seed on each rerun; only the letters typed so far are kept
+    st.session_state.spelling = {"seed": random.getrandbits(32), "difficulty": difficulty, "index": 0, "typed": "",
+                                 "solved": 0, "misses": 0, "started": time.time()}
+
+def game_fingerspelling():
+    state = st.session_state.spelling
+    game = FingerspellingChallenge(get_word_dictionary(), ASL_ALPHABET)
+    words = game.round(state["difficulty"], state["seed"], SPELLING_ROUND)
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.markdown("# 🔤 Fingerspelling Challenge")
+    with col2:
+        if st.button("✖ Exit Game", key="spelling_exit"):
+            st.session_state.active_game = None
+            st.rerun()
+
+    if state["index"] >= len(words):
+        elapsed = time.time() - state["started"]
+        st.markdown(f"""
+        <div class="certificate-modern">
+            <h1>🔤 Round Complete!</h1>
+            <h2>{state['solved']}/{len(words)} Words Spelled</h2>
+            <h3>{state['difficulty']} • {elapsed:.0f}s • {state['misses']} wrong letters</h3>
+        </div>
+        """, unsafe_allow_html=True)
+        if st.button("🔄 Play Again", use_container_width=True, key="spelling_again"):
+            start_spelling_round(state["difficulty"])
+            st.rerun()
+        return
+
+    target, typed = words[state["index"]], state["typed"]
+    st.progress(state["index"] / len(words))
+    st.markdown(f"**Word {state['index'] + 1} of {len(words)}** • {state['difficulty']} • {state['solved']} spelled")
+    st.markdown("Read the handshapes and spell the word, one letter at a time.")
+    tiles = "".join(f'<span class="fs-glyph"><span class="fs-emoji">{emoji}</span>'
+                    f'<span class="fs-letter">{typed[i] if i < len(typed) else "_"}</span></span>'
+                    for i, emoji in enumerate(game.tiles(target)))
+    st.markdown(f'<div class="quiz-slide"><div class="fs-line"><span class="fs-word">{tiles}</span></div></div>',
+                unsafe_allow_html=True)
+    with st.expander("💡 Hint"):
+        st.markdown("\n".join(f"{i + 1}. {ASL_ALPHABET.get(c, c)} {ASL_DESCRIPTIONS.get(c, '')}" for i, c in enumerate(target)))
+
+    cols = st.columns(7)
+    for idx, letter in enumerate(CONTENT.letters):
+        with cols[idx % 7]:
+            if st.button(letter, key=f"spell_{letter}", use_container_width=True):
+                if not game.accepts(target, typed, letter):
+                    state["misses"] += 1
+                    flash(f"❌ {letter} doesn't fit there")
+                elif game.solved(target, typed + letter):
+                    word = typed + letter
+                    state.update(index=state["index"] + 1, solved=state["solved"] + 1, typed="")
+                    # Tiles shared by several letters can spell another real word
+                    flash(f"✅ {word}!" if word == target else f"✅ {word} fits those signs too! (We had {target}.)")
+                else:
+                    state["typed"] = typed + letter
+                st.rerun()
+
+    if st.button("⏭ Skip", key="spelling_skip"):
+        state.update(index=state["index"] + 1, typed="")
+        flash(f"⏭ That was {target}")
+        st.rerun()
+
 # ============================================================
 # RESULTS PAGE - CERTIFICATES AND MARKS
 # ============================================================
+@metrics.timed_page
 def page_results():
     # Back Button
     if st.button("← Back to Dashboard", key="back_results"):
@@ -1113,21 +1590,37 @@ def page_results():
 
     u = st.session_state.username
     user = get_user(u)
-    prog = get_progress(u)
+    prog = get_progress_summary(u)
 
     st.markdown("# 📊 Your Results & Certificates")
     st.markdown(f"### {user.get('full_name', u)}'s Learning Progress")
     st.markdown("<br>", unsafe_allow_html=True)
 
-    tab1, tab2 = st.tabs(["📈 Quiz Scores", "🏆 Certificates"])
+    tab1, tab2, tab3 = st.tabs(["📈 Quiz Scores", "🏆 Certificates", "🥇 Leaderboard"])
 
     with tab1:
         st.markdown("### Quiz Performance")
 
         scores = prog.get('quiz_scores', {})
+        history = get_attempt_history()
+        attempts = history.history(u)
+        summary = {history.quiz_name(qid): stats for qid, stats in quiz_summary(attempts).items()}
+
+        if len(attempts) > 1:
+            # Bucketed here, so the chart payload stays the same size however many attempts there are
+            trend = downsample(attempts)
+            trend["quiz"] = trend["quiz"].map(history.quiz_name)
+            fig = px.line(trend, x="ts", y="percentage", color="quiz", markers=True,
+                          hover_data={"low": ":.0f", "high": ":.0f", "attempts": True},
+                          labels={"ts": "", "percentage": "Accuracy (%)", "quiz": "Quiz"})
+            fig.update_yaxes(range=[0, 105])
+            st.plotly_chart(fig, use_container_width=True)
 
         if scores:
-            for quiz_name, data in scores.items():
+            latest = sorted(scores.items(), key=lambda item: item[1].get('date', ''), reverse=True)
+            offset, per_page = pager("results_scores_page", len(latest))
+            for quiz_name, data in latest[offset:offset + per_page]:
+                taken, best, _ = summary.get(quiz_name, (1, None, None))
                 st.markdown(f"""
                 <div style="background: white; padding: 1.5rem; border-radius: 12px; margin: 1rem 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
                     <h3 style="margin: 0; color: #2E7867;">{quiz_name}</h3>
@@ -1138,6 +1631,12 @@ def page_results():
                         <div>
                             <strong>Accuracy:</strong> {data['percentage']}
                         </div>
+                        <div>
+                            <strong>Best:</strong> {f"{best:.1f}%" if best is not None else data['percentage']}
+                        </div>
+                        <div>
+                            <strong>Attempts:</strong> {taken}
+                        </div>
                         <div>
                             <strong>Date:</strong> {data['date']}
                         </div>
@@ -1147,13 +1646,28 @@ def page_results():
         else:
             st.info("📝 No quiz scores yet. Take a quiz to see your results here!")
 
+        if len(attempts):
+            st.markdown("### All Attempts")
+            offset, per_page = pager("results_attempts_page", len(attempts))
+            # Newest first, sliced before anything is formatted
+            page = attempts[::-1][offset:offset + per_page]
+            st.dataframe({
+                "Date": [datetime.fromtimestamp(int(ts), timezone.utc).strftime("%Y-%m-%d %H:%M") for ts in page["ts"]],
+                "Quiz": [history.quiz_name(int(qid)) for qid in page["quiz"]],
+                "Score": [f"{score}/{total}" for score, total in zip(page["score"], page["total"])],
+                "Answers": ["".join("✅" if ok else "❌" for ok in unpack_answers(int(bits), int(n)))
+                            for bits, n in zip(page["answers"], page["n"])],
+            }, hide_index=True, use_container_width=True)
+
     with tab2:
         st.markdown("### Earned Certificates")
 
-        certs = prog.get('certificates', [])
+        total_certs = prog.get('certificate_count', 0)
 
-        if certs:
-            for cert in certs:
+        if total_certs:
+            offset, per_page = pager("results_certs_page", total_certs)
+            renderer = get_certificate_renderer()
+            for i, cert in enumerate(get_certificates(u, offset, per_page)):
                 st.markdown(f"""
                 <div class="certificate-modern" style="margin: 1.5rem 0;">
                     <h2>🏆 Certificate of Achievement</h2>
@@ -1162,9 +1676,44 @@ def page_results():
                     <p>Earned on {cert['date']}</p>
                 </div>
                 """, unsafe_allow_html=True)
+
+                # Cached files are only read; certificates from before this are queued once here
+                key = renderer.submit(u, user.get('full_name', u), cert)
+                files = {fmt: renderer.read(key, fmt) for fmt in CERTIFICATE_FORMATS}
+                if all(files.values()):
+                    for col, (fmt, data) in zip(st.columns(len(files)), files.items()):
+                        with col:
+                            st.download_button(f"⬇️ Download {fmt.upper()}", data,
+                                               file_name=f"SignHub-{cert['quiz'].replace(' ', '-')}-{cert['date']}.{fmt}",
+                                               mime=CERTIFICATE_FORMATS[fmt], key=f"cert_{fmt}_{offset + i}",
+                                               use_container_width=True)
+                else:
+                    st.caption("⏳ Preparing your downloadable certificate...")
         else:
             st.info("🏆 No certificates yet. Complete quizzes to earn certificates!")
 
+    with tab3:
+        st.markdown("### Top Learners")
+
+        choice = st.selectbox("Board", ["Overall"] + list(QUIZZES.keys()), key="leaderboard_board")
+        quiz = None if choice == "Overall" else choice
+        board = get_leaderboard()
+        rank, players = board.rank(u, quiz)
+
+        if rank:
+            st.markdown(f"**Your rank:** #{rank} of {players}")
+        else:
+            st.info("🥇 Complete a quiz to join this leaderboard!")
+
+        for place, name, score in board.top(10, quiz):
+            highlight = "border-left: 6px solid #2E7867;" if name == u else ""
+            st.markdown(f"""
+            <div style="background: white; padding: 1rem 1.5rem; border-radius: 12px; margin: 0.5rem 0; box-shadow: 0 4px 6px rgba(0,0,0,0.1); display: flex; justify-content: space-between; {highlight}">
+                <strong>#{place} {name}</strong>
+                <span>{score} pts</span>
+            </div>
+            """, unsafe_allow_html=True)
+
     st.markdown("<br>", unsafe_allow_html=True)
 
     # Overall Stats
@@ -1185,7 +1734,7 @@ def page_results():
         st.markdown(f"""
         <div class="stat-card-modern">
             <div class="stat-icon">🏆</div>
-            <div class="stat-value">{len(certs)}</div>
+            <div class="stat-value">{prog.get('certificate_count', 0)}</div>
             <div class="stat-label">Certificates</div>
         </div>
         """, unsafe_allow_html=True)
@@ -1199,6 +1748,54 @@ def page_results():
         </div>
         """, unsafe_allow_html=True)
 
+# ============================================================
+# ADMIN ANALYTICS
+# ============================================================
+@metrics.timed_page
+def page_analytics():
+    if st.button("← Back to Dashboard", key="back_analytics"):
+        st.session_state.page = "dashboard"
+        st.rerun()
+
+    if st.session_state.username != "admin":
+        st.error("❌ Analytics are available to admins only")
+        return
+
+    st.markdown("# 📈 Cohort Analytics")
+    if st.button("🔄 Refresh now", key="analytics_refresh"):
+        get_analytics().report(force=True)
+    report = get_analytics().report()
+    st.caption(f"{report['learners']} learners • {report['attempts']} logged attempts • "
+               f"built {datetime.fromtimestamp(report['built_at']):%H:%M:%S} in {report['build_seconds']:.2f}s")
+
+    st.markdown("### Completion Funnel")
+    st.plotly_chart(px.funnel(report["funnel"], x="learners", y="stage"), use_container_width=True)
+
+    st.markdown("### Score Distribution")
+    dist = report["score_distribution"]
+    if dist.empty:
+        st.info("📝 No quiz results yet.")
+    else:
+        st.plotly_chart(px.bar(dist, x="bucket", y="learners", color="quiz", barmode="group",
+                               labels={"bucket": "Latest score", "learners": "Learners"}), use_container_width=True)
+
+    st.markdown("### Daily Active Learners")
+    daily = report["daily_active"]
+    if daily.empty:
+        st.info("📝 No activity logged yet.")
+    else:
+        st.plotly_chart(px.line(daily, x="day", y="learners", markers=True), use_container_width=True)
+
+    st.markdown("### Question Difficulty")
+    difficulty = report["question_difficulty"]
+    if difficulty.empty:
+        st.info("📝 No per-question answers logged yet.")
+    else:
+        difficulty = difficulty.assign(text=[CONTENT.question_label(quiz, q) for quiz, q in zip(difficulty["quiz"], difficulty["question"])])
+        st.plotly_chart(px.bar(difficulty.head(15), x="correct_rate", y="text", color="quiz", orientation="h",
+                               hover_data=["attempts"], range_x=[0, 1],
+                               labels={"correct_rate": "Answered correctly", "text": ""}), use_container_width=True)
+
 # ============================================================
 # MAIN APPLICATION
 # ============================================================
@@ -1210,6 +1807,8 @@ def main():
     if "page" not in st.session_state:
         st.session_state.page = "dashboard"
 
+    show_flash()
+
     if not st.session_state.authenticated:
         page_login()
     else:
@@ -1223,6 +1822,19 @@ def main():
             page_games()
         elif st.session_state.page == "results":
             page_results()
+        elif st.session_state.page == "analytics":
+            page_analytics()
 
 if __name__ == "__main__":
-    main()
+    outcome = "error"
+    try:
+        main()
+        outcome = "ok"
+    except RerunException:
+        outcome = "rerun"
+        raise
+    except StopException:
+        outcome = "stop"
+        raise
+    finally:
+        metrics.end_rerun(st.session_state, outcome)
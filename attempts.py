@@ -0,0 +1,226 @@
+"""
+SignHub - Attempt History
+Every quiz attempt, per user, as a compact append-only time series
+"""
+
+import calendar
+import sqlite3
+import struct
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# RECORD FORMAT
+# ============================================================
+# One attempt = 19 bytes: timestamp, quiz id, score, total, question count,
+# and per-question correctness as a bitmask (bit i set = question i right)
+RECORD = struct.Struct("<IHHHBQ")
+RECORD_DTYPE = np.dtype([("ts", "<u4"), ("quiz", "<u2"), ("score", "<u2"), ("total", "<u2"),
+                         ("n", "u1"), ("answers", "<u8")])
+MAX_QUESTIONS = 64
+
+def pack_answers(answers):
+    bits = 0
+    for i, correct in enumerate((answers or [])[:MAX_QUESTIONS]):
+        if correct:
+            bits |= 1 << i
+    return bits
+
+def unpack_answers(bits, n):
+    return [(bits >> i) & 1 for i in range(n)]
+
+def wall_clock(ts):
+    # Log timestamps are naive local time; store them as if UTC so they read back unchanged
+    return calendar.timegm(datetime.fromisoformat(ts).timetuple())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quizzes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS series (
+    username TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# ============================================================
+# HISTORY STORE
+# ============================================================
+class AttemptHistory:
+    """Attempts folded from quiz_completed events into one packed BLOB per user.
+
+    Like the leaderboard, this follows the progress log: new attempts are
+    buffered in memory and appended to the users' rows in one transaction
+    by flush() (run after every compaction). Each row remembers the last
+    event seq it holds, so buffered records it already has, flushes from
+    several processes, and replays after a restart are all skipped.
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = str(path)
+        self.fsync = fsync
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        row = conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        self.seq = row[0] if row else 0
+        self._quiz_ids = dict(conn.execute("SELECT name, id FROM quizzes"))
+        self._quiz_names = {i: name for name, i in self._quiz_ids.items()}
+        self._pending = {}
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL" if self.fsync else "PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def quiz_id(self, name):
+        """Small stable id for a quiz name, allocated on first sight"""
+        qid = self._quiz_ids.get(name)
+        if qid is None:
+            conn = self._conn()
+            conn.execute("INSERT OR IGNORE INTO quizzes (name) VALUES (?)", (name,))
+            qid = conn.execute("SELECT id FROM quizzes WHERE name = ?", (name,)).fetchone()[0]
+            self._quiz_ids[name] = qid
+            self._quiz_names[qid] = name
+        return qid
+
+    def quiz_name(self, qid):
+        name = self._quiz_names.get(qid)
+        if name is None:
+            row = self._conn().execute("SELECT name FROM quizzes WHERE id = ?", (qid,)).fetchone()
+            name = row[0] if row else f"Quiz {qid}"
+            self._quiz_names[qid] = name
+        return name
+
+    def apply(self, events):
+        """Buffer the attempts among stamped log events"""
+        with self._lock:
+            for event in events:
+                if event["seq"] <= self.seq:
+                    continue
+                self.seq = event["seq"]
+                if event["type"] != "quiz_completed":
+                    continue
+                answers = event.get("answers") or []
+                record = RECORD.pack(wall_clock(event["ts"]), self.quiz_id(event["quiz"]), int(event["score"]),
+                                     int(event["total"]), min(len(answers), MAX_QUESTIONS), pack_answers(answers))
+                self._pending.setdefault(event["user"], []).append((event["seq"], record))
+
+    def attach(self, log):
+        """Replay what the store missed, then follow the log"""
+        log.subscribe(self.apply, self.seq)
+
+    def flush(self):
+        """Append buffered attempts to their rows in one transaction; returns attempts written"""
+        with self._lock:
+            pending = {user: list(records) for user, records in self._pending.items()}
+            seq = self.seq
+        written = 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for user, records in pending.items():
+                row = conn.execute("SELECT seq, data FROM series WHERE username = ?", (user,)).fetchone()
+                last, data = row if row else (0, b"")
+                new = [record for s, record in records if s > last]
+                if not new:
+                    continue
+                conn.execute("INSERT OR REPLACE INTO series (username, seq, data) VALUES (?, ?, ?)",
+                             (user, records[-1][0], bytes(data) + b"".join(new)))
+                written += len(new)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('seq', ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value = max(value, excluded.value)", (seq,))
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+        # Until this prune a reader may see a record in both places; history() skips the repeat
+        with self._lock:
+            for user, records in pending.items():
+                kept = [r for r in self._pending.get(user, ()) if r[0] > records[-1][0]]
+                if kept:
+                    self._pending[user] = kept
+                else:
+                    self._pending.pop(user, None)
+        return written
+
+    def history(self, username):
+        """Structured array (RECORD_DTYPE) of every attempt by username, oldest first"""
+        # Buffer first: flush() only drops records after committing them to the row
+        with self._lock:
+            buffered = list(self._pending.get(username, ()))
+        row = self._conn().execute("SELECT seq, data FROM series WHERE username = ?", (username,)).fetchone()
+        last, data = row if row else (0, b"")
+        pending = [record for s, record in buffered if s > last]
+        return np.frombuffer(bytes(data) + b"".join(pending), dtype=RECORD_DTYPE)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+# ============================================================
+# SUMMARIES AND DOWNSAMPLING
+# ============================================================
+def percentages(records):
+    return np.where(records["total"] > 0, records["score"] * 100.0 / np.maximum(records["total"], 1), 0.0)
+
+def quiz_summary(records):
+    """{quiz id: (attempts, best percentage, latest percentage)}"""
+    pct = percentages(records)
+    summary = {}
+    for qid in np.unique(records["quiz"]):
+        mine = pct[records["quiz"] == qid]
+        summary[int(qid)] = (len(mine), float(mine.max()), float(mine[-1]))
+    return summary
+
+def question_accuracy(records, qid):
+    """Share of attempts at quiz qid that got each question right"""
+    mine = records[records["quiz"] == qid]
+    if not len(mine):
+        return np.zeros(0)
+    n = int(mine["n"].max())
+    bits = (mine["answers"][:, None] >> np.arange(n, dtype=np.uint64)) & 1
+    answered = np.arange(n) < mine["n"][:, None]
+    return bits.sum(axis=0, where=answered) / np.maximum(answered.sum(axis=0), 1)
+
+def downsample(records, max_points=120):
+    """Trend frame with at most max_points rows per quiz.
+
+    Consecutive attempts are bucketed evenly by index; each bucket keeps its
+    last timestamp, mean score, and min/max, so one attempt or ten thousand
+    cost the chart the same.
+    """
+    rows = []
+    pct = percentages(records)
+    for qid in np.unique(records["quiz"]):
+        mask = records["quiz"] == qid
+        ts, p = records["ts"][mask], pct[mask]
+        starts = np.unique(np.linspace(0, len(p), min(len(p), max_points), endpoint=False).astype(int))
+        counts = np.diff(np.append(starts, len(p)))
+        rows.append(pd.DataFrame({
+            "quiz": int(qid),
+            "ts": pd.to_datetime(ts[starts + counts - 1], unit="s"),
+            "percentage": np.add.reduceat(p, starts) / counts,
+            "low": np.minimum.reduceat(p, starts),
+            "high": np.maximum.reduceat(p, starts),
+            "attempts": counts,
+        }))
+    if not rows:
+        return pd.DataFrame(columns=["quiz", "ts", "percentage", "low", "high", "attempts"])
+    return pd.concat(rows, ignore_index=True)
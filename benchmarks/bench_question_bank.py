@@ -0,0 +1,76 @@
+"""
+SignHub - Question Bank Benchmarks
+Times building a bank, drawing a quiz and presenting a question as the bank grows
+
+    python benchmarks/bench_question_bank.py --sizes 1000 10000 100000 1000000
+
+A draw should cost the same at every size: only the filtered pool is
+built once per filter, and sampling touches k of its entries.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from common import ROOT, run_metadata, summarize, write_results
+
+from question_bank import QuestionBank
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LETTERS = [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+
+def synthetic_questions(n, seed):
+    rng = random.Random(seed)
+    questions = []
+    for i in range(n):
+        letter = rng.choice(LETTERS)
+        options = [letter] + rng.sample([l for l in LETTERS if l != letter], 3)
+        questions.append({"id": f"q{i}", "q": f"Which letter is sign #{i}?", "options": options,
+                          "correct": 0, "difficulty": rng.randint(1, 5), "letter": letter})
+    return questions
+
+def timed(fn, runs):
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--draw", type=int, default=10, help="questions per drawn quiz")
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=str(ROOT / "benchmarks" / "results" / "question_bank.json"))
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        print(f"Running {size} questions...")
+        questions = synthetic_questions(size, args.seed)
+        start = time.perf_counter()
+        bank = QuestionBank({"bench": questions})
+        ops = {"build": summarize([(time.perf_counter() - start) * 1000])}
+
+        start = time.perf_counter()
+        bank.pool("bench", [3, 4], ["A", "E", "S"])
+        ops["pool_first"] = summarize([(time.perf_counter() - start) * 1000])
+
+        ops["sample"] = timed(lambda i: bank.sample("bench", args.draw, i), args.runs)
+        ops["sample_filtered"] = timed(lambda i: bank.sample("bench", args.draw, i, [3, 4], ["A", "E", "S"]), args.runs)
+        positions = bank.sample("bench", args.runs, args.seed)
+        ops["present"] = timed(lambda i: bank.present("bench", positions[i % len(positions)], i), args.runs)
+
+        for op, stats in ops.items():
+            rows.append({"questions": size, "op": op, **stats})
+            print(f"  {op:<16} p50 {stats['p50_ms']:9.4f} ms  p95 {stats['p95_ms']:9.4f} ms  "
+                  f"max {stats['max_ms']:9.4f} ms")
+
+    write_results(args.out, {"meta": run_metadata(), "config": vars(args), "results": rows})
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
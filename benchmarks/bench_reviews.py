@@ -0,0 +1,88 @@
+"""
+SignHub - Review Scheduler Benchmarks
+Times picking the next review per deck size and the nightly recompute per card count
+
+    python benchmarks/bench_reviews.py --deck-sizes 26 1000 100000 --cards 1000000 5000000
+
+Picking stays O(log n) in the deck; the recompute is a chunked scan whose
+cost should grow linearly with the number of (user, item) rows.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT, run_metadata, summarize, write_results
+
+from reviews import DAY, FAIL, PASS, Deck, ReviewScheduler
+
+def bench_deck(size, runs, seed):
+    rng = random.Random(seed)
+    deck = Deck()
+    for i in range(size):
+        deck.review(f"item{i}", rng.choice([PASS, FAIL]), rng.randrange(30 * DAY), 1)
+    now = 15 * DAY
+    pick, review = [], []
+    for i in range(runs):
+        start = time.perf_counter()
+        item = deck.next_due(now)
+        pick.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        deck.review(item or f"item{rng.randrange(size)}", rng.choice([PASS, FAIL]), now, i + 2)
+        review.append((time.perf_counter() - start) * 1000)
+    return {"next_due": summarize(pick), "review": summarize(review)}
+
+def bench_recompute(cards, chunk, work_dir, seed):
+    rng = random.Random(seed)
+    scheduler = ReviewScheduler(work_dir / f"reviews-{cards}.db", fsync=False)
+    conn = scheduler._conn()
+    conn.execute("BEGIN")
+    batch = []
+    for i in range(cards):
+        user, item = divmod(i, 26)
+        interval = rng.choice([1.0, 6.0, 15.0, 40.0])
+        batch.append((f"learner{user}", chr(65 + item), 2.5, interval, 3, 0, rng.randrange(60 * DAY), 1))
+        if len(batch) == 100_000:
+            conn.executemany("INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    conn.executemany("INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.execute("COMMIT")
+    start = time.perf_counter()
+    scanned, rescheduled = scheduler.recompute(now=60 * DAY, chunk=chunk)
+    seconds = time.perf_counter() - start
+    scheduler.close()
+    return {"scanned": scanned, "rescheduled": rescheduled, "seconds": seconds, "cards_per_s": scanned / seconds}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deck-sizes", type=int, nargs="+", default=[26, 1_000, 100_000])
+    parser.add_argument("--cards", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--chunk", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="where card databases are generated (default: a temp dir)")
+    parser.add_argument("--out", default=str(ROOT / "benchmarks" / "results" / "reviews.json"))
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.deck_sizes:
+        print(f"Deck of {size} cards...")
+        for op, stats in bench_deck(size, args.runs, args.seed).items():
+            rows.append({"deck": size, "op": op, **stats})
+            print(f"  {op:<10} p50 {stats['p50_ms']:9.4f} ms  p95 {stats['p95_ms']:9.4f} ms")
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="signhub-reviews-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    for cards in args.cards:
+        print(f"Recompute over {cards} cards...")
+        result = bench_recompute(cards, args.chunk, work_dir, args.seed)
+        rows.append({"cards": cards, "op": "recompute", **result})
+        print(f"  {result['seconds']:.2f}s  {result['cards_per_s']:,.0f} cards/s  {result['rescheduled']} rescheduled")
+
+    write_results(args.out, {"meta": run_metadata(), "config": vars(args), "results": rows})
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+SignHub - Fingerspelling Challenge Benchmarks
+Times compiling and opening word lists of increasing size, then drawing rounds and checking letters against them
+
+    python benchmarks/bench_spelling_game.py --sizes 10000 100000 300000
+
+Word lists are synthetic but word-like (syllables plus common endings), so
+the word graph shares prefixes and suffixes the way a real dictionary does.
+Memory is the Python heap allocated while opening a list; the mapped file
+itself is paged in by the OS on demand.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from common import ROOT, run_metadata, summarize, write_results
+
+from spelling_game import DIFFICULTIES, FingerspellingChallenge, WordDictionary, compile_dictionary
+
+ONSETS = ["", "B", "BR", "C", "CH", "CL", "D", "DR", "F", "FL", "G", "GR", "H", "J", "K", "L", "M", "N", "P", "PL",
+          "QU", "R", "S", "SH", "ST", "T", "TH", "TR", "V", "W", "Y", "Z"]
+VOWELS = ["A", "E", "I", "O", "U", "AI", "EA", "OO", "OU"]
+CODAS = ["", "", "B", "CK", "D", "G", "L", "M", "N", "NG", "P", "R", "S", "T", "X"]
+ENDINGS = ["", "", "", "S", "ED", "ER", "ING", "LY", "NESS", "TION", "ABLE"]
+
+def synthetic_words(n, seed):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < n:
+        stem = "".join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS) for _ in range(rng.randint(1, 3)))
+        words.add(stem + rng.choice(ENDINGS))
+    return list(words)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--rounds", type=int, default=200, help="seeded rounds drawn and spelled per size")
+    parser.add_argument("--round-words", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="where word lists are compiled (default: a temp dir)")
+    parser.add_argument("--out", default=str(ROOT / "benchmarks" / "results" / "spelling_game.json"))
+    args = parser.parse_args()
+
+    alphabet = {letter: sign["emoji"] for letter, sign in
+                json.loads((ROOT / "content" / "core.json").read_text(encoding="utf-8"))["alphabet"].items()}
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="signhub-words-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    rows = []
+    for size in args.sizes:
+        print(f"Dictionary of {size} words...")
+        words = synthetic_words(size, args.seed)
+        path = work_dir / f"words-{size}.words"
+        start = time.perf_counter()
+        compile_dictionary(words, path, fsync=False)
+        build = time.perf_counter() - start
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        dictionary = WordDictionary(path)
+        opened = (time.perf_counter() - start) * 1000
+        heap = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        header = dictionary.header
+        rows.append({"words": size, "op": "open", "build_s": build, "file_kib": path.stat().st_size / 1024,
+                     "nodes": header["nodes"], "edges": header["edges"], "open_ms": opened, "open_heap_kib": heap / 1024})
+        print(f"  compiled in {build:.1f}s: {header['nodes']} nodes, {header['edges']} edges, "
+              f"{rows[-1]['file_kib']:.0f} KiB; opened in {opened:.2f} ms with {heap / 1024:.0f} KiB of heap")
+
+        game = FingerspellingChallenge(dictionary, alphabet)
+        for difficulty in DIFFICULTIES:
+            draws, letters = [], []
+            for i in range(args.rounds):
+                start = time.perf_counter()
+                targets = game.round(difficulty, args.seed + i, args.round_words)
+                draws.append((time.perf_counter() - start) * 1000)
+                for target in targets:
+                    for j, letter in enumerate(target):
+                        start = time.perf_counter()
+                        game.accepts(target, target[:j], letter)
+                        letters.append((time.perf_counter() - start) * 1000)
+            for op, samples in (("draw", draws), ("accept_letter", letters)):
+                stats = summarize(samples)
+                rows.append({"words": size, "op": op, "difficulty": difficulty, **stats})
+                print(f"  {difficulty:<7} {op:<14} p50 {stats['p50_ms']:8.4f} ms  p95 {stats['p95_ms']:8.4f} ms")
+
+    write_results(args.out, {"meta": run_metadata(), "config": vars(args), "results": rows})
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
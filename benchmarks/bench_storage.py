@@ -0,0 +1,147 @@
+"""
+SignHub - Storage Benchmarks
+Times the auth and progress paths against synthetic datasets of increasing size
+
+    python benchmarks/bench_storage.py --sizes 1000 10000 --backends sqlite json
+    python benchmarks/bench_storage.py --sizes 1000 --apptest --baseline benchmarks/results/last.json
+
+Each (backend, size) pair runs in a fresh subprocess so caches, connections
+and I/O counters start clean. Results are written as JSON; with --baseline
+any op whose p95 regressed beyond --tolerance makes the run exit non-zero.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import (BENCH_PASSWORD, ROOT, compare_results, run_metadata, summarize,
+                    time_op, write_dataset, write_results)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# ============================================================
+# WORKER (one backend, one dataset)
+# ============================================================
+def run_worker(ops, apptest, apptest_runs, seed):
+    import app
+    from progress_log import certificate_issued, points_awarded, quiz_completed
+
+    results = {}
+    start = time.perf_counter()
+    app.initialize()
+    results["startup"] = summarize([(time.perf_counter() - start) * 1000])
+
+    store = app.get_store()
+    n_users = store.count_users()
+    rng = random.Random(seed)
+    picks = [f"learner{rng.randrange(n_users)}" for _ in range(ops)]
+    emails = [(f"{u}@example.com",) for u in picks]
+
+    results["lookup_email"] = time_op(store.find_username, emails)
+    results["login_user"] = time_op(app.login_user, [(e, BENCH_PASSWORD) for (e,) in emails])
+    results["register_user"] = time_op(app.register_user, [
+        (f"New {i}", f"new{seed}_{i}@example.com", BENCH_PASSWORD, BENCH_PASSWORD) for i in range(ops)
+    ])
+    results["get_progress"] = time_op(app.get_progress, [(u,) for u in picks])
+
+    def complete_quiz(u):
+        # Same writes as the quiz-complete branch of page_quizzes
+        cert = {"quiz": "ASL Alphabet Quiz", "score": "40/50", "percentage": "80.0%", "date": "2024-01-01"}
+        app.record_progress(u, [quiz_completed("ASL Alphabet Quiz", 40, 50, 80.0, "2024-01-01 12:00"),
+                                points_awarded(40), certificate_issued(cert)])
+
+    results["quiz_complete"] = time_op(complete_quiz, [(u,) for u in picks])
+    results["compact"] = time_op(lambda: app.get_progress_log().compact(), [()])
+    results["cache"] = app.cache_stats()
+
+    if apptest:
+        from streamlit.testing.v1 import AppTest
+        for page in ("dashboard", "quizzes", "results"):
+            at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=60)
+            at.session_state["authenticated"] = True
+            at.session_state["username"] = picks[0]
+            at.session_state["page"] = page
+            results[f"rerun_{page}"] = time_op(at.run, [()] * apptest_runs)
+
+    return {"users": n_users, "ops": results}
+
+# ============================================================
+# DRIVER
+# ============================================================
+def run_case(backend, size, dataset_dir, work_dir, args):
+    case_dir = Path(work_dir) / f"{backend}-{size}"
+    if case_dir.exists():
+        shutil.rmtree(case_dir)
+    shutil.copytree(dataset_dir, case_dir)
+    out = case_dir / "result.json"
+    env = dict(os.environ, SIGNHUB_DATA_DIR=str(case_dir), SIGNHUB_STORAGE=backend,
+               SIGNHUB_COMPACT_INTERVAL="3600", SIGNHUB_COMPACT_MAX_PENDING=str(10 ** 9))
+    cmd = [sys.executable, __file__, "--worker", str(out), "--ops", str(args.ops), "--seed", str(args.seed),
+           "--apptest-runs", str(args.apptest_runs)] + (["--apptest"] if args.apptest else [])
+    subprocess.run(cmd, env=env, check=True, stdout=subprocess.DEVNULL)
+    with open(out, encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "json"], choices=["sqlite", "json"])
+    parser.add_argument("--ops", type=int, default=200, help="samples per operation")
+    parser.add_argument("--apptest", action="store_true", help="also time full-page reruns through streamlit AppTest")
+    parser.add_argument("--apptest-runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="where datasets are generated (default: a temp dir)")
+    parser.add_argument("--out", default=str(ROOT / "benchmarks" / "results" / "storage.json"))
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown vs baseline")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.ops, args.apptest, args.apptest_runs, args.seed)
+        with open(args.worker, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    import passwords
+    password_hash = passwords.hash_password(BENCH_PASSWORD)
+    quizzes = ["ASL Alphabet Quiz", "Numbers Quiz", "Greetings Quiz"]
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="signhub-bench-"))
+    rows = []
+    for size in args.sizes:
+        dataset_dir = work_dir / f"dataset-{size}"
+        if not (dataset_dir / "users.json").exists():
+            print(f"Generating {size} users...")
+            write_dataset(dataset_dir, size, password_hash, quizzes, args.seed)
+        for backend in args.backends:
+            print(f"Running {backend} @ {size} users...")
+            result = run_case(backend, size, dataset_dir, work_dir, args)
+            for op, stats in result["ops"].items():
+                if op == "cache":
+                    continue
+                rows.append({"backend": backend, "users": size, "op": op, **stats})
+                print(f"  {op:<16} p50 {stats['p50_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms  "
+                      f"p99 {stats['p99_ms']:9.3f} ms  r {stats.get('read_bytes_per_op', 0):>12.0f} B  "
+                      f"w {stats.get('write_bytes_per_op', 0):>10.0f} B")
+            print(f"  cache            {result['ops']['cache']}")
+
+    write_results(args.out, {"meta": run_metadata(), "config": vars(args), "results": rows})
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(rows, baseline, ("backend", "users", "op"), tolerance=args.tolerance)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: p95 {old:.3f} ms -> {new:.3f} ms")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
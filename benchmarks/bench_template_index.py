@@ -0,0 +1,83 @@
+"""
+SignHub - Template Index Benchmarks
+Times batched top-k queries and incremental adds against template libraries of increasing size
+
+    python benchmarks/bench_template_index.py --sizes 10000 100000 1000000 --batches 1 8 64
+
+Each size is built by incremental adds into a fresh on-disk library, then
+queried through a fresh (cold) memory map followed by warm repeats.
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from common import ROOT, run_metadata, summarize, write_results
+
+from recognition import LETTERS
+from template_index import TemplateIndex
+
+DIM = 78                                # recognition.features() width
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--k", type=int, default=32)
+    parser.add_argument("--add-chunk", type=int, default=50_000, help="rows per incremental add")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="where libraries are built (default: a temp dir)")
+    parser.add_argument("--out", default=str(ROOT / "benchmarks" / "results" / "template_index.json"))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="signhub-templates-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    rows = []
+    for size in args.sizes:
+        print(f"Library of {size} templates...")
+        path = work_dir / f"library-{size}"
+        shutil.rmtree(path, ignore_errors=True)
+        index = TemplateIndex(path, DIM, fsync=False)
+        adds = []
+        for start in range(0, size, args.add_chunk):
+            n = min(args.add_chunk, size - start)
+            vectors = rng.standard_normal((n, DIM), dtype=np.float32)
+            labels = [LETTERS[i % len(LETTERS)] for i in range(start, start + n)]
+            t = time.perf_counter()
+            index.add(vectors, labels)
+            adds.append((time.perf_counter() - t) * 1000)
+        rows.append({"templates": size, "op": "add", "rows_per_add": args.add_chunk, **summarize(adds)})
+        print(f"  add {args.add_chunk:>7} rows  p50 {rows[-1]['p50_ms']:9.2f} ms")
+
+        for batch in args.batches:
+            reader = TemplateIndex(path)
+            queries = rng.standard_normal((batch, DIM), dtype=np.float32)
+            t = time.perf_counter()
+            reader.label_scores(queries, args.k)
+            cold = (time.perf_counter() - t) * 1000
+            samples = []
+            for _ in range(args.runs):
+                queries = rng.standard_normal((batch, DIM), dtype=np.float32)
+                t = time.perf_counter()
+                reader.label_scores(queries, args.k)
+                samples.append((time.perf_counter() - t) * 1000)
+            stats = summarize(samples)
+            rows.append({"templates": size, "op": "query", "batch": batch, "k": args.k, "cold_ms": cold,
+                         "per_query_p50_ms": stats["p50_ms"] / batch, **stats})
+            print(f"  query batch {batch:>3}  cold {cold:9.2f} ms  p50 {stats['p50_ms']:9.3f} ms  "
+                  f"p95 {stats['p95_ms']:9.3f} ms  ({stats['p50_ms'] / batch:.3f} ms/query)")
+        if not args.work_dir:
+            shutil.rmtree(path, ignore_errors=True)
+
+    write_results(args.out, {"meta": run_metadata(), "config": vars(args), "results": rows})
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+SignHub - Benchmark Helpers
+Synthetic datasets, latency summaries and result files shared by the benchmark scripts
+"""
+
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+BENCH_PASSWORD = "benchmark-pass"
+
+# ============================================================
+# SYNTHETIC DATA
+# ============================================================
+def synthetic_user(i, password_hash):
+    return {"password": password_hash, "email": f"learner{i}@example.com", "full_name": f"Learner {i}",
+            "country": "", "phone": "", "bio": "", "joined": "2024-01-01T00:00:00"}
+
+def synthetic_progress(i, rng, quizzes):
+    taken = rng.randint(0, len(quizzes))
+    scores, certs, points = {}, [], 0
+    for quiz in rng.sample(quizzes, taken):
+        score = rng.choice([0, 10, 20, 30, 40, 50])
+        points += score
+        scores[quiz] = {"score": score, "total": 50, "percentage": score * 2.0, "date": "2024-01-01 12:00"}
+        certs.append({"quiz": quiz, "score": f"{score}/50", "percentage": f"{score * 2.0:.1f}%", "date": "2024-01-01"})
+    return {"level": 1, "quizzes_taken": taken, "quiz_scores": scores, "total_points": points, "certificates": certs}
+
+def write_dataset(data_dir, n_users, password_hash, quizzes, seed=0):
+    """Stream legacy users.json/progress.json with n_users learners into data_dir"""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    with open(data_dir / "users.json", "w", encoding="utf-8") as uf, open(data_dir / "progress.json", "w", encoding="utf-8") as pf:
+        uf.write("{")
+        pf.write("{")
+        for i in range(n_users):
+            sep = "," if i else ""
+            uf.write(f'{sep}"learner{i}":{json.dumps(synthetic_user(i, password_hash))}')
+            pf.write(f'{sep}"learner{i}":{json.dumps(synthetic_progress(i, rng, quizzes))}')
+        uf.write("}")
+        pf.write("}")
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+def io_counters():
+    """(bytes read, bytes written) by this process, from /proc where available"""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+def summarize(samples_ms):
+    s = sorted(samples_ms)
+    return {"n": len(s), "mean_ms": sum(s) / len(s) if s else 0.0, "p50_ms": percentile(s, 50),
+            "p95_ms": percentile(s, 95), "p99_ms": percentile(s, 99), "max_ms": s[-1] if s else 0.0}
+
+def time_op(fn, args_list):
+    """Run fn(*args) for each args; latency summary plus mean bytes read/written per call"""
+    samples = []
+    read0, write0 = io_counters()
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    read1, write1 = io_counters()
+    result = summarize(samples)
+    result["read_bytes_per_op"] = (read1 - read0) / max(len(samples), 1)
+    result["write_bytes_per_op"] = (write1 - write0) / max(len(samples), 1)
+    return result
+
+# ============================================================
+# RESULT FILES
+# ============================================================
+def run_metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+def write_results(path, payload):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"Results written to {path}")
+
+def compare_results(current, baseline, key_fields, metric="p95_ms", tolerance=0.2):
+    """Rows whose metric got worse than baseline by more than tolerance"""
+    def key(row):
+        return tuple(row.get(k) for k in key_fields)
+    base = {key(row): row for row in baseline}
+    regressions = []
+    for row in current:
+        old = base.get(key(row))
+        if old and old.get(metric) and row.get(metric, 0) > old[metric] * (1 + tolerance):
+            regressions.append((key(row), old[metric], row[metric]))
+    return regressions
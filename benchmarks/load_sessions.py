@@ -0,0 +1,375 @@
+"""
+SignHub - Concurrent Session Load Test
+Drives many learners through register -> login -> every quiz -> results against a real Streamlit server
+
+    python benchmarks/load_sessions.py --sessions 10 25 50
+    python benchmarks/load_sessions.py --url http://localhost:8501 --data-dir data --sessions 20
+
+Each session is a websocket client speaking Streamlit's own protocol, so
+every click is a full server-side rerun exactly as a browser would cause.
+By default a fresh `streamlit run app.py` is started on localhost with an
+empty data directory. For each concurrency level the run reports rerun
+latency per journey step, journeys and reruns per second, server CPU and
+RSS, and progress updates that did not make it into storage.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from common import ROOT, run_metadata, summarize, write_results
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+LOAD_PASSWORD = "load-test-pass"
+
+# ============================================================
+# SESSION CLIENT
+# ============================================================
+class Session:
+    """One browser tab: a websocket plus the widgets the last rerun rendered"""
+
+    def __init__(self, url):
+        self.url = url
+        self.ws = None
+        self.widgets = {}
+        self.alerts = []
+        self.samples = {}
+        self.errors = 0
+
+    async def connect(self):
+        ws_url = self.url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.ws = await websocket_connect(ws_url, max_message_size=64 * 1024 * 1024)
+
+    def close(self):
+        if self.ws is not None:
+            self.ws.close()
+
+    async def rerun(self, step, widget_states=()):
+        """Send one rerun and wait until the script (and any st.rerun it chains) finishes"""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        for state in widget_states:
+            msg.rerun_script.widget_states.widgets.append(state)
+        self.widgets, self.alerts = {}, []
+        start = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                raise ConnectionError("server closed the session")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                # Sent at every script start; a run cut short by st.rerun may
+                # have had its remaining messages dropped, script_finished included
+                self.widgets, self.alerts = {}, []
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                self._collect(fwd.delta.new_element)
+            elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        self.samples.setdefault(step, []).append((time.perf_counter() - start) * 1000)
+        if any(kind == "error" for kind, _ in self.alerts):
+            self.errors += 1
+
+    def _collect(self, element):
+        kind = element.WhichOneof("type")
+        if kind in ("button", "text_input", "checkbox"):
+            widget = getattr(element, kind)
+            self.widgets[widget.id] = (kind, widget.label)
+        elif kind == "alert":
+            fmt = {1: "error", 2: "warning", 3: "info", 4: "success"}.get(element.alert.format, "other")
+            self.alerts.append((fmt, element.alert.body))
+
+    def find(self, label=None, key=None):
+        """Widget id by user key (suffix of the generated id) or by label"""
+        for wid, (_, wlabel) in self.widgets.items():
+            if (key is not None and wid.endswith("-" + key)) or (key is None and wlabel == label):
+                return wid
+        raise LookupError(f"widget {key or label!r} not on page")
+
+    def click(self, label=None, key=None, values=None):
+        """Widget states for pressing a button, plus any text/checkbox values given by label"""
+        states = []
+        for wlabel, value in (values or {}).items():
+            state = _widget_state(self.find(label=wlabel))
+            if isinstance(value, bool):
+                state.bool_value = value
+            else:
+                state.string_value = value
+            states.append(state)
+        state = _widget_state(self.find(label=label, key=key))
+        state.trigger_value = True
+        states.append(state)
+        return states
+
+def _widget_state(wid):
+    state = WidgetState()
+    state.id = wid
+    return state
+
+# ============================================================
+# JOURNEY
+# ============================================================
+async def journey(url, index, quizzes, rng, think):
+    """register -> login -> dashboard -> each quiz -> results; returns (session, email, expected progress)"""
+    session = Session(url)
+    email = f"load{index}-{rng.randrange(10 ** 9)}@example.com"
+    expected = {"quizzes_taken": 0, "total_points": 0, "certificates": 0}
+
+    async def pause():
+        if think:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+    await session.connect()
+    try:
+        await session.rerun("open")
+        await pause()
+        await session.rerun("register_tab", session.click(key="tab_register"))
+        await pause()
+        await session.rerun("register", session.click(label="Sign Up", values={
+            "Name": f"Load {index}", "Email": email, "Password": LOAD_PASSWORD, "Repeat Password": LOAD_PASSWORD,
+            "I agree to Terms of Service and Privacy Policy": True}))
+        await pause()
+        await session.rerun("login_tab", session.click(key="tab_login"))
+        await session.rerun("login", session.click(label="Log In", values={
+            "Email Address": email, "Password": LOAD_PASSWORD}))
+        await pause()
+
+        for quiz_name, quiz in quizzes.items():
+            await session.rerun("dashboard_to_quizzes", session.click(key="btn_quiz"))
+            await pause()
+            await session.rerun("quiz_start", session.click(key=f"start_{quiz_name}"))
+            for question in quiz["questions"]:
+                await pause()
+                pick = rng.randrange(len(question["options"]))
+                if pick == question["correct"]:
+                    expected["total_points"] += question["points"]
+                await session.rerun("quiz_answer", session.click(key=f"opt_{pick}"))
+            expected["quizzes_taken"] += 1
+            expected["certificates"] += 1
+            await session.rerun("quiz_to_dashboard", session.click(label="🏠 Dashboard"))
+
+        await pause()
+        await session.rerun("results", session.click(key="btn_results"))
+    finally:
+        session.close()
+    return session, email, expected
+
+# ============================================================
+# SERVER
+# ============================================================
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(data_dir, port, env_overrides):
+    env = dict(os.environ, SIGNHUB_DATA_DIR=str(data_dir), **env_overrides)
+    cmd = [sys.executable, "-m", "streamlit", "run", str(ROOT / "app.py"), "--server.headless", "true",
+           "--server.port", str(port), "--server.address", "127.0.0.1", "--browser.gatherUsageStats", "false",
+           "--server.fileWatcherType", "none", "--global.developmentMode", "false"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("streamlit exited: " + proc.stderr.read().decode(errors="replace")[-2000:])
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("streamlit did not start within 60s")
+
+def stop_server(proc):
+    """SIGINT lets streamlit shut down cleanly, so atexit flushes and compacts progress"""
+    proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+class ProcSampler(threading.Thread):
+    """Samples a process's CPU% and RSS from /proc"""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(name="proc-sampler", daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.cpu, self.rss = [], []
+        self.stopped = threading.Event()
+
+    def _read(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = int(fields[11]) + int(fields[12])
+        with open(f"/proc/{self.pid}/status") as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        return ticks / os.sysconf("SC_CLK_TCK"), rss * 1024
+
+    def run(self):
+        try:
+            last_cpu, _ = self._read()
+        except (OSError, StopIteration, IndexError):
+            return
+        last_t = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            try:
+                cpu, rss = self._read()
+            except (OSError, StopIteration, IndexError):
+                return
+            now = time.perf_counter()
+            self.cpu.append(100 * (cpu - last_cpu) / (now - last_t))
+            self.rss.append(rss)
+            last_cpu, last_t = cpu, now
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return {"cpu_mean_pct": sum(self.cpu) / len(self.cpu) if self.cpu else 0.0,
+                "cpu_peak_pct": max(self.cpu, default=0.0),
+                "rss_peak_mb": max(self.rss, default=0) / 2 ** 20}
+
+# ============================================================
+# VERIFICATION
+# ============================================================
+def lost_updates(data_dir, backend, outcomes):
+    """Compare what each journey did with what storage now holds"""
+    from progress_log import ProgressLog
+    from storage import open_storage
+
+    store = open_storage(backend, Path(data_dir))
+    log = ProgressLog(Path(data_dir) / "progress_events.jsonl", store)
+    lost = []
+    for email, expected in outcomes:
+        username = store.find_username(email)
+        if username is None:
+            lost.append({"email": email, "missing": "user"})
+            continue
+        prog = log.overlay(username, store.get_progress(username))
+        got = {"quizzes_taken": prog.get("quizzes_taken", 0), "total_points": prog.get("total_points", 0),
+               "certificates": len(prog.get("certificates", []))}
+        if got != expected:
+            lost.append({"email": email, "expected": expected, "got": got})
+    store.close()
+    return lost
+
+# ============================================================
+# DRIVER
+# ============================================================
+async def run_level(url, n_sessions, quizzes, seed, think, ramp):
+    rng = random.Random(seed)
+
+    async def one(i):
+        await asyncio.sleep(ramp * i / max(n_sessions, 1))
+        try:
+            return await journey(url, i, quizzes, random.Random(rng.random()), think)
+        except Exception as e:
+            return e
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(one(i) for i in range(n_sessions)))
+    return outcomes, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25],
+                        help="concurrency levels, each run as a separate step")
+    parser.add_argument("--think", type=float, default=0.0, help="mean think time between clicks (s)")
+    parser.add_argument("--ramp", type=float, default=1.0, help="spread session starts over this many seconds")
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "json"])
+    parser.add_argument("--url", help="drive an already running server instead of starting one")
+    parser.add_argument("--data-dir", help="data dir of --url's server, for the lost-update check")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=str(ROOT / "benchmarks" / "results" / "load.json"))
+    args = parser.parse_args()
+
+    import app
+    # Bank quizzes draw different questions every attempt, so the expected score can't be precomputed
+    quizzes = {name: quiz for name, quiz in app.QUIZZES.items() if "questions" in quiz}
+    rows = []
+    for n in args.sessions:
+        data_dir, proc, sampler = args.data_dir, None, None
+        url = args.url
+        if not url:
+            data_dir = tempfile.mkdtemp(prefix="signhub-load-")
+            port = free_port()
+            proc = start_server(data_dir, port, {"SIGNHUB_STORAGE": args.backend})
+            url = f"http://127.0.0.1:{port}"
+            sampler = ProcSampler(proc.pid)
+            sampler.start()
+
+        print(f"Running {n} sessions against {url}...")
+        outcomes, elapsed = asyncio.run(run_level(url, n, quizzes, args.seed + n, args.think, args.ramp))
+        server = sampler.stop() if sampler else {}
+        if proc:
+            stop_server(proc)
+
+        failed = [o for o in outcomes if isinstance(o, Exception)]
+        done = [o for o in outcomes if not isinstance(o, Exception)]
+        steps = {}
+        for session, _, _ in done:
+            for step, samples in session.samples.items():
+                steps.setdefault(step, []).extend(samples)
+        all_samples = [s for samples in steps.values() for s in samples]
+        lost = lost_updates(data_dir, args.backend, [(email, exp) for _, email, exp in done]) if data_dir else None
+        if proc:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+        row = {"sessions": n, "elapsed_s": elapsed, "journeys_ok": len(done), "journeys_failed": len(failed),
+               "journeys_per_s": len(done) / elapsed, "reruns_per_s": len(all_samples) / elapsed,
+               "error_alerts": sum(session.errors for session, _, _ in done),
+               "rerun": summarize(all_samples), "steps": {k: summarize(v) for k, v in steps.items()},
+               "server": server, "lost_updates": lost}
+        rows.append(row)
+
+        print(f"  {len(done)}/{n} journeys in {elapsed:.1f}s  {row['journeys_per_s']:.2f} journeys/s  "
+              f"{row['reruns_per_s']:.1f} reruns/s")
+        print(f"  rerun p50 {row['rerun']['p50_ms']:.1f} ms  p95 {row['rerun']['p95_ms']:.1f} ms  "
+              f"p99 {row['rerun']['p99_ms']:.1f} ms")
+        for step, stats in row["steps"].items():
+            print(f"    {step:<22} n {stats['n']:>5}  p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms")
+        if server:
+            print(f"  server cpu mean {server['cpu_mean_pct']:.0f}%  peak {server['cpu_peak_pct']:.0f}%  "
+                  f"rss peak {server['rss_peak_mb']:.0f} MB")
+        for e in failed[:3]:
+            print(f"  failed journey: {e!r}")
+        if lost is None:
+            print("  lost updates: not checked (pass --data-dir)")
+        else:
+            print(f"  lost updates: {len(lost)}")
+            for item in lost[:5]:
+                print(f"    {item}")
+
+    # The ceiling is where adding sessions stops buying throughput
+    ceiling = rows[0]["sessions"]
+    for prev, row in zip(rows, rows[1:]):
+        if row["reruns_per_s"] < prev["reruns_per_s"] * 1.05:
+            break
+        ceiling = row["sessions"]
+    print(f"Throughput stops scaling at ~{ceiling} concurrent sessions")
+
+    write_results(args.out, {"meta": run_metadata(), "config": vars(args), "results": rows, "ceiling_sessions": ceiling})
+    lost_any = any(row["lost_updates"] for row in rows)
+    failed_any = any(row["journeys_failed"] for row in rows)
+    return 1 if lost_any or failed_any else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+SignHub - Certificate Files
+Renders certificates to PNG and PDF in a background pool, cached by content hash
+"""
+
+import functools
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+RENDER_VERSION = 1          # bump when the layout changes so existing files are redrawn
+FORMATS = {"png": "image/png", "pdf": "application/pdf"}
+SIZE = (1600, 1130)
+BRAND = (46, 120, 103)
+INK = (31, 41, 55)
+MUTED = (107, 114, 128)
+
+# ============================================================
+# DRAWING
+# ============================================================
+@functools.lru_cache(maxsize=None)
+def font(size, bold=False):
+    names = ["DejaVuSans-Bold.ttf", "Arial Bold.ttf"] if bold else ["DejaVuSans.ttf", "Arial.ttf"]
+    for name in names:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    # Pillow's bundled scalable font
+    return ImageFont.load_default(size)
+
+def certificate_key(username, name, cert):
+    """Content hash of everything drawn on the certificate"""
+    payload = json.dumps([RENDER_VERSION, username, name, cert["quiz"], cert["score"], cert.get("percentage"), cert["date"]],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def render_certificate(name, cert):
+    image = Image.new("RGB", SIZE, "white")
+    draw = ImageDraw.Draw(image)
+    width, height = SIZE
+    draw.rectangle([30, 30, width - 30, height - 30], outline=BRAND, width=14)
+    draw.rectangle([62, 62, width - 62, height - 62], outline=BRAND, width=3)
+
+    def centered(y, text, size, fill=INK, bold=False):
+        # Shrink long names and quiz titles to fit inside the border
+        while True:
+            face = font(size, bold)
+            left, _, right, _ = draw.textbbox((0, 0), text, font=face)
+            if right - left <= width - 240 or size <= 20:
+                break
+            size -= 4
+        draw.text(((width - (right - left)) / 2, y), text, font=face, fill=fill)
+
+    centered(150, "SignHub", 44, BRAND, bold=True)
+    centered(240, "Certificate of Achievement", 84, INK, bold=True)
+    centered(400, "This certifies that", 36, MUTED)
+    centered(470, name, 72, BRAND, bold=True)
+    centered(600, "has successfully completed", 36, MUTED)
+    centered(665, cert["quiz"], 60, INK, bold=True)
+    score = cert["score"] + (f"  ({cert['percentage']})" if cert.get("percentage") else "")
+    centered(790, f"Score: {score}", 40, INK)
+    centered(930, f"Earned on {cert['date']}", 32, MUTED)
+    return image
+
+def encode(image, fmt):
+    out = io.BytesIO()
+    if fmt == "pdf":
+        image.save(out, "PDF", resolution=150)
+    else:
+        image.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+# ============================================================
+# RENDERER
+# ============================================================
+class CertificateRenderer:
+    """Certificate files under cache_dir/<hash[:2]>/<hash>.<format>, drawn by a worker pool.
+
+    A file is named after the hash of what is drawn on it, so an existing
+    file is always current: views and downloads only ever read it, and
+    submitting a certificate that is already rendering is a no-op.
+    """
+
+    def __init__(self, cache_dir, workers=2):
+        self.cache_dir = Path(cache_dir)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="certificates")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.rendered = 0
+
+    def path(self, key, fmt):
+        return self.cache_dir / key[:2] / f"{key}.{fmt}"
+
+    def ready(self, key):
+        return all(self.path(key, fmt).exists() for fmt in FORMATS)
+
+    def submit(self, username, name, cert):
+        """Queue rendering unless the files exist or are on their way; returns the key"""
+        key = certificate_key(username, name, cert)
+        if self.ready(key):
+            return key
+        with self._lock:
+            if key in self._inflight:
+                return key
+            future = self._inflight[key] = self._pool.submit(self._render, key, name, cert)
+        # Outside the lock: the callback runs at once if the render already finished
+        future.add_done_callback(lambda f: self._done(key, f))
+        return key
+
+    def _done(self, key, future):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if future.exception() is not None:
+            print(f"⚠️ Certificate rendering failed: {future.exception()}")
+
+    def _render(self, key, name, cert):
+        image = render_certificate(name, cert)
+        # Each file is renamed into place whole, so readers never see a partial one
+        for fmt in FORMATS:
+            path = self.path(key, fmt)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(encode(image, fmt))
+                os.replace(tmp, path)
+            except OSError:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        with self._lock:
+            self.rendered += 1
+        return key
+
+    def read(self, key, fmt):
+        """Bytes of a rendered file, or None while it is still being drawn"""
+        try:
+            return self.path(key, fmt).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def wait(self):
+        """Block until everything queued so far has been written"""
+        with self._lock:
+            futures = list(self._inflight.values())
+        for future in futures:
+            future.exception()
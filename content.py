@@ -0,0 +1,288 @@
+"""
+SignHub - Content Packs
+Alphabet, learning levels and quizzes loaded from versioned JSON/TOML pack files
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+from fingerspelling import FingerspellingRenderer
+from question_bank import QuestionBank, question_key
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: JSON packs only
+    tomllib = None
+
+PACK_SUFFIXES = (".json", ".toml")
+LEVEL_ITEMS = ("letters", "words", "sentences")
+
+class ContentError(ValueError):
+    """A pack file that is unreadable or doesn't match the schema"""
+
+def fixed_topic(quiz):
+    return f"quiz:{quiz}"
+
+# ============================================================
+# SCHEMA
+# ============================================================
+def _check(ok, where, message):
+    if not ok:
+        raise ContentError(f"{where}: {message}")
+
+def _keys(data, where, required, optional=()):
+    _check(isinstance(data, dict), where, "expected a table/object")
+    missing = [k for k in required if k not in data]
+    _check(not missing, where, f"missing {', '.join(missing)}")
+    unknown = [k for k in data if k not in required and k not in optional]
+    _check(not unknown, where, f"unknown key(s) {', '.join(unknown)}")
+
+def _text(value, where):
+    _check(isinstance(value, str) and value.strip(), where, "expected non-empty text")
+
+def _text_list(value, where, min_len=1):
+    _check(isinstance(value, list) and len(value) >= min_len, where, f"expected a list of at least {min_len}")
+    for i, item in enumerate(value):
+        _text(item, f"{where}[{i}]")
+
+def validate_pack(data, source):
+    """Raise ContentError unless data is a well-formed pack"""
+    _keys(data, source, ("pack", "version"), ("alphabet", "levels", "banks", "quizzes"))
+    _text(data["pack"], f"{source}.pack")
+    _check(isinstance(data["version"], int) and data["version"] >= 1, f"{source}.version", "expected an integer >= 1")
+
+    for letter, sign in data.get("alphabet", {}).items():
+        where = f"{source}.alphabet.{letter}"
+        _check(len(letter) == 1 and letter.isalpha() and letter.isupper(), where, "expected a single capital letter")
+        _keys(sign, where, ("emoji", "description"))
+        _text(sign["emoji"], f"{where}.emoji")
+        _text(sign["description"], f"{where}.description")
+
+    for name, level in data.get("levels", {}).items():
+        where = f"{source}.levels.{name}"
+        _keys(level, where, ("title", "description"), ("youtube",) + LEVEL_ITEMS)
+        _text(level["title"], f"{where}.title")
+        _text(level["description"], f"{where}.description")
+        _check(any(k in level for k in LEVEL_ITEMS), where, f"expected one of {', '.join(LEVEL_ITEMS)}")
+        for key in LEVEL_ITEMS:
+            if key in level:
+                _text_list(level[key], f"{where}.{key}")
+
+    for topic, bank in data.get("banks", {}).items():
+        where = f"{source}.banks.{topic}"
+        _keys(bank, where, ("questions",))
+        _check(isinstance(bank["questions"], list) and bank["questions"], f"{where}.questions", "expected a non-empty list")
+        for i, q in enumerate(bank["questions"]):
+            qwhere = f"{where}.questions[{i}]"
+            _keys(q, qwhere, ("q", "options", "correct"), ("emojis", "difficulty", "letter", "id"))
+            _question(q, qwhere)
+            if "difficulty" in q:
+                _check(isinstance(q["difficulty"], int) and 1 <= q["difficulty"] <= 5, f"{qwhere}.difficulty",
+                       "expected an integer from 1 to 5")
+
+    for name, quiz in data.get("quizzes", {}).items():
+        where = f"{source}.quizzes.{name}"
+        if isinstance(quiz, dict) and "bank" in quiz:
+            # Drawn fresh for every attempt from a bank
+            _keys(quiz, where, ("bank", "draw"), ("points", "difficulty", "letters"))
+            _text(quiz["bank"], f"{where}.bank")
+            _check(isinstance(quiz["draw"], int) and 1 <= quiz["draw"] <= 64, f"{where}.draw",
+                   "expected an integer from 1 to 64")
+            _check(isinstance(quiz.get("points", 10), int) and quiz.get("points", 10) > 0, f"{where}.points",
+                   "expected a positive integer")
+            if "difficulty" in quiz:
+                _check(isinstance(quiz["difficulty"], list) and all(isinstance(d, int) for d in quiz["difficulty"]),
+                       f"{where}.difficulty", "expected a list of integers")
+            if "letters" in quiz:
+                _text_list(quiz["letters"], f"{where}.letters")
+            continue
+        _keys(quiz, where, ("questions",))
+        _check(isinstance(quiz["questions"], list) and quiz["questions"], f"{where}.questions", "expected a non-empty list")
+        for i, q in enumerate(quiz["questions"]):
+            qwhere = f"{where}.questions[{i}]"
+            _keys(q, qwhere, ("q", "options", "emojis", "correct", "points"), ("letter",))
+            _question(q, qwhere)
+            _check(isinstance(q["points"], int) and q["points"] > 0, f"{qwhere}.points", "expected a positive integer")
+
+def _question(q, where):
+    _text(q["q"], f"{where}.q")
+    _text_list(q["options"], f"{where}.options", 2)
+    if "emojis" in q:
+        _text_list(q["emojis"], f"{where}.emojis", len(q["options"]))
+        _check(len(q["emojis"]) == len(q["options"]), f"{where}.emojis", "expected one emoji per option")
+    _check(isinstance(q["correct"], int) and 0 <= q["correct"] < len(q["options"]), f"{where}.correct",
+           "expected the index of one of the options")
+    if "letter" in q:
+        _check(isinstance(q["letter"], str) and len(q["letter"]) == 1 and q["letter"].isupper(),
+               f"{where}.letter", "expected a single capital letter")
+
+def load_pack(path):
+    path = Path(path)
+    if path.suffix == ".toml":
+        _check(tomllib is not None, path.name, "TOML packs need Python 3.11+")
+    try:
+        if path.suffix == ".toml":
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ContentError(f"{path.name}: {e}") from e
+    validate_pack(data, path.name)
+    return data
+
+# ============================================================
+# COMPILED CONTENT
+# ============================================================
+class Content:
+    """Merged packs plus everything pages would otherwise recompute per rerun.
+
+    alphabet, descriptions, levels and quizzes keep the shapes app.py has
+    always used. Treat an instance as read-only: a reload builds a new one.
+    """
+
+    def __init__(self, packs, phrase_cache=2048):
+        self.packs = [(p["pack"], p["version"]) for p in packs]
+        self.alphabet, self.descriptions, self.levels, self.quizzes = {}, {}, {}, {}
+        banks = {}
+        # Later packs (by file name) override same-named entries of earlier ones;
+        # bank topics instead grow, with a repeated question id replacing the earlier question
+        for pack in packs:
+            for letter, sign in pack.get("alphabet", {}).items():
+                self.alphabet[letter] = sign["emoji"]
+                self.descriptions[letter] = sign["description"]
+            self.levels.update(pack.get("levels", {}))
+            self.quizzes.update(pack.get("quizzes", {}))
+            for topic, bank in pack.get("banks", {}).items():
+                topic_questions = banks.setdefault(topic, {})
+                for q in bank["questions"]:
+                    topic_questions[question_key(topic, q)] = q
+        self.letters = sorted(self.alphabet)
+        self.speller = FingerspellingRenderer(self.alphabet, self.descriptions, phrase_cache)
+        for name, level in self.levels.items():
+            unknown = [l for l in level.get("letters", ()) if l not in self.alphabet]
+            _check(not unknown, f"levels.{name}.letters", f"no alphabet entry for {', '.join(unknown)}")
+
+        # Fixed quizzes become one-topic banks too, so every attempt is a list of positions
+        topics = {topic: list(questions.values()) for topic, questions in banks.items()}
+        for name, quiz in self.quizzes.items():
+            if "questions" in quiz:
+                topics[fixed_topic(name)] = quiz["questions"]
+        self.bank = QuestionBank(topics)
+
+        self.plans, self.quiz_points, self.quiz_lengths, self.quiz_digests = {}, {}, {}, {}
+        for name, quiz in self.quizzes.items():
+            if "questions" in quiz:
+                plan = {"topic": fixed_topic(name), "count": len(quiz["questions"]), "shuffle": False}
+                points = sum(q["points"] for q in quiz["questions"])
+            else:
+                _check(quiz["bank"] in banks, f"quizzes.{name}.bank", f"no bank named {quiz['bank']}")
+                pool = self.bank.pool(quiz["bank"], quiz.get("difficulty"), quiz.get("letters"))
+                _check(len(pool), f"quizzes.{name}", "no bank questions match its filters")
+                plan = {"topic": quiz["bank"], "count": min(quiz["draw"], len(pool)), "shuffle": True,
+                        "points": quiz.get("points", 10), "difficulty": quiz.get("difficulty"), "letters": quiz.get("letters")}
+                points = plan["count"] * plan["points"]
+            self.plans[name] = plan
+            self.quiz_points[name] = points
+            self.quiz_lengths[name] = plan["count"]
+            # Lets a running attempt notice that its quiz (or the bank it draws from) was edited under it
+            self.quiz_digests[name] = hashlib.sha256(json.dumps([quiz, self.bank.digests[plan["topic"]]], sort_keys=True)
+                                                     .encode("utf-8")).hexdigest()[:16]
+
+    def draw(self, quiz, seed):
+        """Question positions for one attempt at quiz"""
+        plan = self.plans[quiz]
+        if not plan["shuffle"]:
+            return list(range(plan["count"]))
+        return self.bank.sample(plan["topic"], plan["count"], seed, plan["difficulty"], plan["letters"])
+
+    def question(self, quiz, position, seed):
+        """One question of an attempt, with options in this attempt's order and its points"""
+        plan = self.plans[quiz]
+        question = self.bank.present(plan["topic"], position, seed if plan["shuffle"] else None)
+        question["points"] = plan["points"] if plan["shuffle"] else self.quizzes[quiz]["questions"][position]["points"]
+        return question
+
+    def question_keys(self, quiz, positions):
+        """Stable ids of the questions drawn for an attempt; None for fixed quizzes"""
+        plan = self.plans[quiz]
+        return [self.bank.key(plan["topic"], p) for p in positions] if plan["shuffle"] else None
+
+    def question_letters(self, quiz, positions):
+        """Letter each drawn question practises (None if untagged); None if the quiz tags none"""
+        plan = self.plans[quiz]
+        letters = [self.bank.letter_of(plan["topic"], p) for p in positions]
+        return letters if any(letters) else None
+
+    def question_label(self, quiz, question):
+        """Question text for analytics: question is a bank id, or a position in a fixed quiz"""
+        plan = self.plans.get(quiz)
+        if plan and not plan["shuffle"] and str(question).isdigit() and int(question) < plan["count"]:
+            return self.quizzes[quiz]["questions"][int(question)]["q"]
+        return self.bank.text_for(str(question)) or (f"Q{int(question) + 1}" if str(question).isdigit() else str(question))
+
+    @property
+    def version(self):
+        return ", ".join(f"{name} v{version}" for name, version in self.packs)
+
+# ============================================================
+# HOT-RELOADING LIBRARY
+# ============================================================
+class ContentLibrary:
+    """The pack directory, recompiled whenever a pack file is added, removed or modified.
+
+    current() stats the directory at most every check_interval seconds. A
+    pack that fails to load or validate leaves the last good content in
+    place and is reported in last_error, so a bad edit never takes the
+    site down.
+    """
+
+    def __init__(self, directory, check_interval=2.0, phrase_cache=2048):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self.phrase_cache = phrase_cache
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked = 0.0
+        self._content = None
+        self.last_error = None
+        self.reloads = 0
+        self._reload(self._scan())
+        if self._content is None:
+            raise ContentError(self.last_error)
+
+    def _scan(self):
+        files = sorted(p for p in self.directory.iterdir() if p.suffix in PACK_SUFFIXES and not p.name.startswith("."))
+        return tuple((p.name, p.stat().st_mtime_ns, p.stat().st_size) for p in files)
+
+    def _reload(self, signature):
+        self._signature = signature
+        try:
+            packs = [load_pack(self.directory / name) for name, _, _ in signature]
+            _check(packs, str(self.directory), "no content packs found")
+            self._content = Content(packs, self.phrase_cache)
+            self.last_error = None
+            self.reloads += 1
+        except (ContentError, OSError) as e:
+            self.last_error = str(e)
+            print(f"⚠️ Content packs not reloaded: {e}")
+
+    def current(self):
+        """The compiled content, reloaded first if a pack changed on disk"""
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._content
+        with self._lock:
+            if now - self._checked >= self.check_interval:
+                self._checked = now
+                try:
+                    signature = self._scan()
+                except OSError as e:
+                    signature, self.last_error = self._signature, str(e)
+                if signature != self._signature:
+                    self._reload(signature)
+            return self._content
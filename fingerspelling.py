@@ -0,0 +1,94 @@
+"""
+SignHub - Fingerspelling
+Text to ASL letter sequences, rendered as small HTML fragments memoized per phrase
+"""
+
+import html
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+def normalize_phrase(text):
+    """Upper-case ASCII letters and digits, single-spaced; accents folded, apostrophes and punctuation dropped"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").replace("'", "")
+    return " ".join(re.sub(r"[^A-Za-z0-9]+", " ", text).upper().split())
+
+class FingerspellingRenderer:
+    """Glyph tiles for arbitrary text, one cached fragment per normalized phrase.
+
+    render() builds a phrase's fragment once and keeps it in a bounded LRU,
+    so "Hello" and "hello!" share an entry, and the words a page shows on
+    every rerun cost a dictionary lookup. stream() walks a long passage
+    word by word and yields a line of tiles at a time, so the page emits
+    many small elements instead of one giant block.
+    """
+
+    def __init__(self, alphabet, descriptions, max_phrases=2048):
+        self.alphabet = alphabet
+        self.descriptions = descriptions
+        self.max_phrases = max_phrases
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def steps(self, text):
+        """[(character, emoji or None, description or None)] to sign text; None entries mark word breaks"""
+        out = []
+        for word in normalize_phrase(text).split():
+            if out:
+                out.append(None)
+            out.extend((c, self.alphabet.get(c), self.descriptions.get(c)) for c in word)
+        return out
+
+    def _tile(self, char):
+        emoji = self.alphabet.get(char)
+        if emoji is None:
+            # No handshape in the alphabet (digits): show the character itself
+            return f'<span class="fs-glyph"><span class="fs-emoji">{char}</span><span class="fs-letter">&nbsp;</span></span>'
+        title = html.escape(f"{char}: {self.descriptions.get(char, '')}", quote=True)
+        return f'<span class="fs-glyph" title="{title}"><span class="fs-emoji">{emoji}</span><span class="fs-letter">{char}</span></span>'
+
+    def _build(self, phrase):
+        return "".join(f'<span class="fs-word">{"".join(self._tile(c) for c in word)}</span>' for word in phrase.split())
+
+    def _words(self, phrase):
+        with self._lock:
+            fragment = self._cache.get(phrase)
+            if fragment is not None:
+                self._cache.move_to_end(phrase)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+        fragment = self._build(phrase)
+        with self._lock:
+            self._cache[phrase] = fragment
+            while len(self._cache) > self.max_phrases:
+                self._cache.popitem(last=False)
+        return fragment
+
+    def render(self, text):
+        """HTML tiles for text, from the LRU when its normalized form was rendered before"""
+        return f'<div class="fs-line">{self._words(normalize_phrase(text))}</div>'
+
+    def stream(self, text, line_words=6):
+        """Yield lines of at most line_words words' tiles, reading text lazily; words go through the LRU one by one"""
+        line, count = [], 0
+        for match in re.finditer(r"\S+", text):
+            word = normalize_phrase(match.group())
+            if not word:
+                continue
+            line.append(self._words(word))
+            count += 1
+            if count == line_words:
+                yield f'<div class="fs-line">{"".join(line)}</div>'
+                line, count = [], 0
+        if line:
+            yield f'<div class="fs-line">{"".join(line)}</div>'
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache),
+                    "hit_rate": self.hits / total if total else 0.0}
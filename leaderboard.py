@@ -0,0 +1,233 @@
+"""
+SignHub - Leaderboards
+Global and per-quiz rankings kept up to date from the progress event log
+"""
+
+import argparse
+import heapq
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from pathlib import Path
+
+from progress_log import apply_events
+from storage import load_json, save_json
+
+GLOBAL = "global"
+
+def quiz_board(quiz):
+    return f"quiz:{quiz}"
+
+# ============================================================
+# BOARD
+# ============================================================
+class Board:
+    """Every user's score, with only the best entries kept in order.
+
+    _top holds the best capacity (top_k plus a margin) entries as
+    (-score, username), so ties list alphabetically, and it is always a
+    prefix of the full ranking: an update is an O(capacity) insort, not
+    O(users). A user whose score drops out of it is simply removed; once
+    fewer than top_k entries are left, _top is refilled from scores with
+    one O(users log capacity) pass. That only happens after margin such
+    drops, and scores only fall on per-quiz boards.
+
+    rank() counts users with strictly more points from a per-score tally,
+    so tied users share a rank and a lookup costs O(distinct scores),
+    which stays small (points come in steps of 10) however many users
+    there are.
+    """
+
+    def __init__(self, scores=None, top_k=100, margin=100):
+        self.scores = dict(scores or {})
+        self.top_k = top_k
+        self.capacity = top_k + margin
+        self._levels = sorted(set(self.scores.values()))
+        self._counts = {}
+        for score in self.scores.values():
+            self._counts[score] = self._counts.get(score, 0) + 1
+        self._refill()
+
+    def __len__(self):
+        return len(self.scores)
+
+    def _refill(self):
+        self._top = heapq.nsmallest(self.capacity, ((-score, user) for user, score in self.scores.items()))
+
+    def _tally(self, score, delta):
+        count = self._counts.get(score, 0) + delta
+        if count:
+            if score not in self._counts:
+                insort(self._levels, score)
+            self._counts[score] = count
+        else:
+            del self._counts[score]
+            del self._levels[bisect_left(self._levels, score)]
+
+    def set(self, username, score):
+        old = self.scores.get(username)
+        if old == score:
+            return
+        complete = len(self._top) == len(self.scores)
+        if old is not None:
+            self._tally(old, -1)
+            i = bisect_left(self._top, (-old, username))
+            if i < len(self._top) and self._top[i] == (-old, username):
+                del self._top[i]
+        self.scores[username] = score
+        self._tally(score, 1)
+        entry = (-score, username)
+        # Only an entry that beats the last kept one is known to belong in the prefix
+        if complete or (self._top and entry < self._top[-1]):
+            insort(self._top, entry)
+            if len(self._top) > self.capacity:
+                self._top.pop()
+        if len(self._top) < min(self.top_k, len(self.scores)):
+            self._refill()
+
+    def add(self, username, points):
+        self.set(username, self.scores.get(username, 0) + points)
+
+    def top(self, k=10):
+        """[(rank, username, score)] for the k best, ties sharing a rank"""
+        order = self._top[:k] if k <= len(self._top) or len(self._top) == len(self.scores) else \
+            heapq.nsmallest(k, ((-score, user) for user, score in self.scores.items()))
+        rows = []
+        for i, (neg, user) in enumerate(order):
+            rank = rows[-1][0] if rows and rows[-1][2] == -neg else i + 1
+            rows.append((rank, user, -neg))
+        return rows
+
+    def rank(self, username):
+        """1-based competition rank, or None if the user has no score here"""
+        score = self.scores.get(username)
+        if score is None:
+            return None
+        return 1 + sum(self._counts[level] for level in self._levels[bisect_right(self._levels, score):])
+
+# ============================================================
+# LEADERBOARD
+# ============================================================
+class Leaderboard:
+    """Per-board rankings folded from progress events, snapshotted to a JSON file.
+
+    Events are applied once per user by seq, so replaying the log after a
+    restart, or events that a rebuild already read from the store, are
+    no-ops. The snapshot records the last seq it covers; everything newer
+    is replayed from the log by attach().
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = Path(path)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        snapshot = load_json(self.path, {})
+        self.seq = snapshot.get("seq", 0)
+        self.user_seq = snapshot.get("user_seq", {})
+        self.boards = {name: Board(scores) for name, scores in snapshot.get("boards", {}).items()}
+        self._dirty = False
+
+    def exists(self):
+        return self.path.exists()
+
+    def _board(self, name):
+        board = self.boards.get(name)
+        if board is None:
+            board = self.boards[name] = Board()
+        return board
+
+    def _fold(self, username, event):
+        if event["type"] == "points_awarded":
+            self._board(GLOBAL).add(username, event["points"])
+        elif event["type"] == "quiz_completed":
+            # Mirrors quiz_scores, which keeps each quiz's latest attempt
+            self._board(quiz_board(event["quiz"])).set(username, event["score"])
+
+    def apply(self, events):
+        """Fold stamped log events; safe to call with events already applied"""
+        with self._lock:
+            for event in events:
+                user = event["user"]
+                if event["seq"] <= self.user_seq.get(user, 0):
+                    continue
+                self._fold(user, event)
+                self.user_seq[user] = event["seq"]
+                self.seq = max(self.seq, event["seq"])
+                self._dirty = True
+
+    def attach(self, log):
+        """Replay what the snapshot missed, then follow the log"""
+        log.subscribe(self.apply, self.seq)
+
+    def rebuild(self, store, log):
+        """Recompute every board from the full progress store plus the log"""
+        # Tail first: an event compacted during the scan is then in the store
+        # copy or in this tail, and apply_events skips it if it is in both
+        seq, tail = log.snapshot_tail()
+        boards, user_seq = {GLOBAL: {}}, {}
+        for username, prog in store.iter_progress():
+            apply_events(prog, [e for e in tail.get(username, ()) if e["seq"] <= seq])
+            if prog.get("total_points", 0) or prog.get("quizzes_taken", 0):
+                boards[GLOBAL][username] = prog.get("total_points", 0)
+            for quiz, result in prog.get("quiz_scores", {}).items():
+                boards.setdefault(quiz_board(quiz), {})[username] = result["score"]
+            if prog.get("_seq"):
+                user_seq[username] = prog["_seq"]
+
+        def swap(newer):
+            # Runs under the log's lock: events after seq are folded in before any new one arrives
+            with self._lock:
+                self.boards = {name: Board(scores) for name, scores in boards.items()}
+                self.user_seq = user_seq
+                self.seq = seq
+                self._dirty = True
+            self.apply(newer)
+        log.replay(swap, seq)
+        return sum(len(board) for board in self.boards.values())
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return False
+            snapshot = {"seq": self.seq, "user_seq": dict(self.user_seq),
+                        "boards": {name: dict(board.scores) for name, board in self.boards.items()}}
+            self._dirty = False
+        return save_json(self.path, snapshot, self.fsync)
+
+    def top(self, k=10, quiz=None):
+        with self._lock:
+            board = self.boards.get(quiz_board(quiz) if quiz else GLOBAL)
+            return board.top(k) if board else []
+
+    def rank(self, username, quiz=None):
+        """(rank, players) on the global board or one quiz's board"""
+        with self._lock:
+            board = self.boards.get(quiz_board(quiz) if quiz else GLOBAL)
+            if not board:
+                return None, 0
+            return board.rank(username), len(board)
+
+# ============================================================
+# BULK REBUILD
+# ============================================================
+if __name__ == "__main__":
+    from progress_log import ProgressLog
+    from storage import open_storage
+
+    parser = argparse.ArgumentParser(description="Rebuild or inspect the leaderboard snapshot")
+    parser.add_argument("--data-dir", default=os.environ.get("SIGNHUB_DATA_DIR", "data"))
+    parser.add_argument("--storage", default=os.environ.get("SIGNHUB_STORAGE", "sqlite"), choices=["sqlite", "json"])
+    parser.add_argument("--rebuild", action="store_true", help="recompute from the full progress store")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--quiz", help="show one quiz's board instead of the global one")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    board = Leaderboard(data_dir / "leaderboard.json")
+    if args.rebuild:
+        store = open_storage(args.storage, data_dir)
+        entries = board.rebuild(store, ProgressLog(data_dir / "progress_events.jsonl", store))
+        board.save()
+        print(f"Rebuilt {len(board.boards)} boards ({entries} entries) up to event {board.seq}")
+    for rank, user, score in board.top(args.top, args.quiz):
+        print(f"{rank:>4}. {user:<24} {score}")
@@ -0,0 +1,321 @@
+"""
+SignHub - Rerun Metrics
+Per-rerun timings and payload sizes, aggregated into Prometheus histograms
+"""
+
+import cProfile
+import functools
+import itertools
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# ============================================================
+# SETTINGS
+# ============================================================
+METRICS_FILE = None         # Prometheus text file, rewritten at most every EXPORT_INTERVAL seconds
+EXPORT_INTERVAL = 10.0
+PROFILE_SLOW_MS = 0         # > 0: profile every rerun, keep the ones slower than this
+PROFILE_DIR = Path("profiles")
+PROFILE_KEEP = 20
+STATE_SAMPLE_EVERY = 50     # pickle session_state on every Nth rerun (every rerun while profiling); 0: never
+
+def configure(metrics_file=None, export_interval=None, profile_slow_ms=None, profile_dir=None, profile_keep=None,
+              state_sample_every=None):
+    global METRICS_FILE, EXPORT_INTERVAL, PROFILE_SLOW_MS, PROFILE_DIR, PROFILE_KEEP, STATE_SAMPLE_EVERY
+    if metrics_file is not None: METRICS_FILE = Path(metrics_file) if metrics_file else None
+    if export_interval is not None: EXPORT_INTERVAL = export_interval
+    if profile_slow_ms is not None: PROFILE_SLOW_MS = profile_slow_ms
+    if profile_dir is not None: PROFILE_DIR = Path(profile_dir)
+    if profile_keep is not None: PROFILE_KEEP = profile_keep
+    if state_sample_every is not None: STATE_SAMPLE_EVERY = state_sample_every
+
+# ============================================================
+# METRIC TYPES
+# ============================================================
+SECONDS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CALLS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_lock = threading.Lock()
+
+def _labels(label, value, extra=""):
+    parts = [f'{label}="{value}"'] if label else []
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by one label"""
+
+    def __init__(self, name, help, buckets, label=None):
+        self.name, self.help, self.buckets, self.label = name, help, buckets, label
+        self.series = {}
+
+    def observe(self, value, label_value=None):
+        with _lock:
+            counts = self.series.setdefault(label_value, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            series = {k: list(v) for k, v in self.series.items()}
+        for label_value, counts in sorted(series.items(), key=lambda kv: str(kv[0])):
+            for bound, n in zip(self.buckets, counts):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label, label_value, le)} {n}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label, label_value, le)} {counts[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label, label_value)} {counts[-2]:.6g}")
+            lines.append(f"{self.name}_count{_labels(self.label, label_value)} {counts[-1]}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help, label=None):
+        self.name, self.help, self.label = name, help, label
+        self.values = {}
+
+    def inc(self, amount=1, label_value=None):
+        with _lock:
+            self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with _lock:
+            values = dict(self.values)
+        for label_value, value in sorted(values.items(), key=lambda kv: str(kv[0])):
+            lines.append(f"{self.name}{_labels(self.label, label_value)} {value}")
+        return lines
+
+RERUN_SECONDS = Histogram("signhub_rerun_seconds", "Wall time of one script rerun", SECONDS)
+PAGE_SECONDS = Histogram("signhub_page_seconds", "Time spent in a page_* function per rerun", SECONDS, "page")
+IO_SECONDS = Histogram("signhub_io_seconds", "Duration of one load_json/save_json call", SECONDS, "op")
+RERUN_IO_CALLS = Histogram("signhub_rerun_io_calls", "load_json/save_json calls made by one rerun", CALLS, "op")
+MARKDOWN_BYTES = Histogram("signhub_rerun_markdown_bytes", "Bytes passed to st.markdown by one rerun", BYTES)
+STATE_BYTES = Histogram("signhub_session_state_bytes", "Pickled size of session_state after a sampled rerun", BYTES)
+RERUNS = Counter("signhub_reruns_total", "Script reruns by outcome", "outcome")
+IO_CALLS = Counter("signhub_io_calls_total", "load_json/save_json calls, including background threads", "op")
+SLOW_RERUNS = Counter("signhub_slow_reruns_total", "Reruns slower than the profiling threshold")
+
+METRICS = [RERUN_SECONDS, PAGE_SECONDS, IO_SECONDS, RERUN_IO_CALLS, MARKDOWN_BYTES, STATE_BYTES,
+           RERUNS, IO_CALLS, SLOW_RERUNS]
+TRACKED_IO = ("load_json", "save_json")
+
+_gauges = {}
+
+def register_gauges(name, fn):
+    """fn() -> {metric_name: value}, evaluated at every export; re-registering replaces"""
+    with _lock:
+        _gauges[name] = fn
+
+# ============================================================
+# PER-RERUN RECORDING
+# ============================================================
+_local = threading.local()
+
+class RerunRecord:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.pages = {}
+        self.io = {op: 0 for op in TRACKED_IO}
+        self.markdown_bytes = 0
+        self.profiler = None
+
+def current():
+    return getattr(_local, "record", None)
+
+def begin_rerun():
+    """Start timing the rerun running on this thread"""
+    record = RerunRecord()
+    if PROFILE_SLOW_MS > 0:
+        record.profiler = cProfile.Profile()
+        try:
+            record.profiler.enable()
+        except ValueError:
+            # Another profiler already owns this thread
+            record.profiler = None
+    _local.record = record
+    return record
+
+def end_rerun(session_state=None, outcome="ok"):
+    """Fold this thread's rerun into the histograms; dump a profile if it was slow"""
+    record = current()
+    if record is None:
+        return None
+    _local.record = None
+    if record.profiler:
+        record.profiler.disable()
+    wall = time.perf_counter() - record.start
+
+    RERUN_SECONDS.observe(wall)
+    RERUNS.inc(label_value=outcome)
+    MARKDOWN_BYTES.observe(record.markdown_bytes)
+    for op, calls in record.io.items():
+        RERUN_IO_CALLS.observe(calls, op)
+    if session_state is not None and sample_state(record):
+        STATE_BYTES.observe(state_size(session_state))
+
+    if record.profiler and wall * 1000 >= PROFILE_SLOW_MS:
+        SLOW_RERUNS.inc()
+        save_profile(record, wall)
+    maybe_export()
+    return wall
+
+_reruns = itertools.count(1)
+
+def sample_state(record):
+    """Whether to size session_state after this rerun: pickling it costs the session, so only a sample pays"""
+    if record.profiler:
+        return True
+    return STATE_SAMPLE_EVERY > 0 and next(_reruns) % STATE_SAMPLE_EVERY == 0
+
+def state_size(state):
+    total = 0
+    for key in list(state.keys()):
+        try:
+            total += len(pickle.dumps(state[key], pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            total += sys.getsizeof(state[key])
+    return total
+
+def timed_page(fn):
+    """Record time spent in a page_* function against the current rerun"""
+    page = fn.__name__.removeprefix("page_")
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            PAGE_SECONDS.observe(elapsed, page)
+            record = current()
+            if record is not None:
+                record.pages[page] = record.pages.get(page, 0) + elapsed
+    return wrapper
+
+def track(op):
+    """Count and time calls to an I/O helper, per rerun and process-wide"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                IO_SECONDS.observe(time.perf_counter() - start, op)
+                IO_CALLS.inc(label_value=op)
+                record = current()
+                if record is not None:
+                    record.io[op] = record.io.get(op, 0) + 1
+        return wrapper
+    return decorate
+
+def instrument_markdown(st):
+    """Wrap st.markdown to count emitted bytes; safe to call on every rerun"""
+    if getattr(st.markdown, "_counts_bytes", False):
+        return
+    markdown = st.markdown
+
+    @functools.wraps(markdown)
+    def wrapper(body, *args, **kwargs):
+        record = current()
+        if record is not None:
+            record.markdown_bytes += len(str(body).encode("utf-8"))
+        return markdown(body, *args, **kwargs)
+    wrapper._counts_bytes = True
+    st.markdown = wrapper
+
+# ============================================================
+# PROFILES
+# ============================================================
+_profile_seq = itertools.count(1)
+
+def save_profile(record, wall):
+    page = max(record.pages, key=record.pages.get) if record.pages else "script"
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.{next(_profile_seq)}-{page}-{int(wall * 1000)}ms.prof"
+    try:
+        record.profiler.dump_stats(str(path))
+    except OSError:
+        return None
+    # Keep only the newest PROFILE_KEEP captures
+    profiles = sorted(PROFILE_DIR.glob("rerun-*.prof"), key=lambda p: p.stat().st_mtime)
+    for old in profiles[:-PROFILE_KEEP]:
+        old.unlink(missing_ok=True)
+    return path
+
+# ============================================================
+# EXPORT
+# ============================================================
+_last_export = 0.0
+
+def render():
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    with _lock:
+        gauges = list(_gauges.values())
+    for fn in gauges:
+        try:
+            values = fn()
+        except Exception:
+            continue
+        for name, value in values.items():
+            lines.extend([f"# TYPE {name} gauge", f"{name} {value}"])
+    return "\n".join(lines) + "\n"
+
+def export(path=None):
+    """Atomically rewrite the metrics file (for node_exporter's textfile collector)"""
+    path = Path(path or METRICS_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(render())
+        os.replace(tmp, path)
+    except OSError:
+        Path(tmp).unlink(missing_ok=True)
+        return False
+    return True
+
+def maybe_export():
+    global _last_export
+    if not METRICS_FILE:
+        return
+    now = time.monotonic()
+    with _lock:
+        if now - _last_export < EXPORT_INTERVAL:
+            return
+        _last_export = now
+    export()
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics (any path, really) from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,154 @@
+"""
+SignHub - Password Hashing
+Versioned, salted scrypt/PBKDF2 hashes with transparent upgrade of legacy SHA-256
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+# ============================================================
+# PARAMETERS
+# ============================================================
+# Encoded forms:
+#   scrypt$<n>$<r>$<p>$<salt>$<hash>
+#   pbkdf2_sha256$<iterations>$<salt>$<hash>
+#   <64 hex chars>                          legacy unsalted SHA-256
+SCHEME = "scrypt"
+SCRYPT = {"n": 2 ** 14, "r": 8, "p": 1}
+PBKDF2_ITERATIONS = 600_000
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+# A cap on simultaneous key derivations, not a way off the caller's thread:
+# hash/verify_password_limited run the derivation on the calling thread. In
+# Streamlit that thread is the session's own script thread, so a login only
+# stalls its own rerun; hashlib's scrypt and pbkdf2_hmac release the GIL, so
+# other sessions keep rerunning meanwhile. The cap keeps a burst of logins
+# from using every core and 128 * n * r bytes of scrypt memory each at once.
+_slots = threading.BoundedSemaphore(max(2, (os.cpu_count() or 2) // 2))
+
+def configure(scheme=None, scrypt_n=None, scrypt_r=None, scrypt_p=None, pbkdf2_iterations=None, max_concurrent=None):
+    global SCHEME, PBKDF2_ITERATIONS, _slots
+    if scheme:
+        if scheme not in ("scrypt", "pbkdf2_sha256"):
+            raise ValueError(f"Unknown password scheme: {scheme}")
+        SCHEME = scheme
+    if scrypt_n: SCRYPT["n"] = scrypt_n
+    if scrypt_r: SCRYPT["r"] = scrypt_r
+    if scrypt_p: SCRYPT["p"] = scrypt_p
+    if pbkdf2_iterations: PBKDF2_ITERATIONS = pbkdf2_iterations
+    if max_concurrent:
+        _slots = threading.BoundedSemaphore(max_concurrent)
+
+# ============================================================
+# HASHING
+# ============================================================
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+def _unb64(text):
+    return base64.b64decode(text.encode("ascii"))
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + (1 << 20), dklen=HASH_BYTES)
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations, dklen=HASH_BYTES)
+
+def hash_password(password, scheme=None):
+    scheme = scheme or SCHEME
+    salt = os.urandom(SALT_BYTES)
+    if scheme == "scrypt":
+        n, r, p = SCRYPT["n"], SCRYPT["r"], SCRYPT["p"]
+        return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}"
+    if scheme == "pbkdf2_sha256":
+        return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(_pbkdf2(password, salt, PBKDF2_ITERATIONS))}"
+    raise ValueError(f"Unknown password scheme: {scheme}")
+
+def is_legacy(encoded):
+    return "$" not in encoded
+
+def verify_password(password, encoded):
+    if not encoded:
+        return False
+    if is_legacy(encoded):
+        # As bytes: compare_digest refuses str with non-ASCII characters
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest().encode(), encoded.encode())
+    parts = encoded.split("$")
+    try:
+        if parts[0] == "scrypt":
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            return hmac.compare_digest(_scrypt(password, _unb64(parts[4]), n, r, p), _unb64(parts[5]))
+        if parts[0] == "pbkdf2_sha256":
+            return hmac.compare_digest(_pbkdf2(password, _unb64(parts[2]), int(parts[1])), _unb64(parts[3]))
+    except (IndexError, ValueError):
+        pass
+    return False
+
+def needs_rehash(encoded):
+    """True for legacy hashes and hashes made with other scheme/cost settings"""
+    if is_legacy(encoded):
+        return True
+    parts = encoded.split("$")
+    if parts[0] != SCHEME:
+        return True
+    if SCHEME == "scrypt":
+        return parts[1:4] != [str(SCRYPT["n"]), str(SCRYPT["r"]), str(SCRYPT["p"])]
+    return parts[1] != str(PBKDF2_ITERATIONS)
+
+def hash_password_limited(password, scheme=None):
+    """hash_password on this thread, waiting first if too many derivations are running"""
+    with _slots:
+        return hash_password(password, scheme)
+
+def verify_password_limited(password, encoded):
+    """verify_password on this thread, waiting first if too many derivations are running"""
+    with _slots:
+        return verify_password(password, encoded)
+
+# ============================================================
+# COST CALIBRATION
+# ============================================================
+def _time_once(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def calibrate(target_ms=250, scheme="scrypt", r=8, p=1):
+    """Largest cost whose hash time stays at or under target_ms on this machine.
+
+    Returns (params, measured_ms); params can be passed straight to configure().
+    """
+    salt = os.urandom(SALT_BYTES)
+    if scheme == "scrypt":
+        n, best = 2 ** 10, None
+        while n <= 2 ** 22:
+            ms = _time_once(lambda: _scrypt("benchmark", salt, n, r, p))
+            if ms > target_ms:
+                break
+            best = ({"scrypt_n": n, "scrypt_r": r, "scrypt_p": p}, ms)
+            n *= 2
+        return best or ({"scrypt_n": 2 ** 10, "scrypt_r": r, "scrypt_p": p}, ms)
+    if scheme == "pbkdf2_sha256":
+        ms = _time_once(lambda: _pbkdf2("benchmark", salt, 100_000))
+        iterations = max(100_000, int(100_000 * target_ms / ms) // 10_000 * 10_000)
+        return {"pbkdf2_iterations": iterations}, _time_once(lambda: _pbkdf2("benchmark", salt, iterations))
+    raise ValueError(f"Unknown password scheme: {scheme}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick password hashing cost for a target login latency")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--scheme", default="scrypt", choices=["scrypt", "pbkdf2_sha256"])
+    args = parser.parse_args()
+    params, ms = calibrate(args.target_ms, args.scheme)
+    print(f"{args.scheme}: {params} -> {ms:.1f} ms per hash")
+    for key, value in params.items():
+        print(f"SIGNHUB_{key.upper()}={value}")
@@ -0,0 +1,353 @@
+"""
+SignHub - Progress Event Log
+Append-only record of progress changes, compacted into per-user snapshots
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from storage import file_lock, save_json, load_json
+
+# ============================================================
+# EVENTS
+# ============================================================
+def quiz_completed(quiz, score, total, percentage, date, answers=None, questions=None, letters=None):
+    event = {"type": "quiz_completed", "quiz": quiz, "score": score, "total": total, "percentage": percentage, "date": date}
+    if answers is not None:
+        # 1/0 per question, in order; kept in the log for analytics, not folded into progress
+        event["answers"] = answers
+    if questions is not None:
+        # Bank ids of the questions a drawn quiz asked, matching answers
+        event["questions"] = questions
+    if letters is not None:
+        # Letter each question practises (or None), matching answers; feeds the review scheduler
+        event["letters"] = letters
+    return event
+
+def points_awarded(points):
+    return {"type": "points_awarded", "points": points}
+
+def certificate_issued(cert):
+    return {"type": "certificate_issued", "cert": cert}
+
+def apply_event(prog, event):
+    """Fold one event into a progress record (in place)"""
+    kind = event["type"]
+    if kind == "quiz_completed":
+        prog['quizzes_taken'] = prog.get('quizzes_taken', 0) + 1
+        scores = prog.get('quiz_scores', {})
+        scores[event["quiz"]] = {"score": event["score"], "total": event["total"], "percentage": event["percentage"], "date": event["date"]}
+        prog['quiz_scores'] = scores
+    elif kind == "points_awarded":
+        prog['total_points'] = prog.get('total_points', 0) + event["points"]
+    elif kind == "certificate_issued":
+        prog['certificates'] = prog.get('certificates', []) + [event["cert"]]
+    if "seq" in event:
+        prog['_seq'] = event["seq"]
+
+def coalesce(events):
+    """Merge a user's queued points_awarded events into one"""
+    points = [e for e in events if e["type"] == "points_awarded"]
+    if len(points) < 2:
+        return events
+    rest = [e for e in events if e["type"] != "points_awarded"]
+    return rest + [points_awarded(sum(e["points"] for e in points))]
+
+def apply_events(prog, events):
+    # Snapshots remember the last folded seq, so replaying a compacted event is a no-op
+    last = prog.get('_seq', 0)
+    for event in events:
+        if event["seq"] > last:
+            apply_event(prog, event)
+    return prog
+
+# ============================================================
+# LOG
+# ============================================================
+def parse_event(line):
+    """The event on one log line, or None for a blank or unreadable one (e.g. torn by a crash)"""
+    if not line.strip():
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        print(f"⚠️ Skipping unreadable progress log line: {line[:80]!r}")
+        return None
+    return event if isinstance(event, dict) and "seq" in event and "user" in event else None
+
+class ProgressLog:
+    """JSON-lines event log over a progress store.
+
+    record() appends events under a file lock; nothing else is rewritten.
+    Events newer than the last compaction are kept in memory per user and
+    overlaid on the stored snapshot by overlay(). compact() folds them into
+    the store and advances a checkpoint; the log itself is never truncated
+    and doubles as an audit trail.
+
+    With write_behind, record() only queues events in memory; flush()
+    appends everything queued, coalesced per user, in one write. Queued
+    events are part of overlay(), so the writer reads its own changes.
+
+    subscribe() feeds derived views (the leaderboard) every stamped event,
+    whether this process appended it or another one did.
+    """
+
+    def __init__(self, path, store, fsync=True, write_behind=False, max_buffered=500):
+        self.path = Path(path)
+        self.checkpoint_file = self.path.with_suffix(".checkpoint")
+        self.store = store
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        checkpoint = load_json(self.checkpoint_file, {})
+        self._offset = checkpoint.get("offset", 0)
+        self._last_seq = checkpoint.get("seq", 0)
+        self._compacted_seq = self._last_seq
+        self._listeners = []
+        self._tail = {}
+        self._tail_count = 0
+        self.write_behind = write_behind
+        self.max_buffered = max_buffered
+        self._buffer = {}
+        self._buffered = 0
+        self.path.touch(exist_ok=True)
+        with self._lock, file_lock(self.path):
+            self._catch_up()
+            self._cut_torn_tail()
+
+    def _catch_up(self):
+        """Read events appended since our offset (by any process) into the tail"""
+        if self.path.stat().st_size <= self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        # Only consume whole lines; a writer may be mid-append
+        end = chunk.rfind(b"\n") + 1
+        new = []
+        for line in chunk[:end].splitlines():
+            event = parse_event(line)
+            if event is not None:
+                self._tail.setdefault(event["user"], []).append(event)
+                self._tail_count += 1
+                self._last_seq = max(self._last_seq, event["seq"])
+                new.append(event)
+        self._offset += end
+        self._notify(new)
+
+    def _cut_torn_tail(self):
+        """Drop bytes after the last whole line; caller holds the file lock and has caught up.
+
+        Appends happen under the file lock, so once we hold it an unterminated
+        tail can only be a write cut short by a crash. Left in place, the next
+        append would glue its first event onto it.
+        """
+        if self.path.stat().st_size > self._offset:
+            with open(self.path, "r+b") as f:
+                f.truncate(self._offset)
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+    def _notify(self, events):
+        # Called with self._lock held, so listeners see events in seq order
+        if events:
+            for fn in self._listeners:
+                fn(events)
+
+    def _append(self, batch):
+        """Stamp and append {username: events}; caller holds self._lock"""
+        ts = datetime.now().isoformat()
+        with file_lock(self.path):
+            self._catch_up()
+            self._cut_torn_tail()
+            stamped = []
+            for username, events in batch.items():
+                for event in events:
+                    self._last_seq += 1
+                    stamped.append({**event, "seq": self._last_seq, "ts": ts, "user": username})
+            data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in stamped).encode("utf-8")
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            for event in stamped:
+                self._tail.setdefault(event["user"], []).append(event)
+            self._tail_count += len(stamped)
+            self._offset += len(data)
+            self._notify(stamped)
+        return stamped
+
+    def record(self, username, events):
+        """Append events for username (or queue them in write-behind mode)"""
+        with self._lock:
+            if not self.write_behind:
+                return self._append({username: events})
+            self._buffer.setdefault(username, []).extend(events)
+            self._buffered += len(events)
+            full = self._buffered >= self.max_buffered
+        if full:
+            self.flush()
+        return events
+
+    def flush(self):
+        """Append all queued write-behind events in one batch; returns events written"""
+        with self._lock:
+            if not self._buffer:
+                return 0
+            batch = {user: coalesce(events) for user, events in self._buffer.items()}
+            self._buffer, self._buffered = {}, 0
+            return len(self._append(batch))
+
+    def pending(self):
+        with self._lock:
+            self._catch_up()
+            return self._tail_count
+
+    def replay(self, fn, after_seq=0):
+        """Call fn(events after after_seq) once, holding the lock so no new event interleaves"""
+        with self._lock:
+            self._replay(fn, after_seq)
+
+    def _replay(self, fn, after_seq):
+        self._catch_up()
+        if after_seq >= self._compacted_seq:
+            events = sorted((e for tail in self._tail.values() for e in tail if e["seq"] > after_seq),
+                            key=lambda e: e["seq"])
+        else:
+            # Older than the last compaction: only the full log still has them
+            events = [e for e in self.events() if e["seq"] > after_seq]
+        fn(events)
+
+    def subscribe(self, fn, after_seq=0):
+        """replay(), then call fn(events) for every new batch, in seq order"""
+        with self._lock:
+            self._replay(fn, after_seq)
+            self._listeners.append(fn)
+
+    def last_seq(self):
+        with self._lock:
+            self._catch_up()
+            return self._last_seq
+
+    def snapshot_tail(self):
+        """(last seq, {username: events}) for rebuilding a derived view from store + tail"""
+        with self._lock:
+            self._catch_up()
+            return self._last_seq, {user: list(events) for user, events in self._tail.items()}
+
+    def tail_events(self, username, after_seq=0):
+        """username's events newer than after_seq that no snapshot has yet, oldest first"""
+        with self._lock:
+            self._catch_up()
+            return ([e for e in self._tail.get(username, ()) if e["seq"] > after_seq]
+                    + list(self._buffer.get(username, ())))
+
+    def overlay(self, username, prog):
+        """prog (a stored snapshot) with not-yet-compacted events applied"""
+        with self._lock:
+            self._catch_up()
+            events = list(self._tail.get(username, ()))
+            queued = list(self._buffer.get(username, ()))
+        if events:
+            apply_events(prog, events)
+        for event in queued:
+            apply_event(prog, event)
+        return prog
+
+    def compact(self):
+        """Fold the tail into the store in one batched write; returns events folded"""
+        with self._compact_lock:
+            with self._lock:
+                self._catch_up()
+                tail = {user: list(events) for user, events in self._tail.items()}
+                offset, seq = self._offset, self._last_seq
+            if not tail:
+                return 0
+            self.store.modify_progress_many({
+                user: (lambda prog, events=events: apply_events(prog, events))
+                for user, events in tail.items()
+            })
+            save_json(self.checkpoint_file, {"offset": offset, "seq": seq}, self.fsync)
+            self._compacted_seq = seq
+            # Until this prune, readers may see an event in both places; apply_events skips the repeat
+            with self._lock:
+                for user in tail:
+                    kept = [e for e in self._tail.get(user, ()) if e["seq"] > seq]
+                    if kept:
+                        self._tail[user] = kept
+                    else:
+                        self._tail.pop(user, None)
+                self._tail_count = sum(len(events) for events in self._tail.values())
+            return sum(len(events) for events in tail.values())
+
+    def events(self, username=None):
+        """Iterate the full audit trail, optionally for one user"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                event = parse_event(line)
+                if event is not None and (username is None or event["user"] == username):
+                    yield event
+
+class Compactor(threading.Thread):
+    """Background thread that compacts a ProgressLog periodically or when the tail grows"""
+
+    def __init__(self, log, interval=60, max_pending=1000):
+        super().__init__(name="progress-compactor", daemon=True)
+        self.log = log
+        self.interval = interval
+        self.max_pending = max_pending
+        # Run after every compaction, e.g. to checkpoint derived views
+        self.on_compact = []
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+
+    def nudge(self):
+        if self.log.pending() >= self.max_pending:
+            self.wake.set()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            try:
+                self.log.compact()
+                self._after_compact()
+            except Exception as e:
+                print(f"⚠️ Progress compaction failed: {e}")
+
+    def _after_compact(self):
+        for fn in self.on_compact:
+            fn()
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+        self.join()
+        self.log.flush()
+        self.log.compact()
+        self._after_compact()
+
+class Flusher(threading.Thread):
+    """Background thread that flushes a write-behind ProgressLog on an interval"""
+
+    def __init__(self, log, interval=2):
+        super().__init__(name="progress-flusher", daemon=True)
+        self.log = log
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.log.flush()
+            except Exception as e:
+                print(f"⚠️ Progress flush failed: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.log.flush()
@@ -0,0 +1,99 @@
+"""
+SignHub - Question Banks
+Columnar question store with per-topic indexes and seeded O(k) sampling
+"""
+
+import hashlib
+import json
+import random
+
+import numpy as np
+
+def question_key(topic, question):
+    """Stable id of a bank question: its pack-given id, else a hash of its content"""
+    if question.get("id"):
+        return str(question["id"])
+    payload = json.dumps([topic, question["q"], question["options"]], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+class QuestionBank:
+    """Every question of every topic in flat columns, indexed by topic, difficulty and target letter.
+
+    A question is addressed by (topic, position within the topic), so an
+    edit to one topic never shifts the ids of another. Filtered pools are
+    built once per (topic, difficulties, letters) and sampling draws k
+    positions from a pool without touching the rest of it.
+    """
+
+    def __init__(self, topics):
+        """topics: {name: [question dicts]}, questions in the pack schema"""
+        self.offsets, self.sizes, self.digests = {}, {}, {}
+        self.keys, self.text, self.options, self.emojis = [], [], [], []
+        difficulty, letter, correct = [], [], []
+        for topic, questions in topics.items():
+            self.offsets[topic] = len(self.keys)
+            self.sizes[topic] = len(questions)
+            self.digests[topic] = hashlib.sha256(json.dumps(questions, sort_keys=True, ensure_ascii=False)
+                                                 .encode("utf-8")).hexdigest()[:16]
+            for q in questions:
+                self.keys.append(question_key(topic, q))
+                self.text.append(q["q"])
+                self.options.append(tuple(q["options"]))
+                self.emojis.append(tuple(q.get("emojis", ())))
+                difficulty.append(q.get("difficulty", 1))
+                letter.append(ord(q["letter"]) if q.get("letter") else 0)
+                correct.append(q["correct"])
+        self.difficulty = np.array(difficulty, dtype=np.uint8)
+        self.letter = np.array(letter, dtype=np.uint8)
+        self.correct = np.array(correct, dtype=np.uint8)
+        self.by_key = {key: i for i, key in enumerate(self.keys)}
+        self._pools = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _rows(self, topic):
+        start = self.offsets[topic]
+        return slice(start, start + self.sizes[topic])
+
+    def pool(self, topic, difficulties=None, letters=None):
+        """Sorted positions within topic matching the filters (cached)"""
+        cache_key = (topic, tuple(difficulties or ()), tuple(letters or ()))
+        pool = self._pools.get(cache_key)
+        if pool is None:
+            rows = self._rows(topic)
+            mask = np.ones(self.sizes[topic], dtype=bool)
+            if difficulties:
+                mask &= np.isin(self.difficulty[rows], list(difficulties))
+            if letters:
+                mask &= np.isin(self.letter[rows], [ord(l) for l in letters])
+            pool = self._pools[cache_key] = np.flatnonzero(mask).astype(np.int32)
+        return pool
+
+    def sample(self, topic, k, seed, difficulties=None, letters=None):
+        """k distinct positions from the filtered pool; the same seed gives the same draw"""
+        pool = self.pool(topic, difficulties, letters)
+        # random.sample over a range picks indexes without materialising the population
+        picks = random.Random(seed).sample(range(len(pool)), min(k, len(pool)))
+        return pool[picks].tolist()
+
+    def present(self, topic, position, seed=None):
+        """The question at position as page_quizzes shows it; options shuffled when seed is given"""
+        row = self.offsets[topic] + position
+        options, emojis = self.options[row], self.emojis[row] or ("",) * len(self.options[row])
+        order = list(range(len(options)))
+        if seed is not None:
+            random.Random(f"{seed}:{topic}:{position}").shuffle(order)
+        return {"q": self.text[row], "options": [options[i] for i in order], "emojis": [emojis[i] for i in order],
+                "correct": order.index(int(self.correct[row])), "key": self.keys[row]}
+
+    def key(self, topic, position):
+        return self.keys[self.offsets[topic] + position]
+
+    def letter_of(self, topic, position):
+        code = int(self.letter[self.offsets[topic] + position])
+        return chr(code) if code else None
+
+    def text_for(self, key):
+        row = self.by_key.get(key)
+        return None if row is None else self.text[row]
@@ -0,0 +1,410 @@
+"""
+SignHub - Handshape Recognition
+CPU-only letter recognition from hand landmarks: bounded frame queue, NumPy features, batched nearest-template scoring
+"""
+
+import argparse
+import functools
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from pathlib import Path
+
+import numpy as np
+
+from template_index import TemplateIndex
+
+try:
+    import mediapipe as mp
+except ImportError:  # webcam frames need mediapipe; recorded landmarks don't
+    mp = None
+
+LETTERS = [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+N_LANDMARKS = 21                      # MediaPipe hand layout: wrist, then 4 joints per finger from the thumb
+WRIST, MIDDLE_MCP = 0, 9
+TIPS = [4, 8, 12, 16, 20]
+TIP_PAIRS = np.array([(a, b) for i, a in enumerate(TIPS) for b in TIPS[i + 1:]])
+
+# ============================================================
+# REFERENCE HANDSHAPES
+# ============================================================
+# A schematic right hand, palm to the camera, y up, curling toward the camera (+z).
+# Each letter: finger curls (index..pinky; 0 straight, 1 fist, or per-joint triples),
+# extra sideways spread per finger (radians), where the thumb tip sits, and the
+# hand's rotation in degrees (90 points the fingers sideways, 180 down).
+FINGER_BASES = np.array([[-0.18, 0.90, 0], [-0.06, 0.93, 0], [0.06, 0.90, 0], [0.17, 0.84, 0]])
+FINGER_BONES = np.array([[0.40, 0.25, 0.20], [0.45, 0.28, 0.20], [0.42, 0.26, 0.20], [0.32, 0.20, 0.18]])
+FINGER_FAN = np.array([-0.08, -0.02, 0.04, 0.10])
+JOINT_RANGE = np.radians([90, 100, 70])
+THUMB_CMC = np.array([-0.22, 0.25, 0.0])
+THUMB_TIPS = {
+    "side": (-0.22, 0.78, 0.12), "across": (0.10, 0.55, 0.22), "front": (0.02, 0.62, 0.48),
+    "tuck": (0.00, 0.45, 0.36), "out": (-0.72, 0.55, 0.0), "up": (-0.06, 1.05, 0.26),
+    "parallel": (-0.30, 0.88, 0.06), "c": (-0.30, 0.50, 0.38), "under3": (0.13, 0.52, 0.30),
+    "under2": (0.00, 0.56, 0.30), "between": (-0.12, 0.68, 0.36),
+}
+HANDSHAPES = {
+    "A": ([1, 1, 1, 1], [0, 0, 0, 0], "side", 0),
+    "B": ([0, 0, 0, 0], [0.06, 0.02, -0.02, -0.06], "across", 0),
+    "C": ([0.45, 0.45, 0.45, 0.45], [0, 0, 0, 0], "c", 0),
+    "D": ([0, 0.85, 0.85, 0.85], [0, 0, 0, 0], "touch:1", 0),
+    "E": ([(0.3, 1, 1)] * 4, [0, 0, 0, 0], "tuck", 0),
+    "F": ([0.6, 0, 0, 0], [0, -0.05, 0.05, 0.15], "touch:0", 0),
+    "G": ([0, 1, 1, 1], [0, 0, 0, 0], "parallel", 90),
+    "H": ([0, 0, 1, 1], [0.06, -0.02, 0, 0], "across", 90),
+    "I": ([1, 1, 1, 0], [0, 0, 0, 0], "across", 0),
+    "J": ([1, 1, 1, 0], [0, 0, 0, 0], "across", -35),
+    "K": ([0, 0.15, 1, 1], [-0.10, 0.25, 0, 0], "up", 0),
+    "L": ([0, 1, 1, 1], [0, 0, 0, 0], "out", 0),
+    "M": ([0.85, 0.85, 0.85, 1], [0, 0, 0, 0], "under3", 0),
+    "N": ([0.85, 0.85, 1, 1], [0, 0, 0, 0], "under2", 0),
+    "O": ([0.55, 0.55, 0.55, 0.55], [0.04, 0, 0, -0.04], "touch:0", 0),
+    "P": ([0, 0.15, 1, 1], [-0.10, 0.25, 0, 0], "up", 160),
+    "Q": ([0, 1, 1, 1], [0, 0, 0, 0], "parallel", 160),
+    "R": ([0, 0, 1, 1], [0.14, -0.12, 0, 0], "across", 0),
+    "S": ([1, 1, 1, 1], [0, 0, 0, 0], "front", 0),
+    "T": ([1, 1, 1, 1], [0, 0, 0, 0], "between", 0),
+    "U": ([0, 0, 1, 1], [0.06, -0.02, 0, 0], "across", 0),
+    "V": ([0, 0, 1, 1], [-0.22, 0.20, 0, 0], "across", 0),
+    "W": ([0, 0, 0, 1], [-0.22, 0, 0.20, 0], "across", 0),
+    "X": ([(0.1, 0.9, 0.8), 1, 1, 1], [0, 0, 0, 0], "across", 0),
+    "Y": ([1, 1, 1, 0], [0, 0, 0, 0.2], "out", 0),
+    "Z": ([0, 1, 1, 1], [0, 0, 0, 0], "across", -20),
+}
+
+def _rotation(z_deg, y_deg=0.0):
+    z, y = np.radians(z_deg), np.radians(y_deg)
+    rz = np.array([[np.cos(z), -np.sin(z), 0], [np.sin(z), np.cos(z), 0], [0, 0, 1]])
+    ry = np.array([[np.cos(y), 0, np.sin(y)], [0, 1, 0], [-np.sin(y), 0, np.cos(y)]])
+    return ry @ rz
+
+def hand_pose(curls, spreads, thumb, rotation=0.0, turn=0.0):
+    """(21, 3) landmarks in MediaPipe image coordinates (x right, y down, z toward the camera negative)"""
+    points = np.zeros((N_LANDMARKS, 3))
+    for f in range(4):
+        curl = np.broadcast_to(np.asarray(curls[f], dtype=float), (3,)) * JOINT_RANGE
+        fan = FINGER_FAN[f] + spreads[f]
+        direction = np.array([np.sin(fan), np.cos(fan), 0.0])
+        position, bend = FINGER_BASES[f].copy(), 0.0
+        points[5 + 4 * f] = position
+        for joint in range(3):
+            bend += curl[joint]
+            position = position + FINGER_BONES[f][joint] * (np.cos(bend) * direction + np.sin(bend) * np.array([0, 0, 1.0]))
+            points[6 + 4 * f + joint] = position
+    if thumb.startswith("touch:"):
+        tip = points[8 + 4 * int(thumb.split(":")[1])] + np.array([-0.03, -0.03, 0.04])
+    else:
+        tip = np.array(THUMB_TIPS[thumb])
+    # The thumb bows out toward -x between its base and tip
+    bow = np.array([-0.08, 0.0, 0.05])
+    points[1] = THUMB_CMC
+    points[2] = THUMB_CMC + 0.38 * (tip - THUMB_CMC) + bow
+    points[3] = THUMB_CMC + 0.72 * (tip - THUMB_CMC) + 0.6 * bow
+    points[4] = tip
+    points = points @ _rotation(rotation, turn).T
+    return np.stack([0.5 + 0.3 * points[:, 0], 0.5 - 0.3 * points[:, 1], -0.3 * points[:, 2]], axis=1)
+
+def synthetic_samples(letter, n, rng, noise=0.01):
+    """n jittered poses of letter: finger curls, spread, thumb, rotation, turn, scale and sensor noise"""
+    curls, spreads, thumb, rotation = HANDSHAPES[letter]
+    out = np.empty((n, N_LANDMARKS, 3))
+    for i in range(n):
+        jittered = [np.clip(np.asarray(c, dtype=float) + rng.normal(0, 0.07), 0, 1.1) for c in curls]
+        pose = hand_pose(jittered, np.asarray(spreads) + rng.normal(0, 0.04, 4), thumb,
+                         rotation + rng.normal(0, 8), rng.normal(0, 12))
+        center = pose.mean(axis=0)
+        pose = center + (pose - center) * rng.uniform(0.7, 1.3) + rng.normal(0, 0.05, 3)
+        out[i] = pose + rng.normal(0, noise, pose.shape)
+    return out
+
+# ============================================================
+# FEATURES
+# ============================================================
+def features(landmarks):
+    """(N, 21, 3) landmarks -> (N, 78) translation- and scale-free features, all frames at once.
+
+    Coordinates relative to the wrist, scaled by the wrist-to-middle-knuckle
+    length, plus the ten fingertip-to-fingertip distances and five
+    fingertip-to-wrist distances.
+    """
+    points = np.asarray(landmarks, dtype=np.float32).reshape(-1, N_LANDMARKS, 3)
+    rel = points - points[:, WRIST:WRIST + 1]
+    scale = np.linalg.norm(rel[:, MIDDLE_MCP], axis=1)
+    rel /= np.maximum(scale, 1e-6)[:, None, None]
+    pairs = np.linalg.norm(rel[:, TIP_PAIRS[:, 0]] - rel[:, TIP_PAIRS[:, 1]], axis=2)
+    reach = np.linalg.norm(rel[:, TIPS], axis=2)
+    return np.concatenate([rel.reshape(len(rel), -1), pairs, reach], axis=1)
+
+# ============================================================
+# CLASSIFIER
+# ============================================================
+class Recognizer:
+    """k-nearest-template classifier over standardized feature vectors.
+
+    The templates live in a TemplateIndex: one matrix multiply gives every
+    frame's cosine similarity to every template, and a letter scores the
+    best similarity among the frame's k nearest. The standardization
+    (feature mean and spread) is stored with the index so that samples
+    added later are embedded the same way.
+    """
+
+    def __init__(self, index, k=32):
+        self.index = index
+        self.k = k
+        self._mean = np.asarray(index.meta["mean"], dtype=np.float32)
+        self._std = np.asarray(index.meta["std"], dtype=np.float32)
+
+    def embed(self, landmarks):
+        return (features(landmarks) - self._mean) / self._std
+
+    def add(self, landmarks, labels):
+        """Add reference samples to the library; returns its size"""
+        return self.index.add(self.embed(landmarks), labels)
+
+    def scores(self, landmarks):
+        """(N, letters) best cosine similarity of each frame to each letter's nearby templates"""
+        return self.index.label_scores(self.embed(landmarks), self.k)
+
+    def predict(self, landmarks, top=3):
+        """[(letter, score)] best first, up to top, for each frame"""
+        scores = self.scores(landmarks)
+        letters = self.index.label_names
+        best = np.argsort(-scores, axis=1)[:, :top]
+        return [[(letters[j], float(row[j])) for j in picks if row[j] > -1] for row, picks in zip(scores, best)]
+
+def reference_index(path=None, per_letter=24, seed=7):
+    """The template library at path (None: in memory), seeded with synthetic poses of every letter if new"""
+    if path and (Path(path) / "index.json").exists():
+        return TemplateIndex(path)
+    rng = np.random.default_rng(seed)
+    templates = np.concatenate([synthetic_samples(letter, per_letter, rng) for letter in LETTERS])
+    feats = features(templates)
+    meta = {"mean": feats.mean(axis=0).tolist(), "std": (feats.std(axis=0) + 1e-3).tolist(), "source": "synthetic"}
+    index = TemplateIndex(path, feats.shape[1], meta)
+    if not len(index):
+        Recognizer(index).add(templates, np.repeat(LETTERS, per_letter))
+    return index
+
+@functools.lru_cache(maxsize=None)
+def default_recognizer(path=None):
+    """A recognizer over the template library at path, created with synthetic references if missing"""
+    return Recognizer(reference_index(path))
+
+# ============================================================
+# LANDMARK EXTRACTION (webcam frames)
+# ============================================================
+class HandLandmarker:
+    """RGB frame -> (21, 3) landmarks with MediaPipe Hands, left hands mirrored; None without a hand"""
+
+    def __init__(self):
+        if mp is None:
+            raise RuntimeError("Webcam recognition needs the mediapipe package (pip install mediapipe)")
+        # The light model: a laptop core runs it well above 30 fps
+        self._hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=1, model_complexity=0,
+                                               min_detection_confidence=0.5)
+
+    def __call__(self, frame):
+        result = self._hands.process(np.ascontiguousarray(frame))
+        if not result.multi_hand_landmarks:
+            return None
+        points = np.array([(p.x, p.y, p.z) for p in result.multi_hand_landmarks[0].landmark], dtype=np.float32)
+        if result.multi_handedness and result.multi_handedness[0].classification[0].label == "Left":
+            points[:, 0] = 1.0 - points[:, 0]
+        return points
+
+# ============================================================
+# PIPELINE
+# ============================================================
+class FrameQueue:
+    """Bounded FIFO that drops the oldest frame when a new one arrives and it is full"""
+
+    def __init__(self, maxsize=4):
+        self._items = deque()
+        self.maxsize = maxsize
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """Queue item; returns the item it pushed out, if any"""
+        with self._cond:
+            evicted = None
+            if len(self._items) >= self.maxsize:
+                evicted = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+            return evicted
+
+    def get_batch(self, max_items, timeout=None):
+        """Up to max_items queued items, waiting for at least one; [] once closed or on timeout"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            batch = []
+            while self._items and len(batch) < max_items:
+                batch.append(self._items.popleft())
+            return batch
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+class RecognitionPipeline:
+    """One worker thread turning queued frames into letter guesses, a batch at a time.
+
+    submit() never blocks: under backpressure the oldest waiting frame is
+    dropped (its future is cancelled), so callers always get an answer
+    for recent frames rather than a growing backlog. Everything waiting
+    when the worker wakes is classified with one batched scores() call.
+    """
+
+    def __init__(self, recognizer, landmarker=None, maxsize=8, batch=8):
+        self.recognizer = recognizer
+        self.landmarker = landmarker
+        self.batch = batch
+        self.queue = FrameQueue(maxsize)
+        self.processed = 0
+        self._times = deque(maxlen=120)
+        self._thread = threading.Thread(target=self._run, name="recognition", daemon=True)
+        self._thread.start()
+
+    def _put(self, kind, data):
+        future = Future()
+        evicted = self.queue.put((kind, data, future))
+        if evicted is not None:
+            evicted[2].cancel()
+        return future
+
+    def submit(self, frame):
+        """Future of [(letter, score)] for an RGB frame, None if no hand is found"""
+        return self._put("frame", frame)
+
+    def submit_landmarks(self, landmarks):
+        """Future of [(letter, score)] for already extracted (21, 3) landmarks"""
+        return self._put("landmarks", landmarks)
+
+    def _run(self):
+        while True:
+            batch = self.queue.get_batch(self.batch)
+            if not batch:
+                return
+            live = [(kind, data, future) for kind, data, future in batch if future.set_running_or_notify_cancel()]
+            try:
+                points = [data if kind == "landmarks" else self.landmarker(data) for kind, data, _ in live]
+                found = [i for i, p in enumerate(points) if p is not None]
+                guesses = self.recognizer.predict(np.stack([points[i] for i in found])) if found else []
+                results = dict(zip(found, guesses))
+                for i, (_, _, future) in enumerate(live):
+                    future.set_result(results.get(i))
+            except Exception as e:
+                for _, _, future in live:
+                    if not future.done():
+                        future.set_exception(e)
+            now = time.perf_counter()
+            self._times.extend([now] * len(live))
+            self.processed += len(live)
+
+    def fps(self):
+        """Frames classified per second over the last 120"""
+        times = list(self._times)
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def close(self):
+        self.queue.close()
+        self._thread.join()
+
+# ============================================================
+# RECORDINGS (test mode)
+# ============================================================
+def load_recording(path):
+    """(landmarks (T, 21, 3), labels or None, fps) from a .npz or JSON-lines recording"""
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            labels = [str(l) for l in data["labels"]] if "labels" in data else None
+            return data["landmarks"].astype(np.float32), labels, float(data["fps"]) if "fps" in data else 30.0
+    frames, labels = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                frames.append(row["landmarks"])
+                labels.append(row.get("label"))
+    return np.array(frames, dtype=np.float32), labels if any(labels) else None, 30.0
+
+def save_recording(path, landmarks, labels=None, fps=30.0):
+    payload = {"landmarks": np.asarray(landmarks, dtype=np.float32), "fps": fps}
+    if labels is not None:
+        payload["labels"] = np.array(labels)
+    np.savez_compressed(path, **payload)
+
+def replay(pipeline, landmarks, fps=None):
+    """Push recorded frames through pipeline; returns each frame's result (None if dropped or no hand).
+
+    With fps, frames arrive on the recording's clock and the queue drops
+    whatever the worker can't keep up with, as live video would. Without
+    it, frames go in one batch at a time, as fast as they are classified.
+    """
+    futures, start = [], time.perf_counter()
+    for i, points in enumerate(landmarks):
+        if fps:
+            delay = start + i / fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        elif futures and i % pipeline.queue.maxsize == 0:
+            # Wait for the queue to drain so nothing is dropped
+            futures[-1].exception()
+        futures.append(pipeline.submit_landmarks(points))
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except CancelledError:
+            results.append(None)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded hand landmarks through the recognizer")
+    parser.add_argument("recording", nargs="?", help=".npz or .jsonl landmark recording to replay")
+    parser.add_argument("--record-synthetic", metavar="PATH", help="write a labelled synthetic recording to PATH")
+    parser.add_argument("--frames", type=int, default=30, help="frames per letter for --record-synthetic")
+    parser.add_argument("--realtime", action="store_true", help="pace frames at the recording's fps")
+    parser.add_argument("--index", help="template library directory (default: synthetic templates in memory)")
+    parser.add_argument("--add", action="store_true", help="add the labelled recording to --index instead of replaying it")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.record_synthetic:
+        rng = np.random.default_rng(args.seed)
+        frames = np.concatenate([synthetic_samples(letter, args.frames, rng, noise=0.015) for letter in LETTERS])
+        save_recording(args.record_synthetic, frames, np.repeat(LETTERS, args.frames))
+        print(f"Wrote {len(frames)} frames to {args.record_synthetic}")
+    if args.recording and args.add:
+        landmarks, labels, _ = load_recording(args.recording)
+        if not args.index or not labels:
+            parser.error("--add needs --index and a recording with labels")
+        print(f"Template library now holds {default_recognizer(args.index).add(landmarks, labels)} samples")
+    elif args.recording:
+        landmarks, labels, fps = load_recording(args.recording)
+        start = time.perf_counter()
+        pipeline = RecognitionPipeline(default_recognizer(args.index))
+        print(f"Recognizer ready in {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        results = replay(pipeline, landmarks, fps if args.realtime else None)
+        elapsed = time.perf_counter() - start
+        pipeline.close()
+        done = [(r, l) for r, l in zip(results, labels or [None] * len(results)) if r]
+        print(f"{len(landmarks)} frames in {elapsed:.2f}s ({len(landmarks) / elapsed:.0f} fps end to end), "
+              f"{pipeline.queue.dropped} dropped")
+        if labels:
+            correct = sum(r[0][0] == l for r, l in done)
+            print(f"Top-1 accuracy {correct / max(len(done), 1):.1%} over {len(done)} classified frames")
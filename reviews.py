@@ -0,0 +1,329 @@
+"""
+SignHub - Review Scheduler
+SM-2 spaced repetition of alphabet letters, fed by quiz answers
+"""
+
+import argparse
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from attempts import wall_clock
+
+DAY = 86400
+START_EASE = 2.5
+MIN_EASE = 1.3
+PASS, FAIL = 4, 1           # SM-2 grades for a right / wrong quiz answer
+
+# Card fields, kept as a list per item
+EASE, INTERVAL, REPS, LAPSES, DUE, SEQ = range(6)
+
+def new_card():
+    return [START_EASE, 0.0, 0, 0, 0, 0]
+
+def sm2(card, quality, ts):
+    """(ease, interval days, reps, lapses, due ts) after grading card with quality 0-5 at ts"""
+    ease, interval, reps, lapses = card[EASE], card[INTERVAL], card[REPS], card[LAPSES]
+    if quality < 3:
+        reps, interval, lapses = 0, 1.0, lapses + 1
+    else:
+        reps += 1
+        interval = 1.0 if reps == 1 else 6.0 if reps == 2 else interval * ease
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return ease, interval, reps, lapses, ts + int(interval * DAY)
+
+def now_ts():
+    # Same clock as wall_clock(): naive local time read as UTC
+    return wall_clock(datetime.now().isoformat())
+
+def quiz_reviews(event):
+    """[(item, grade)] from a quiz_completed event: one review per tagged letter, failed if any answer missed it"""
+    grades = {}
+    for letter, correct in zip(event.get("letters") or (), event.get("answers") or ()):
+        if letter:
+            grades[letter] = min(grades.get(letter, PASS), PASS if correct else FAIL)
+    return list(grades.items())
+
+# ============================================================
+# DECK
+# ============================================================
+class Deck:
+    """One learner's cards plus a min-heap of (due, item).
+
+    A review pushes the card's new due time and leaves the old entry in
+    place; entries whose time no longer matches their card, or whose card
+    was removed, are dropped when they reach the top. Peeking at the next
+    review is O(log n) amortized.
+    """
+
+    def __init__(self, cards=None):
+        self.cards = cards or {}
+        self._heap = [(card[DUE], item) for item, card in self.cards.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def review(self, item, quality, ts, seq):
+        """Grade item; a review at or below the card's seq was already applied and is skipped"""
+        card = self.cards.get(item) or new_card()
+        if seq <= card[SEQ]:
+            return False
+        self.cards[item] = [*sm2(card, quality, ts), seq]
+        heapq.heappush(self._heap, (self.cards[item][DUE], item))
+        if len(self._heap) > 2 * len(self.cards) + 16:
+            self._heap = [(card[DUE], item) for item, card in self.cards.items()]
+            heapq.heapify(self._heap)
+        return True
+
+    def remove(self, item):
+        """Drop item's card; its heap entries go stale"""
+        return self.cards.pop(item, None) is not None
+
+    def peek(self):
+        """(due, item) of the earliest card"""
+        heap = self._heap
+        while heap and (heap[0][1] not in self.cards or self.cards[heap[0][1]][DUE] != heap[0][0]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def next_due(self, now):
+        """The item most overdue at now, or None if nothing is due"""
+        top = self.peek()
+        return top[1] if top and top[0] <= now else None
+
+    def due(self, now, limit=10):
+        """Up to limit due items, most overdue first, in O(limit log n)"""
+        taken, items = [], []
+        while len(items) < limit:
+            top = self.peek()
+            if top is None or top[0] > now:
+                break
+            taken.append(heapq.heappop(self._heap))
+            if top[1] not in items:
+                items.append(top[1])
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return items
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    username TEXT NOT NULL,
+    item TEXT NOT NULL,
+    ease REAL NOT NULL,
+    interval REAL NOT NULL,
+    reps INTEGER NOT NULL,
+    lapses INTEGER NOT NULL,
+    due INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (username, item)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# ============================================================
+# SCHEDULER
+# ============================================================
+class ReviewScheduler:
+    """Per-user SM-2 cards in SQLite, with an LRU of in-memory decks.
+
+    Follows the progress log like AttemptHistory: letters tagged on quiz
+    answers are buffered as reviews and written in one transaction by
+    flush(). Cached decks are graded as events arrive, so the learning page
+    sees a quiz's reviews immediately. recompute() rewrites every card in
+    bulk chunks and bumps a generation that makes all processes drop their
+    cached decks.
+    """
+
+    def __init__(self, path, fsync=True, max_decks=10000):
+        self.path = str(path)
+        self.fsync = fsync
+        self.max_decks = max_decks
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        self.seq = self._meta(conn, "seq")
+        self._generation = self._meta(conn, "generation")
+        self._pending = {}
+        self._decks = OrderedDict()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL" if self.fsync else "PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def apply(self, events):
+        """Buffer the letter reviews among stamped log events"""
+        with self._lock:
+            for event in events:
+                if event["seq"] <= self.seq:
+                    continue
+                self.seq = event["seq"]
+                if event["type"] != "quiz_completed":
+                    continue
+                reviews = quiz_reviews(event)
+                if not reviews:
+                    continue
+                ts = wall_clock(event["ts"])
+                user = event["user"]
+                self._pending.setdefault(user, []).extend((event["seq"], item, grade, ts) for item, grade in reviews)
+                deck = self._decks.get(user)
+                if deck is not None:
+                    for item, grade in reviews:
+                        deck.review(item, grade, ts, event["seq"])
+
+    def attach(self, log):
+        """Replay what the store missed, then follow the log"""
+        log.subscribe(self.apply, self.seq)
+
+    def _load(self, conn, username):
+        rows = conn.execute("SELECT item, ease, interval, reps, lapses, due, seq FROM cards WHERE username = ?",
+                            (username,))
+        return Deck({item: list(card) for item, *card in rows})
+
+    def flush(self):
+        """Write buffered reviews to their cards in one transaction; returns cards written"""
+        with self._lock:
+            pending = {user: list(reviews) for user, reviews in self._pending.items()}
+            seq = self.seq
+        written = 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for user, reviews in pending.items():
+                deck = self._load(conn, user)
+                changed = {item for s, item, grade, ts in reviews if deck.review(item, grade, ts, s)}
+                conn.executemany("INSERT OR REPLACE INTO cards (username, item, ease, interval, reps, lapses, due, seq) "
+                                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [(user, item, *deck.cards[item]) for item in changed])
+                written += len(changed)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('seq', ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value = max(value, excluded.value)", (seq,))
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            for user, reviews in pending.items():
+                kept = [r for r in self._pending.get(user, ()) if r[0] > reviews[-1][0]]
+                if kept:
+                    self._pending[user] = kept
+                else:
+                    self._pending.pop(user, None)
+        return written
+
+    def deck(self, username):
+        """username's deck, from the LRU or loaded with any buffered reviews folded in"""
+        conn = self._conn()
+        generation = self._meta(conn, "generation")
+        with self._lock:
+            if generation != self._generation:
+                # A bulk recompute rewrote the cards under every cached deck
+                self._decks.clear()
+                self._generation = generation
+            deck = self._decks.get(username)
+            if deck is None:
+                # Loaded under the lock: flush() commits before pruning, so the row plus
+                # the buffer always hold every review, and apply() can't slip in between
+                deck = self._load(conn, username)
+                for s, item, grade, ts in self._pending.get(username, ()):
+                    deck.review(item, grade, ts, s)
+                self._decks[username] = deck
+                while len(self._decks) > self.max_decks:
+                    self._decks.popitem(last=False)
+            self._decks.move_to_end(username)
+            return deck
+
+    def due(self, username, now=None, limit=10):
+        """[(item, due ts)] up to limit of username's reviews due at now, most overdue first"""
+        now = now_ts() if now is None else now
+        deck = self.deck(username)
+        with self._lock:
+            return [(item, deck.cards[item][DUE]) for item in deck.due(now, limit)]
+
+    def next_review(self, username):
+        """(item, due ts) of username's next review, due or not; None without cards"""
+        deck = self.deck(username)
+        with self._lock:
+            top = deck.peek()
+            return (top[1], top[0]) if top else None
+
+    def recompute(self, now=None, chunk=100_000):
+        """Nightly pass over every card, chunk rows per transaction; returns (cards, rescheduled).
+
+        A card left overdue for longer than its own interval is treated as
+        forgotten: its repetitions restart and it is due at once, keeping
+        its ease. The decision is made with array operations per chunk and
+        only changed rows are written back.
+        """
+        now = now_ts() if now is None else now
+        conn = self._conn()
+        scanned = rescheduled = 0
+        last = ("", "")
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute("SELECT username, item, interval, reps, due FROM cards WHERE (username, item) > (?, ?) "
+                                    "ORDER BY username, item LIMIT ?", (*last, chunk)).fetchall()
+                if not rows:
+                    conn.execute("COMMIT")
+                    break
+                users, items, interval, reps, due = zip(*rows)
+                interval = np.array(interval, dtype=np.float64)
+                forgotten = (np.array(reps) > 0) & (now - np.array(due, dtype=np.int64) > interval * DAY)
+                changed = np.flatnonzero(forgotten)
+                conn.executemany("UPDATE cards SET reps = 0, interval = 1.0, due = ? WHERE username = ? AND item = ?",
+                                 [(now, users[i], items[i]) for i in changed])
+                conn.execute("COMMIT")
+            except:
+                conn.execute("ROLLBACK")
+                raise
+            scanned += len(rows)
+            rescheduled += len(changed)
+            last = rows[-1][:2]
+        conn.execute("INSERT INTO meta (key, value) VALUES ('generation', 1) "
+                     "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+        return scanned, rescheduled
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+# ============================================================
+# NIGHTLY RECOMPUTE
+# ============================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the nightly review recompute or show a learner's queue")
+    parser.add_argument("--data-dir", default=os.environ.get("SIGNHUB_DATA_DIR", "data"))
+    parser.add_argument("--recompute", action="store_true", help="reschedule forgotten cards of every learner")
+    parser.add_argument("--chunk", type=int, default=100_000, help="cards per transaction")
+    parser.add_argument("--user", help="print this learner's due reviews")
+    args = parser.parse_args()
+
+    scheduler = ReviewScheduler(os.path.join(args.data_dir, "reviews.db"))
+    if args.recompute:
+        start = time.perf_counter()
+        scanned, rescheduled = scheduler.recompute(chunk=args.chunk)
+        print(f"Recomputed {scanned} cards ({rescheduled} rescheduled) in {time.perf_counter() - start:.1f}s")
+    if args.user:
+        for item, due in scheduler.due(args.user, limit=26):
+            print(f"{item}  due {time.strftime('%Y-%m-%d %H:%M', time.gmtime(due))}")
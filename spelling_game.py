@@ -0,0 +1,357 @@
+"""
+SignHub - Fingerspelling Challenge
+Words served from a compiled, memory-mapped word graph, checked letter by letter as the learner spells them
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"SHWORDS1"
+# Arrays in file order; every one starts on an 8-byte boundary
+ARRAYS = (("edge_start", np.uint32), ("final", np.uint8), ("edge_label", np.uint8),
+          ("edge_target", np.uint32), ("word_start", np.uint32), ("word_bytes", np.uint8))
+WORD = re.compile(r"[A-Z]{2,}")
+
+# ============================================================
+# DIFFICULTY BUCKETS
+# ============================================================
+# A word's bucket is its length band and its rarity band (tertiles of the mean
+# letter surprisal over the dictionary); a difficulty takes the buckets whose
+# bands add up to one of its levels
+LENGTH_BANDS = (4, 6, 8)                # up to 4 letters, 5-6, 7-8, 9 and up
+RARITY_BANDS = 3
+DIFFICULTIES = {"Easy": (0, 1), "Medium": (2, 3), "Hard": (4, 5)}
+
+def length_band(word):
+    for band, longest in enumerate(LENGTH_BANDS):
+        if len(word) <= longest:
+            return band
+    return len(LENGTH_BANDS)
+
+def bucket_of(length, rarity):
+    return length * RARITY_BANDS + rarity
+
+def difficulty_buckets(difficulty):
+    levels = DIFFICULTIES[difficulty]
+    return [bucket_of(length, rarity) for length in range(len(LENGTH_BANDS) + 1)
+            for rarity in range(RARITY_BANDS) if length + rarity in levels]
+
+# ============================================================
+# COMPILING
+# ============================================================
+def normalize_words(words):
+    """Sorted unique upper-case A-Z words of two letters or more; anything else is skipped"""
+    out = set()
+    for word in words:
+        word = word.strip().upper()
+        if WORD.fullmatch(word):
+            out.add(word)
+    return sorted(out)
+
+def parse_word_list(data):
+    """Words of a one-word-per-line list (bytes); # lines are comments"""
+    return normalize_words(line for line in data.decode("utf-8").splitlines() if not line.startswith("#"))
+
+def source_stamp(path):
+    """(identity of a word list file, its bytes): compiled files record the identity they were built from"""
+    path = Path(path)
+    stat = path.stat()
+    data = path.read_bytes()
+    return {"path": str(path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "sha256": hashlib.sha256(data).hexdigest()}, data
+
+def build_graph(words):
+    """Minimal acyclic automaton for sorted words: (finals, edges) with edges[node] = [(letter, child)] by letter.
+
+    Built incrementally (Daciuk et al.): once a word is added, the branch it
+    left behind can never change again, so its nodes are merged with any
+    equivalent node already seen. Shared suffixes ("-ING", "-TION") end up
+    stored once, which keeps 100k words to a few hundred thousand edges.
+    """
+    children, finals = [{}], [False]
+    register = {}
+    unchecked = []                      # (parent, letter, child) along the last word, not yet merged
+
+    def minimize(depth):
+        while len(unchecked) > depth:
+            parent, letter, child = unchecked.pop()
+            key = (finals[child], tuple(sorted(children[child].items())))
+            if key in register:
+                children[parent][letter] = register[key]
+            else:
+                register[key] = child
+
+    previous = ""
+    for word in words:
+        common = 0
+        while common < min(len(word), len(previous)) and word[common] == previous[common]:
+            common += 1
+        minimize(common)
+        node = unchecked[-1][2] if unchecked else 0
+        for letter in word[common:]:
+            children.append({})
+            finals.append(False)
+            child = len(children) - 1
+            children[node][letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        finals[node] = True
+        previous = word
+    minimize(0)
+
+    # Renumber the nodes still reachable from the root, breadth first
+    ids, order = {0: 0}, [0]
+    for node in order:
+        for letter in sorted(children[node]):
+            child = children[node][letter]
+            if child not in ids:
+                ids[child] = len(order)
+                order.append(child)
+    return ([finals[node] for node in order],
+            [[(letter, ids[children[node][letter]]) for letter in sorted(children[node])] for node in order])
+
+def compile_dictionary(words, path, fsync=True, source=None):
+    """Write words (any iterable) as a word-graph file at path; returns the number of words.
+
+    source (a source_stamp()) is stored in the header so open_dictionary()
+    can tell whether the file still matches its word list.
+    """
+    words = normalize_words(words)
+    if not words:
+        raise ValueError("no usable words (A-Z, two letters or more)")
+    finals, edges = build_graph(words)
+
+    counts = {}
+    for word in words:
+        for letter in word:
+            counts[letter] = counts.get(letter, 0) + 1
+    total = sum(counts.values())
+    surprisal = {letter: -math.log2(n / total) for letter, n in counts.items()}
+    rarity = [sum(surprisal[c] for c in word) / len(word) for word in words]
+    ranked = sorted(rarity)
+    cuts = [ranked[len(ranked) * i // RARITY_BANDS] for i in range(1, RARITY_BANDS)]
+    buckets = [bucket_of(length_band(word), sum(r >= cut for cut in cuts)) for word, r in zip(words, rarity)]
+    # Words sorted by bucket, so each bucket is one contiguous range
+    order = sorted(range(len(words)), key=lambda i: (buckets[i], words[i]))
+    ranges = [[0, 0] for _ in range(bucket_of(len(LENGTH_BANDS), RARITY_BANDS - 1) + 1)]
+    for position, i in enumerate(order):
+        if not ranges[buckets[i]][1]:
+            ranges[buckets[i]][0] = position
+        ranges[buckets[i]][1] = position + 1
+
+    edge_start = np.zeros(len(edges) + 1, dtype=np.uint32)
+    edge_start[1:] = np.cumsum([len(e) for e in edges])
+    encoded = [words[i].encode("ascii") for i in order]
+    word_start = np.zeros(len(words) + 1, dtype=np.uint32)
+    word_start[1:] = np.cumsum([len(w) for w in encoded])
+    arrays = {
+        "edge_start": edge_start,
+        "final": np.array(finals, dtype=np.uint8),
+        "edge_label": np.frombuffer(b"".join(letter.encode("ascii") for e in edges for letter, _ in e), dtype=np.uint8),
+        "edge_target": np.array([child for e in edges for _, child in e], dtype=np.uint32),
+        "word_start": word_start,
+        "word_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+    }
+
+    header = {"words": len(words), "nodes": len(finals), "edges": int(edge_start[-1]),
+              "buckets": ranges, "rarity_cuts": cuts, "source": source, "arrays": {}}
+    # Offsets count from the first 8-byte boundary after the header
+    offset = 0
+    for name, _ in ARRAYS:
+        header["arrays"][name] = [offset, len(arrays[name])]
+        offset += -(-arrays[name].nbytes // 8) * 8
+    blob = json.dumps(header).encode("utf-8")
+    blob += b" " * (-(len(MAGIC) + 4 + len(blob)) % 8)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A private temp file, so processes compiling at the same time don't write into each other's
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(blob)) + blob)
+            for name, dtype in ARRAYS:
+                data = arrays[name].astype(dtype, copy=False).tobytes()
+                f.write(data + b"\0" * (-len(data) % 8))
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        tmp = None
+    finally:
+        if tmp and os.path.exists(tmp):
+            os.unlink(tmp)
+    return len(words)
+
+# ============================================================
+# WORD DICTIONARY
+# ============================================================
+class WordDictionary:
+    """A compiled word list, memory-mapped read-only.
+
+    Opening reads only the small JSON header; the graph and the word bytes
+    stay on disk and are paged in as words are walked or drawn, so a 100k
+    word list costs about nothing per process and nothing per session:
+    a game only keeps its seed and what has been typed.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a compiled word list")
+            (size,) = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(size))
+        base = len(MAGIC) + 4 + size
+        for name, dtype in ARRAYS:
+            offset, length = self.header["arrays"][name]
+            data = (np.memmap(self.path, dtype=dtype, mode="r", offset=base + offset, shape=(length,))
+                    if length else np.zeros(0, dtype=dtype))
+            setattr(self, "_" + name, data)
+
+    def __len__(self):
+        return self.header["words"]
+
+    def __contains__(self, word):
+        node = self.walk(word)
+        return node >= 0 and bool(self._final[node])
+
+    def word(self, i):
+        return self._word_bytes[self._word_start[i]:self._word_start[i + 1]].tobytes().decode("ascii")
+
+    def edges(self, node):
+        """[(letter, child)] leaving node, by letter"""
+        lo, hi = int(self._edge_start[node]), int(self._edge_start[node + 1])
+        return list(zip(self._edge_label[lo:hi].tobytes().decode("ascii"), self._edge_target[lo:hi].tolist()))
+
+    def child(self, node, letter):
+        """The node after letter, -1 if no word continues that way"""
+        lo, hi = int(self._edge_start[node]), int(self._edge_start[node + 1])
+        i = self._edge_label[lo:hi].tobytes().find(letter.encode("ascii"))
+        return -1 if i < 0 else int(self._edge_target[lo + i])
+
+    def walk(self, prefix, node=0):
+        """The node reached by spelling prefix, -1 if no word starts with it"""
+        for letter in prefix:
+            node = self.child(node, letter)
+            if node < 0:
+                break
+        return node
+
+    def is_word(self, node):
+        return node >= 0 and bool(self._final[node])
+
+    def bucket_sizes(self, difficulty):
+        return {bucket: hi - lo for bucket in difficulty_buckets(difficulty)
+                for lo, hi in [self.header["buckets"][bucket]]}
+
+    def draw(self, difficulty, seed, n):
+        """n distinct words of a difficulty, the same ones for the same seed; O(n), whatever the dictionary size"""
+        ranges = [self.header["buckets"][b] for b in difficulty_buckets(difficulty)]
+        ranges = [(lo, hi) for lo, hi in ranges if hi > lo]
+        total = sum(hi - lo for lo, hi in ranges)
+        picks = random.Random(seed).sample(range(total), min(n, total))
+        words = []
+        for pick in picks:
+            for lo, hi in ranges:
+                if pick < hi - lo:
+                    words.append(self.word(lo + pick))
+                    break
+                pick -= hi - lo
+        return words
+
+def open_dictionary(source, compiled=None):
+    """The dictionary at source: a compiled file, or a word list compiled to compiled.
+
+    A word list is recompiled unless compiled was built from that very
+    file: same path, size, mtime and content hash. Pointing at another
+    list, even an older one, never serves the previous dictionary.
+    """
+    source = Path(source)
+    with open(source, "rb") as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            return WordDictionary(source)
+    compiled = Path(compiled) if compiled else source.with_suffix(".words")
+    stamp, data = source_stamp(source)
+    try:
+        dictionary = WordDictionary(compiled)
+    except (OSError, ValueError):
+        dictionary = None
+    if dictionary is None or dictionary.header.get("source") != stamp:
+        compile_dictionary(parse_word_list(data), compiled, source=stamp)
+        dictionary = WordDictionary(compiled)
+    return dictionary
+
+# ============================================================
+# GAME ENGINE
+# ============================================================
+class FingerspellingChallenge:
+    """One game's rules over a dictionary and the current alphabet.
+
+    The learner sees a word as handshape tiles and spells it one letter at
+    a time. Several letters share a handshape emoji, so a letter is
+    accepted if it shows the same handshape as the tile and the spelling
+    so far can still be finished as a dictionary word that fits the
+    remaining tiles: any real word the tiles could be read as counts.
+    """
+
+    def __init__(self, dictionary, alphabet):
+        self.dictionary = dictionary
+        self.alphabet = alphabet
+        groups = {}
+        for letter, emoji in alphabet.items():
+            groups.setdefault(emoji, set()).add(letter)
+        self.readings = {letter: frozenset(groups[emoji]) for letter, emoji in alphabet.items()}
+
+    def round(self, difficulty, seed, n=10):
+        return self.dictionary.draw(difficulty, seed, n)
+
+    def tiles(self, word):
+        return [self.alphabet.get(letter, letter) for letter in word]
+
+    def _fits(self, node, rest):
+        if not rest:
+            return self.dictionary.is_word(node)
+        allowed = self.readings.get(rest[0], (rest[0],))
+        return any(self._fits(child, rest[1:]) for letter, child in self.dictionary.edges(node) if letter in allowed)
+
+    def accepts(self, target, typed, letter):
+        """Whether letter may follow typed when spelling target's tiles"""
+        i = len(typed)
+        if i >= len(target) or letter not in self.readings.get(target[i], (target[i],)):
+            return False
+        node = self.dictionary.walk(typed + letter)
+        return node >= 0 and self._fits(node, target[i + 1:])
+
+    def solved(self, target, typed):
+        return len(typed) == len(target) and typed in self.dictionary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a word list for the Fingerspelling Challenge or draw from one")
+    parser.add_argument("source", help="word list (one word per line) or compiled file")
+    parser.add_argument("--out", help="compiled file to write (default: next to the word list)")
+    parser.add_argument("--draw", choices=list(DIFFICULTIES), help="print a seeded round of this difficulty")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--words", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dictionary = open_dictionary(args.source, args.out)
+    header = dictionary.header
+    print(f"{header['words']} words, {header['nodes']} nodes, {header['edges']} edges, "
+          f"{dictionary.path.stat().st_size / 1024:.0f} KiB ({dictionary.path}) in {time.perf_counter() - start:.2f}s")
+    for difficulty in DIFFICULTIES:
+        print(f"  {difficulty:<7} {sum(dictionary.bucket_sizes(difficulty).values())} words")
+    if args.draw:
+        print(" ".join(dictionary.draw(args.draw, args.seed, args.words)))
@@ -0,0 +1,766 @@
+"""
+SignHub - Storage Layer
+Pluggable user/progress store: SQLite (default) or the legacy JSON files
+"""
+
+import copy
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from metrics import track
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ============================================================
+# LEGACY JSON HELPERS
+# ============================================================
+@track("load_json")
+def load_json(p, default=None):
+    """Read a JSON file; a missing file gives default, a corrupt one raises"""
+    if default is None: default = {}
+    try:
+        with open(p, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+@track("save_json")
+def save_json(p, data, fsync=True):
+    """Atomically replace p: write a temp file beside it, then rename over.
+
+    False on an OS error; anything else (data that isn't JSON-serializable)
+    raises. Either way no temp file is left behind.
+    """
+    p = Path(p)
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=f".{p.name}.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, p)
+        tmp = None
+        if fsync and hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(p.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        return True
+    except OSError:
+        return False
+    finally:
+        if tmp and os.path.exists(tmp):
+            os.unlink(tmp)
+
+@contextmanager
+def file_lock(p):
+    """Exclusive cross-process lock on a sidecar <p>.lock file"""
+    with open(f"{p}.lock", "a+") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+# ============================================================
+# EMAIL / USERNAME INDEX HELPERS
+# ============================================================
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+def username_counters(usernames):
+    """Seed prefix -> next free suffix from existing usernames"""
+    counters = {}
+    for u in usernames:
+        counters[u] = max(counters.get(u, 0), 1)
+        m = re.fullmatch(r"(.*?)(\d+)", u)
+        if m and m.group(1):
+            counters[m.group(1)] = max(counters.get(m.group(1), 0), int(m.group(2)) + 1)
+    return counters
+
+def candidate_username(prefix, n):
+    return prefix if n == 0 else f"{prefix}{n}"
+
+class DuplicateEmailError(ValueError):
+    """Records would give one normalized email to more than one user"""
+
+def check_unique_emails(users, existing=()):
+    """Raise DuplicateEmailError if two of users, or one of users and an existing
+    (username, email) it doesn't replace, share a normalized email"""
+    owners = {}
+    for uname, email in existing:
+        if uname not in users:
+            owners.setdefault(normalize_email(email), []).append(uname)
+    for uname, data in users.items():
+        owners.setdefault(normalize_email(data.get("email")), []).append(uname)
+    clashes = sorted((email, sorted(names)) for email, names in owners.items() if len(names) > 1)
+    if clashes:
+        raise DuplicateEmailError("emails shared by more than one user: "
+                                  + "; ".join(f"{email} ({', '.join(names)})" for email, names in clashes))
+
+# ============================================================
+# STORAGE INTERFACE
+# ============================================================
+class Storage:
+    """Keyed user and progress records"""
+
+    def count_users(self):
+        raise NotImplementedError
+
+    def user_exists(self, username):
+        raise NotImplementedError
+
+    def find_username(self, email):
+        """Username for an email via the normalized email index"""
+        raise NotImplementedError
+
+    def allocate_username(self, prefix):
+        """Next free username for prefix: prefix itself if free, else prefix1, prefix2, ... from a counter"""
+        raise NotImplementedError
+
+    def rebuild_index(self):
+        """Recompute the email index and username counters from users"""
+        raise NotImplementedError
+
+    def get_user(self, username):
+        raise NotImplementedError
+
+    def add_user(self, username, user, progress):
+        """Insert a new user with its initial progress; False if the username or the email is taken"""
+        raise NotImplementedError
+
+    def update_user(self, username, updates):
+        raise NotImplementedError
+
+    def get_progress(self, username):
+        raise NotImplementedError
+
+    def get_progress_summary(self, username):
+        """Progress without its certificate list, counted in certificate_count instead"""
+        prog = self.get_progress(username)
+        if prog:
+            prog['certificate_count'] = len(prog.pop('certificates', []))
+        return prog
+
+    def get_certificates(self, username, offset=0, limit=None):
+        """(newest-first slice of stored certificates, stored total, seq of the snapshot read)"""
+        prog = self.get_progress(username)
+        certs = prog.get('certificates', [])[::-1]
+        end = None if limit is None else offset + limit
+        return certs[offset:end], len(certs), prog.get('_seq', 0)
+
+    def update_progress(self, username, updates):
+        raise NotImplementedError
+
+    def modify_progress(self, username, fn):
+        """Apply fn(record) to one user's progress atomically against the latest stored copy"""
+        raise NotImplementedError
+
+    def iter_progress(self):
+        """Yield (username, progress) for every user, for bulk rebuilds"""
+        raise NotImplementedError
+
+    def modify_progress_many(self, changes):
+        """Apply {username: fn} as one batched write"""
+        for username, fn in changes.items():
+            self.modify_progress(username, fn)
+
+    def import_records(self, users, progress):
+        """Bulk-load records in the legacy users.json/progress.json shape.
+
+        Raises DuplicateEmailError, importing nothing, if the records would
+        leave two users with the same normalized email.
+        """
+        raise NotImplementedError
+
+    def import_legacy(self, users_file, progress_file):
+        users = load_json(users_file, {})
+        if not users:
+            return 0
+        self.import_records(users, load_json(progress_file, {}))
+        return len(users)
+
+    def close(self):
+        pass
+
+# ============================================================
+# SQLITE BACKEND (DEFAULT)
+# ============================================================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    email TEXT NOT NULL,            -- normalize_email(); data keeps the address as entered
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users(email);
+CREATE TABLE IF NOT EXISTS progress (
+    username TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS username_counters (
+    prefix TEXT PRIMARY KEY,
+    next INTEGER NOT NULL
+);
+"""
+
+class SQLiteStorage(Storage):
+    """One row per user in WAL mode; writes touch a single row.
+
+    users.email holds the normalized email under a unique index, so it is
+    the email index: two spellings of one address can't both be stored.
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path, fsync=True):
+        self.path = str(path)
+        self.fsync = fsync
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+        if self._conn().execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+            self._migrate()
+
+    def _migrate(self):
+        # Version 0 kept emails as entered in users and normalized ones in a separate email_index table
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT username, email FROM users").fetchall()
+            check_unique_emails({u: {"email": e} for u, e in rows})
+            conn.executemany("UPDATE users SET email = ? WHERE username = ?",
+                             ((normalize_email(e), u) for u, e in rows if normalize_email(e) != e))
+            conn.execute("DROP TABLE IF EXISTS email_index")
+            conn.execute("DELETE FROM username_counters")
+            conn.executemany("INSERT INTO username_counters (prefix, next) VALUES (?, ?)",
+                             username_counters(u for u, _ in rows).items())
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _conn(self):
+        # Streamlit runs each session's script on its own thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL only risks the last commits on power loss, never corruption
+            conn.execute("PRAGMA synchronous=FULL" if self.fsync else "PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, table, username):
+        row = self._conn().execute(f"SELECT data FROM {table} WHERE username = ?", (username,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _modify(self, table, changes):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for username, fn in changes.items():
+                row = conn.execute(f"SELECT data FROM {table} WHERE username = ?", (username,)).fetchone()
+                if not row:
+                    continue
+                data = json.loads(row[0])
+                fn(data)
+                conn.execute(f"UPDATE {table} SET data = ? WHERE username = ?", (json.dumps(data, ensure_ascii=False), username))
+                if table == "users":
+                    conn.execute("UPDATE users SET email = ? WHERE username = ?", (normalize_email(data.get("email")), username))
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+
+    def count_users(self):
+        return self._conn().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def user_exists(self, username):
+        return self._conn().execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone() is not None
+
+    def find_username(self, email):
+        row = self._conn().execute("SELECT username FROM users WHERE email = ?", (normalize_email(email),)).fetchone()
+        return row[0] if row else None
+
+    def allocate_username(self, prefix):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            taken = lambda n: conn.execute("SELECT 1 FROM users WHERE username = ?", (candidate_username(prefix, n),)).fetchone()
+            # The bare prefix is offered again whenever it is free (a deleted or never-imported user)
+            n = 0
+            if taken(0):
+                row = conn.execute("SELECT next FROM username_counters WHERE prefix = ?", (prefix,)).fetchone()
+                n = row[0] if row else 1
+                # The counter is a hint; skip anything a colliding prefix already took
+                while taken(n):
+                    n += 1
+                conn.execute("INSERT OR REPLACE INTO username_counters (prefix, next) VALUES (?, ?)", (prefix, n + 1))
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+        return candidate_username(prefix, n)
+
+    def rebuild_index(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # users.email is the email index; only the counters are derived
+            usernames = [u for u, in conn.execute("SELECT username FROM users")]
+            conn.execute("DELETE FROM username_counters")
+            conn.executemany("INSERT INTO username_counters (prefix, next) VALUES (?, ?)",
+                             username_counters(usernames).items())
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_user(self, username):
+        return self._get("users", username)
+
+    def add_user(self, username, user, progress):
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Checked apart from the email constraint so callers can tell which one was taken
+            if conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone():
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute("INSERT INTO users (username, email, data) VALUES (?, ?, ?)",
+                         (username, normalize_email(user.get("email")), json.dumps(user, ensure_ascii=False)))
+            conn.execute("INSERT OR REPLACE INTO progress (username, data) VALUES (?, ?)",
+                         (username, json.dumps(progress, ensure_ascii=False)))
+            conn.execute("COMMIT")
+            return True
+        except sqlite3.IntegrityError:
+            conn.execute("ROLLBACK")
+            return False
+
+    def update_user(self, username, updates):
+        self._modify("users", {username: lambda data: data.update(updates)})
+
+    def get_progress(self, username):
+        return self._get("progress", username)
+
+    def get_progress_summary(self, username):
+        # Certificates are the part of a record that keeps growing; leave them in SQLite
+        row = self._conn().execute(
+            "SELECT json_remove(data, '$.certificates'), json_array_length(data, '$.certificates') "
+            "FROM progress WHERE username = ?", (username,)).fetchone()
+        if not row:
+            return {}
+        prog = json.loads(row[0])
+        prog['certificate_count'] = row[1] or 0
+        return prog
+
+    def get_certificates(self, username, offset=0, limit=None):
+        conn = self._conn()
+        # One read transaction, so the count, seq and page come from the same snapshot
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(
+                "SELECT json_extract(data, '$._seq'), json_array_length(data, '$.certificates') "
+                "FROM progress WHERE username = ?", (username,)).fetchone()
+            page = conn.execute(
+                "SELECT c.value FROM progress, json_each(progress.data, '$.certificates') AS c "
+                "WHERE progress.username = ? ORDER BY c.key DESC LIMIT ? OFFSET ?",
+                (username, -1 if limit is None else limit, offset)).fetchall()
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+        if not row:
+            return [], 0, 0
+        return [json.loads(value) for value, in page], row[1] or 0, row[0] or 0
+
+    def update_progress(self, username, updates):
+        self._modify("progress", {username: lambda data: data.update(updates)})
+
+    def modify_progress(self, username, fn):
+        self._modify("progress", {username: fn})
+
+    def iter_progress(self):
+        # A separate cursor so other calls on this thread's connection don't disturb it
+        for username, data in self._conn().cursor().execute("SELECT username, data FROM progress"):
+            yield username, json.loads(data)
+
+    def modify_progress_many(self, changes):
+        self._modify("progress", changes)
+
+    def import_records(self, users, progress):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Checked up front: INSERT OR REPLACE would silently delete a user whose email clashes
+            check_unique_emails(users, conn.execute("SELECT username, email FROM users").fetchall())
+            conn.executemany("INSERT OR REPLACE INTO users (username, email, data) VALUES (?, ?, ?)",
+                             ((u, normalize_email(d.get("email")), json.dumps(d, ensure_ascii=False)) for u, d in users.items()))
+            conn.executemany("INSERT OR REPLACE INTO progress (username, data) VALUES (?, ?)",
+                             ((u, json.dumps(d, ensure_ascii=False)) for u, d in progress.items()))
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+        self.rebuild_index()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+# ============================================================
+# LEGACY JSON BACKEND
+# ============================================================
+class JsonStorage(Storage):
+    """Whole-file users.json/progress.json, kept for compatibility"""
+
+    def __init__(self, users_file, progress_file, index_file, fsync=True):
+        self.users_file = Path(users_file)
+        self.progress_file = Path(progress_file)
+        self.index_file = Path(index_file)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_mtime = None
+        # Per-file queues of (username, fn, done) waiting to be merged into one write
+        self._pending = {self.users_file: [], self.progress_file: []}
+        self._pending_lock = threading.Lock()
+        self._write_locks = {self.users_file: threading.Lock(), self.progress_file: threading.Lock()}
+        index = self._load_index()
+        if "emails" not in index or "counters" not in index:
+            self.rebuild_index()
+
+    def _load_index(self):
+        # Another process may have registered users since we last looked
+        try:
+            mtime = self.index_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._index is None or mtime != self._index_mtime:
+            self._index = load_json(self.index_file, {})
+            self._index_mtime = mtime
+        return self._index
+
+    def _save(self, path, data):
+        if not save_json(path, data, self.fsync):
+            raise OSError(f"could not write {path}")
+
+    def _save_index(self):
+        self._save(self.index_file, self._index)
+        self._index_mtime = self.index_file.stat().st_mtime_ns
+
+    def _apply(self, path, changes):
+        """Queue (username, fn) changes, then merge every queued change for path in one locked write.
+
+        Sessions updating different users hand their changes to whichever
+        thread holds the write lock, so a burst costs one rewrite, not one
+        per user, and each fn sees the latest on-disk record. A change that
+        raises is left out of the write, and a failed write fails the whole
+        batch; either way the exception is re-raised in the thread that
+        queued the change, not only in the one that did the writing.
+        """
+        waiter = {"done": threading.Event(), "error": None}
+        with self._pending_lock:
+            self._pending[path].extend((username, fn, waiter) for username, fn in changes)
+        with self._write_locks[path]:
+            if not waiter["done"].is_set():
+                with self._pending_lock:
+                    batch, self._pending[path] = self._pending[path], []
+                try:
+                    with file_lock(path):
+                        data = load_json(path, {})
+                        for uname, f, w in batch:
+                            if uname in data:
+                                # On a copy, so a change that fails half-way leaves the record as it was
+                                record = copy.deepcopy(data[uname])
+                                try:
+                                    f(record)
+                                except Exception as e:
+                                    w["error"] = w["error"] or e
+                                    continue
+                                data[uname] = record
+                        self._save(path, data)
+                except Exception as e:
+                    for _, _, w in batch:
+                        w["error"] = w["error"] or e
+                finally:
+                    for _, _, w in batch:
+                        w["done"].set()
+        if waiter["error"] is not None:
+            raise waiter["error"]
+
+    def count_users(self):
+        return len(load_json(self.users_file, {}))
+
+    def user_exists(self, username):
+        return username in load_json(self.users_file, {})
+
+    def find_username(self, email):
+        with self._lock:
+            return self._load_index()["emails"].get(normalize_email(email))
+
+    def allocate_username(self, prefix):
+        with self._lock, file_lock(self.index_file):
+            index = self._load_index()
+            users = load_json(self.users_file, {})
+            # The bare prefix is offered again whenever it is free (a deleted or never-imported user)
+            n = 0
+            if prefix in users:
+                n = index["counters"].get(prefix, 1)
+                while candidate_username(prefix, n) in users:
+                    n += 1
+                index["counters"][prefix] = n + 1
+                self._save_index()
+        return candidate_username(prefix, n)
+
+    def rebuild_index(self):
+        with self._lock, file_lock(self.index_file):
+            users = load_json(self.users_file, {})
+            emails = {}
+            for uname, data in users.items():
+                emails.setdefault(normalize_email(data.get("email")), uname)
+            self._index = {"emails": emails, "counters": username_counters(users)}
+            self._save_index()
+
+    def get_user(self, username):
+        return load_json(self.users_file, {}).get(username, {})
+
+    def add_user(self, username, user, progress):
+        email = normalize_email(user.get("email"))
+        with self._lock, file_lock(self.index_file), file_lock(self.users_file), file_lock(self.progress_file):
+            index = self._load_index()
+            users = load_json(self.users_file, {})
+            if username in users or email in index["emails"]:
+                return False
+            users[username] = user
+            prog = load_json(self.progress_file, {})
+            prog[username] = progress
+            self._save(self.users_file, users)
+            self._save(self.progress_file, prog)
+            index["emails"][email] = username
+            self._save_index()
+        return True
+
+    def update_user(self, username, updates):
+        old_email = normalize_email(self.get_user(username).get("email"))
+        self._apply(self.users_file, [(username, lambda data: data.update(updates))])
+        if "email" in updates:
+            with self._lock, file_lock(self.index_file):
+                index = self._load_index()
+                index["emails"].pop(old_email, None)
+                index["emails"][normalize_email(updates["email"])] = username
+                self._save_index()
+
+    def get_progress(self, username):
+        return load_json(self.progress_file, {}).get(username, {})
+
+    def update_progress(self, username, updates):
+        self._apply(self.progress_file, [(username, lambda data: data.update(updates))])
+
+    def modify_progress(self, username, fn):
+        self._apply(self.progress_file, [(username, fn)])
+
+    def iter_progress(self):
+        yield from load_json(self.progress_file, {}).items()
+
+    def modify_progress_many(self, changes):
+        self._apply(self.progress_file, list(changes.items()))
+
+    def import_records(self, users, progress):
+        with file_lock(self.users_file), file_lock(self.progress_file):
+            all_users = load_json(self.users_file, {})
+            check_unique_emails(users, ((u, d.get("email")) for u, d in all_users.items()))
+            all_users.update(users)
+            all_prog = load_json(self.progress_file, {})
+            all_prog.update(progress)
+            self._save(self.users_file, all_users)
+            self._save(self.progress_file, all_prog)
+        self.rebuild_index()
+
+# ============================================================
+# READ-THROUGH CACHE
+# ============================================================
+class RecordCache:
+    """Bounded LRU with a TTL and hit/miss counters.
+
+    Every invalidate() bumps a generation for its key. A reader takes
+    generation(key) before loading and passes it to put(), which drops the
+    value if the key was invalidated meanwhile, so a read that raced a write
+    can't cache the pre-write record. Generations live in a fixed table of
+    slots keyed by hash, so memory stays bounded; two keys sharing a slot
+    only cost an occasional skipped fill.
+    """
+
+    GENERATION_SLOTS = 4096
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._generations = [0] * self.GENERATION_SLOTS
+        self._lock = threading.Lock()
+
+    def _slot(self, key):
+        return hash(key) % self.GENERATION_SLOTS
+
+    def generation(self, key):
+        with self._lock:
+            return self._generations[self._slot(key)]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, generation=None):
+        """Cache value; a no-op (False) if key was invalidated since generation was read"""
+        with self._lock:
+            if generation is not None and self._generations[self._slot(key)] != generation:
+                return False
+            self._data[key] = (time.monotonic(), copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._generations[self._slot(key)] += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data),
+                    "hit_rate": self.hits / total if total else 0.0}
+
+class CachedStorage(Storage):
+    """Serves get_user/get_progress from a RecordCache, invalidated on writes"""
+
+    def __init__(self, store, cache):
+        self.store = store
+        self.cache = cache
+
+    def _read(self, kind, username, loader):
+        key = (kind, username)
+        value = self.cache.get(key)
+        if value is None:
+            # Taken before loading: a write that lands during the load invalidates after
+            # committing, so put() refuses the now-stale value instead of serving it for a TTL
+            generation = self.cache.generation(key)
+            value = loader(username)
+            # Missing users stay uncached so a later registration shows up immediately
+            if value:
+                self.cache.put(key, value, generation)
+        return value
+
+    def count_users(self):
+        return self.store.count_users()
+
+    def user_exists(self, username):
+        return self.store.user_exists(username)
+
+    def find_username(self, email):
+        return self.store.find_username(email)
+
+    def allocate_username(self, prefix):
+        return self.store.allocate_username(prefix)
+
+    def rebuild_index(self):
+        self.store.rebuild_index()
+
+    def get_user(self, username):
+        return self._read("user", username, self.store.get_user)
+
+    def add_user(self, username, user, progress):
+        added = self.store.add_user(username, user, progress)
+        self.cache.invalidate(("user", username))
+        self._invalidate_progress(username)
+        return added
+
+    def update_user(self, username, updates):
+        self.store.update_user(username, updates)
+        self.cache.invalidate(("user", username))
+
+    def _invalidate_progress(self, username):
+        self.cache.invalidate(("progress", username))
+        self.cache.invalidate(("summary", username))
+
+    def get_progress(self, username):
+        return self._read("progress", username, self.store.get_progress)
+
+    def get_progress_summary(self, username):
+        return self._read("summary", username, self.store.get_progress_summary)
+
+    def get_certificates(self, username, offset=0, limit=None):
+        return self.store.get_certificates(username, offset, limit)
+
+    def update_progress(self, username, updates):
+        self.store.update_progress(username, updates)
+        self._invalidate_progress(username)
+
+    def modify_progress(self, username, fn):
+        self.store.modify_progress(username, fn)
+        self._invalidate_progress(username)
+
+    def iter_progress(self):
+        return self.store.iter_progress()
+
+    def modify_progress_many(self, changes):
+        self.store.modify_progress_many(changes)
+        for username in changes:
+            self._invalidate_progress(username)
+
+    def import_records(self, users, progress):
+        self.store.import_records(users, progress)
+        for username in users:
+            self.cache.invalidate(("user", username))
+        for username in progress:
+            self._invalidate_progress(username)
+
+    def close(self):
+        self.store.close()
+
+def open_storage(backend, data_dir, fsync=True):
+    """Open the configured backend under data_dir ("sqlite" or "json")"""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    if backend == "json":
+        return JsonStorage(data_dir / "users.json", data_dir / "progress.json", data_dir / "user_index.json", fsync)
+    if backend == "sqlite":
+        return SQLiteStorage(data_dir / "signhub.db", fsync)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,178 @@
+"""
+SignHub - Template Index
+Labelled reference vectors in a memory-mapped float32 matrix, searched with one matrix multiply per batch
+"""
+
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from storage import file_lock, load_json, save_json
+
+HEADER = "index.json"
+VECTORS = "vectors.f32"
+LABELS = "labels.u2"
+
+def unit_rows(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+def top_k(sims, k, block=256):
+    """Column indexes of the k largest entries in each row of sims, unordered.
+
+    Large rows are cut into blocks first: the k best entries lie in at most
+    the k blocks with the highest maxima, so only those blocks (and the
+    ragged tail) are partitioned rather than the whole row.
+    """
+    n = sims.shape[1]
+    if n <= 8 * k * block:
+        return np.argpartition(sims, n - k, axis=1)[:, n - k:]
+    full = n // block * block
+    block_max = sims[:, :full].reshape(len(sims), -1, block).max(axis=2)
+    blocks = np.argpartition(block_max, block_max.shape[1] - k, axis=1)[:, -k:]
+    candidates = (blocks[:, :, None] * block + np.arange(block)).reshape(len(sims), -1)
+    if full < n:
+        tail = np.broadcast_to(np.arange(full, n), (len(sims), n - full))
+        candidates = np.concatenate([candidates, tail], axis=1)
+    scores = np.take_along_axis(sims, candidates, axis=1)
+    best = np.argpartition(scores, scores.shape[1] - k, axis=1)[:, -k:]
+    return np.take_along_axis(candidates, best, axis=1)
+
+class TemplateIndex:
+    """Unit-length reference vectors with a label each, for cosine top-k search.
+
+    On disk the vectors are one contiguous row-major float32 file and the
+    labels a uint16 file beside it, both memory-mapped read-only, so
+    opening a library of millions of samples costs nothing until it is
+    searched. add() appends rows to both files and then commits the new
+    row count to index.json; rows past the committed count (an add that
+    crashed half-way) are ignored and overwritten by the next add.
+    Readers in other processes pick new rows up on their next search.
+
+    With no path the index lives in memory, for small built-in libraries.
+    """
+
+    def __init__(self, path=None, dim=None, meta=None, fsync=True):
+        self.path = Path(path) if path else None
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._stamp = None
+        if self.path is None:
+            self._header = {"dim": dim, "count": 0, "labels": [], "meta": meta or {}}
+            self._vectors = np.zeros((0, dim), dtype=np.float32)
+            self._labels = np.zeros(0, dtype=np.uint16)
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.path / HEADER):
+            if not (self.path / HEADER).exists():
+                if dim is None:
+                    raise ValueError(f"{self.path} has no template index; pass dim to create one")
+                save_json(self.path / HEADER, {"dim": dim, "count": 0, "labels": [], "meta": meta or {}}, fsync)
+        self.refresh()
+
+    @property
+    def dim(self):
+        return self._header["dim"]
+
+    @property
+    def meta(self):
+        return self._header["meta"]
+
+    @property
+    def label_names(self):
+        return self._header["labels"]
+
+    def __len__(self):
+        return self._header["count"]
+
+    def refresh(self):
+        """Re-map the files if another process committed rows since the last look"""
+        if self.path is None:
+            return
+        stat = (self.path / HEADER).stat()
+        stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            header = load_json(self.path / HEADER, None)
+            if header is None:
+                return
+            count, dim = header["count"], header["dim"]
+            if count:
+                vectors = np.memmap(self.path / VECTORS, dtype=np.float32, mode="r", shape=(count, dim))
+                labels = np.memmap(self.path / LABELS, dtype=np.uint16, mode="r", shape=(count,))
+            else:
+                vectors, labels = np.zeros((0, dim), dtype=np.float32), np.zeros(0, dtype=np.uint16)
+            self._header, self._vectors, self._labels, self._stamp = header, vectors, labels, stamp
+
+    def _label_ids(self, header, labels):
+        names = header["labels"]
+        ids = {name: i for i, name in enumerate(names)}
+        out = np.empty(len(labels), dtype=np.uint16)
+        for i, label in enumerate(labels):
+            label = str(label)
+            if label not in ids:
+                ids[label] = len(names)
+                names.append(label)
+            out[i] = ids[label]
+        return out
+
+    def add(self, vectors, labels):
+        """Append reference rows (normalized here) with their labels; returns the new row count"""
+        vectors = unit_rows(vectors)
+        if len(vectors) != len(labels):
+            raise ValueError("one label per vector")
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        if self.path is None:
+            with self._lock:
+                header = dict(self._header, labels=list(self._header["labels"]))
+                ids = self._label_ids(header, labels)
+                self._vectors = np.concatenate([self._vectors, vectors])
+                self._labels = np.concatenate([self._labels, ids])
+                header["count"] = len(self._vectors)
+                self._header = header
+            return header["count"]
+        with file_lock(self.path / HEADER):
+            header = load_json(self.path / HEADER, None)
+            ids = self._label_ids(header, labels)
+            # Cut anything past the committed count before appending
+            for name, data, itemsize in ((VECTORS, vectors, 4 * header["dim"]), (LABELS, ids, 2)):
+                with open(self.path / name, "ab") as f:
+                    f.truncate(header["count"] * itemsize)
+                    f.write(data.tobytes())
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+            header["count"] += len(vectors)
+            if not save_json(self.path / HEADER, header, self.fsync):
+                raise OSError(f"could not commit {self.path / HEADER}")
+        self.refresh()
+        return header["count"]
+
+    def search(self, queries, k=10):
+        """(scores, rows), each (Q, k), best first: cosine top-k of every query in one matrix multiply"""
+        self.refresh()
+        vectors = self._vectors
+        queries = unit_rows(queries)
+        k = min(k, len(vectors))
+        if not k:
+            return np.zeros((len(queries), 0), dtype=np.float32), np.zeros((len(queries), 0), dtype=np.int64)
+        sims = queries @ vectors.T
+        rows = top_k(sims, k) if k < len(vectors) else np.tile(np.arange(k), (len(queries), 1))
+        scores = np.take_along_axis(sims, rows, axis=1)
+        order = np.argsort(-scores, axis=1, kind="stable")
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+    def labels(self, rows):
+        """Label names of rows (any shape)"""
+        return np.asarray(self.label_names, dtype=object)[self._labels[np.asarray(rows)]]
+
+    def label_scores(self, queries, k=32):
+        """(Q, labels) best score per label among each query's k nearest rows; -1 where none is near"""
+        scores, rows = self.search(queries, k)
+        out = np.full((len(scores), len(self.label_names)), -1.0, dtype=np.float32)
+        np.maximum.at(out, (np.arange(len(scores))[:, None], self._labels[rows].astype(np.intp)), scores)
+        return out
@@ -0,0 +1,94 @@
+"""
+SignHub - Leaderboard Tests
+Boards against a brute-force sort; replays after a rebuild
+"""
+
+import random
+
+import pytest
+
+from leaderboard import GLOBAL, Board, Leaderboard, quiz_board
+from progress_log import ProgressLog, points_awarded, quiz_completed
+from storage import SQLiteStorage
+
+def brute_top(scores, k):
+    order = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+    rows = []
+    for i, (user, score) in enumerate(order):
+        rank = rows[-1][0] if rows and rows[-1][2] == score else i + 1
+        rows.append((rank, user, score))
+    return rows
+
+def brute_rank(scores, username):
+    return 1 + sum(score > scores[username] for score in scores.values())
+
+@pytest.mark.parametrize("seed", range(5))
+def test_board_matches_a_full_sort_after_random_updates(seed, monkeypatch):
+    rng = random.Random(seed)
+    board = Board(top_k=5, margin=3)
+    refills = []
+    monkeypatch.setattr(board, "_refill", lambda original=board._refill: (refills.append(1), original())[1])
+    scores = {}
+    for _ in range(2000):
+        user = f"u{rng.randrange(40)}"
+        # Few distinct scores, so ties are common; scores go down as well as up
+        score = rng.randrange(0, 100, 10)
+        board.set(user, score)
+        scores[user] = score
+        k = rng.choice([1, 5, 8, 20, 50])
+        assert board.top(k) == brute_top(scores, k)
+        probe = rng.choice(sorted(scores))
+        assert board.rank(probe) == brute_rank(scores, probe)
+    assert board.rank("nobody") is None
+    # The kept prefix ran short and was refilled from scores along the way
+    assert refills
+
+def test_tied_users_share_a_rank():
+    board = Board({"ann": 30, "bob": 50, "cy": 30, "dee": 10})
+    assert board.top(4) == [(1, "bob", 50), (2, "ann", 30), (2, "cy", 30), (4, "dee", 10)]
+    assert [board.rank(u) for u in ("bob", "ann", "cy", "dee")] == [1, 2, 2, 4]
+
+def state(lb):
+    return lb.seq, dict(lb.user_seq), {name: dict(board.scores) for name, board in lb.boards.items()}
+
+def test_applying_events_twice_changes_nothing(tmp_path):
+    store = SQLiteStorage(tmp_path / "signhub.db", fsync=False)
+    log = ProgressLog(tmp_path / "progress_events.jsonl", store, fsync=False)
+    for username in ("ann", "bob"):
+        store.add_user(username, {"email": f"{username}@example.com"}, {"total_points": 0})
+    log.record("ann", [points_awarded(10), quiz_completed("alphabet", 4, 5, 80, "2024-01-01")])
+    log.record("bob", [points_awarded(30)])
+    log.record("ann", [quiz_completed("alphabet", 2, 5, 40, "2024-01-02")])
+
+    lb = Leaderboard(tmp_path / "leaderboard.json", fsync=False)
+    lb.apply(list(log.events()))
+    before = state(lb)
+    lb.apply(list(log.events()))
+    assert state(lb) == before
+    assert lb.boards[GLOBAL].scores == {"ann": 10, "bob": 30}
+    assert lb.boards[quiz_board("alphabet")].scores == {"ann": 2}
+
+def test_replaying_the_log_after_a_rebuild_changes_nothing(tmp_path):
+    store = SQLiteStorage(tmp_path / "signhub.db", fsync=False)
+    log = ProgressLog(tmp_path / "progress_events.jsonl", store, fsync=False)
+    rng = random.Random(0)
+    users = [f"u{i}" for i in range(10)]
+    for username in users:
+        store.add_user(username, {"email": f"{username}@example.com"}, {"total_points": 0})
+    for i in range(60):
+        user = rng.choice(users)
+        log.record(user, [points_awarded(rng.randrange(10, 50, 10)),
+                          quiz_completed(rng.choice(["alphabet", "numbers"]), rng.randrange(6), 5, 0, "2024-01-01")])
+        if i == 30:
+            # Half the events are in store snapshots, half still only in the log
+            log.compact()
+
+    followed = Leaderboard(tmp_path / "followed.json", fsync=False)
+    followed.attach(log)
+    rebuilt = Leaderboard(tmp_path / "rebuilt.json", fsync=False)
+    rebuilt.rebuild(store, log)
+    assert state(rebuilt)[2] == state(followed)[2]
+
+    before = state(rebuilt)
+    rebuilt.apply(list(log.events()))
+    assert state(rebuilt) == before
@@ -0,0 +1,76 @@
+"""
+SignHub - Password Hashing Tests
+Round trips for both schemes, malformed hashes and upgrades on login
+"""
+
+import hashlib
+
+import pytest
+
+import passwords
+from passwords import hash_password, needs_rehash, verify_password
+from storage import SQLiteStorage
+
+@pytest.fixture(autouse=True)
+def cheap_costs(monkeypatch):
+    # Low costs keep the tests fast; each test may change them further
+    monkeypatch.setattr(passwords, "SCHEME", "scrypt")
+    monkeypatch.setitem(passwords.SCRYPT, "n", 2 ** 10)
+    monkeypatch.setitem(passwords.SCRYPT, "r", 8)
+    monkeypatch.setitem(passwords.SCRYPT, "p", 1)
+    monkeypatch.setattr(passwords, "PBKDF2_ITERATIONS", 1000)
+
+@pytest.mark.parametrize("scheme", ["scrypt", "pbkdf2_sha256"])
+def test_round_trip(scheme):
+    encoded = hash_password("sign höw 123", scheme)
+    assert encoded.startswith(scheme + "$")
+    assert verify_password("sign höw 123", encoded)
+    assert not verify_password("sign how 123", encoded)
+    # Salted: the same password never hashes the same twice
+    assert hash_password("sign höw 123", scheme) != encoded
+
+def test_legacy_sha256_is_checked():
+    legacy = hashlib.sha256(b"demo123").hexdigest()
+    assert verify_password("demo123", legacy)
+    assert not verify_password("demo124", legacy)
+    assert not verify_password("demo123", legacy.upper()[:-1])
+
+@pytest.mark.parametrize("encoded", [
+    "", "abc", "é", "scrypt", "scrypt$", "scrypt$1024$8$1", "scrypt$x$8$1$c2FsdA==$aGFzaA==",
+    "scrypt$1000$8$1$c2FsdA==$aGFzaA==", "scrypt$1024$8$1$!!!$aGFzaA==", "pbkdf2_sha256$1000$c2FsdA==",
+    "pbkdf2_sha256$-1$c2FsdA==$aGFzaA==", "pbkdf2_sha256$1000$é$aGFzaA==", "md5$c2FsdA==$aGFzaA==",
+])
+def test_malformed_hashes_never_verify(encoded):
+    assert verify_password("anything", encoded) is False
+
+@pytest.mark.parametrize("change", [
+    {"scrypt_n": 2 ** 11}, {"scrypt_r": 4}, {"scrypt_p": 2}, {"scheme": "pbkdf2_sha256"},
+])
+def test_changing_a_scrypt_setting_asks_for_a_rehash(change):
+    encoded = hash_password("secret")
+    assert not needs_rehash(encoded)
+    passwords.configure(**change)
+    assert needs_rehash(encoded)
+    assert not needs_rehash(hash_password("secret"))
+
+def test_changing_pbkdf2_iterations_asks_for_a_rehash():
+    passwords.configure(scheme="pbkdf2_sha256")
+    encoded = hash_password("secret")
+    assert not needs_rehash(encoded)
+    passwords.configure(pbkdf2_iterations=2000)
+    assert needs_rehash(encoded)
+    passwords.configure(scheme="scrypt")
+    assert needs_rehash(hash_password("secret", "pbkdf2_sha256"))
+
+def test_a_legacy_hash_is_upgraded_on_login(tmp_path):
+    store = SQLiteStorage(tmp_path / "signhub.db", fsync=False)
+    store.add_user("demo", {"email": "demo@signhub.com", "password": hashlib.sha256(b"demo123").hexdigest()}, {})
+
+    # What login_user does once the password checks out
+    stored = store.get_user("demo")["password"]
+    assert passwords.verify_password_limited("demo123", stored) and needs_rehash(stored)
+    store.update_user("demo", {"password": passwords.hash_password_limited("demo123")})
+
+    upgraded = store.get_user("demo")["password"]
+    assert upgraded.startswith("scrypt$") and not needs_rehash(upgraded)
+    assert verify_password("demo123", upgraded) and not verify_password("demo12", upgraded)
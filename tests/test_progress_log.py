@@ -0,0 +1,38 @@
+"""
+SignHub - Progress Log Tests
+Recovering from an append torn by a crash
+"""
+
+from progress_log import ProgressLog, points_awarded
+from storage import SQLiteStorage
+
+def open_log(tmp_path):
+    store = SQLiteStorage(tmp_path / "signhub.db", fsync=False)
+    if not store.get_user("ann"):
+        store.add_user("ann", {"email": "ann@example.com"}, {"total_points": 0})
+    return ProgressLog(tmp_path / "progress_events.jsonl", store, fsync=False), store
+
+def test_a_torn_append_is_cut_before_the_next_one(tmp_path):
+    log, store = open_log(tmp_path)
+    log.record("ann", [points_awarded(10)])
+    with open(log.path, "ab") as f:
+        f.write(b'{"type": "points_awa')
+
+    log, store = open_log(tmp_path)
+    log.record("ann", [points_awarded(5)])
+    assert log.path.read_bytes().endswith(b"\n")
+
+    reopened, store = open_log(tmp_path)
+    assert [e["points"] for e in reopened.events("ann")] == [10, 5]
+    assert reopened.overlay("ann", store.get_progress("ann"))["total_points"] == 15
+
+def test_an_unreadable_line_is_skipped(tmp_path):
+    log, store = open_log(tmp_path)
+    log.record("ann", [points_awarded(10)])
+    with open(log.path, "ab") as f:
+        f.write(b'{"type": "points_awa{"type": "points_awarded"}\n')
+    log.record("ann", [points_awarded(5)])
+
+    reopened, store = open_log(tmp_path)
+    assert reopened.overlay("ann", store.get_progress("ann"))["total_points"] == 15
+    assert reopened.compact() == 2
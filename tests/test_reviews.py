@@ -0,0 +1,92 @@
+"""
+SignHub - Review Scheduler Tests
+SM-2 updates per grade, the due heap's lazy deletion and the chunked recompute
+"""
+
+import random
+
+import pytest
+
+from reviews import DAY, DUE, EASE, INTERVAL, LAPSES, MIN_EASE, REPS, START_EASE, Deck, ReviewScheduler, new_card, sm2
+
+# Ease change per grade: 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)
+EASE_DELTA = {5: 0.1, 4: 0.0, 3: -0.14, 2: -0.32, 1: -0.54, 0: -0.8}
+
+@pytest.mark.parametrize("quality", range(6))
+def test_first_review_of_a_new_card(quality):
+    ease, interval, reps, lapses, due = sm2(new_card(), quality, 1000)
+    assert ease == pytest.approx(START_EASE + EASE_DELTA[quality])
+    assert interval == 1.0 and due == 1000 + DAY
+    assert (reps, lapses) == ((1, 0) if quality >= 3 else (0, 1))
+
+@pytest.mark.parametrize("quality", range(6))
+def test_review_of_a_learned_card(quality):
+    card = [2.0, 6.0, 2, 1, 0, 0]
+    ease, interval, reps, lapses, due = sm2(card, quality, 0)
+    if quality >= 3:
+        # The interval grows by the ease the card had before this review
+        assert (interval, reps, lapses) == (12.0, 3, 1)
+    else:
+        assert (interval, reps, lapses) == (1.0, 0, 2)
+    assert ease == pytest.approx(max(MIN_EASE, 2.0 + EASE_DELTA[quality]))
+    assert due == int(interval * DAY)
+
+def test_passing_reviews_space_out_and_ease_never_drops_below_the_floor():
+    card = new_card()
+    intervals = []
+    for ts in range(0, 4):
+        card = [*sm2(card, 5, ts), 0]
+        intervals.append(card[INTERVAL])
+    assert intervals == [1.0, 6.0, pytest.approx(6.0 * 2.7), pytest.approx(6.0 * 2.7 * 2.8)]
+    for _ in range(10):
+        card = [*sm2(card, 0, 0), 0]
+    assert card[EASE] == MIN_EASE and card[REPS] == 0 and card[LAPSES] == 10
+
+def test_a_replayed_review_is_skipped():
+    deck = Deck()
+    assert deck.review("A", 4, 0, seq=1)
+    assert not deck.review("A", 1, 0, seq=1)
+    assert deck.cards["A"][REPS] == 1
+
+def test_next_due_never_returns_a_reviewed_or_removed_card():
+    rng = random.Random(0)
+    deck = Deck()
+    for seq, item in enumerate("ABCDEFGH", 1):
+        deck.review(item, 4, rng.randrange(100), seq)
+    seq = 100
+    for now in range(DAY, 40 * DAY, DAY // 2):
+        for _ in range(rng.randrange(4)):
+            item = deck.next_due(now)
+            if item is None:
+                break
+            assert deck.cards[item][DUE] <= now
+            seq += 1
+            if rng.random() < 0.2:
+                deck.remove(item)
+                assert deck.next_due(now) != item
+            else:
+                deck.review(item, rng.choice([1, 4, 5]), now, seq)
+                assert deck.next_due(now) != item
+        expected = min((card[DUE], item) for item, card in deck.cards.items()) if deck.cards else None
+        assert deck.peek() == expected
+        assert deck.due(now, limit=26) == [item for due, item in sorted((c[DUE], i) for i, c in deck.cards.items())
+                                           if due <= now]
+
+def quiz(seq, user, letters, answers, ts="2024-01-01T12:00:00"):
+    return {"type": "quiz_completed", "seq": seq, "user": user, "ts": ts, "letters": letters, "answers": answers}
+
+def test_recompute_in_chunks_restarts_forgotten_cards(tmp_path):
+    scheduler = ReviewScheduler(tmp_path / "reviews.db", fsync=False)
+    scheduler.apply([quiz(1, "ann", ["A", "B", "C"], [1, 1, 0]), quiz(2, "bob", ["A", "D"], [1, 1])])
+    assert scheduler.flush() == 5
+    before = scheduler.due("ann", now=0, limit=26)
+    assert before == []
+
+    # Passed cards are due a day later; three days after that they count as forgotten
+    start = scheduler.deck("ann").cards["A"][DUE]
+    assert scheduler.recompute(now=start + 3 * DAY, chunk=2) == (5, 4)
+    ann = scheduler.deck("ann")
+    assert [ann.cards[item][REPS] for item in "ABC"] == [0, 0, 0]
+    assert ann.cards["A"][DUE] == start + 3 * DAY
+    # The failed card had no repetitions to lose and keeps its schedule
+    assert ann.cards["C"][LAPSES] == 1 and ann.cards["C"][DUE] == start
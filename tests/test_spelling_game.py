@@ -0,0 +1,99 @@
+"""
+SignHub - Fingerspelling Challenge Tests
+Compiled word graphs against their word lists, and recompiling when the list changes
+"""
+
+import os
+import random
+import string
+
+import pytest
+
+import spelling_game
+from spelling_game import (DIFFICULTIES, FingerspellingChallenge, WordDictionary, compile_dictionary,
+                           difficulty_buckets, open_dictionary)
+
+def random_words(n, seed):
+    rng = random.Random(seed)
+    # A small alphabet, so words share long prefixes and suffixes
+    return {"".join(rng.choice("ABCDEST") for _ in range(rng.randint(2, 9))) for _ in range(n)}
+
+@pytest.fixture(scope="module")
+def compiled(tmp_path_factory):
+    words = sorted(random_words(3000, 0) | {"CAT", "CATS", "CARS", "CART", "DOG", "DOGS"})
+    path = tmp_path_factory.mktemp("words") / "words.words"
+    assert compile_dictionary(words + ["x", "don't", " cat "], path, fsync=False) == len(words)
+    return words, WordDictionary(path)
+
+def distinct_alphabet():
+    return {letter: letter.lower() for letter in string.ascii_uppercase}
+
+def test_every_word_survives_compile_and_reopen(compiled):
+    words, dictionary = compiled
+    assert len(dictionary) == len(words)
+    assert sorted(dictionary.word(i) for i in range(len(dictionary))) == words
+    game = FingerspellingChallenge(dictionary, distinct_alphabet())
+    for word in words:
+        assert word in dictionary
+        for i, letter in enumerate(word):
+            assert game.accepts(word, word[:i], letter)
+        assert game.solved(word, word)
+
+def test_non_words_are_rejected(compiled):
+    words, dictionary = compiled
+    known = set(words)
+    rng = random.Random(1)
+    for _ in range(2000):
+        candidate = "".join(rng.choice("ABCDESTXZ") for _ in range(rng.randint(1, 10)))
+        assert (candidate in dictionary) == (candidate in known)
+    for word in words[:200]:
+        assert (word[:-1] in dictionary) == (word[:-1] in known)
+        assert word + "Z" not in dictionary
+    game = FingerspellingChallenge(dictionary, distinct_alphabet())
+    assert not game.accepts("CAT", "C", "O")
+    assert not game.accepts("CAT", "CAT", "S")
+    assert not game.solved("CATS", "CAT")
+
+def test_a_letter_sharing_a_handshape_counts_only_if_it_spells_a_word(compiled):
+    _, dictionary = compiled
+    # R and T share a handshape: CATS's tiles also read as CARS, but CAT's don't read as a word CAR
+    game = FingerspellingChallenge(dictionary, {**distinct_alphabet(), "R": "t"})
+    assert game.accepts("CATS", "CA", "R") and game.solved("CATS", "CARS")
+    assert game.accepts("CAT", "CA", "T")
+    assert not game.accepts("CAT", "CA", "R")
+    assert not game.accepts("CAT", "CA", "S")
+
+def test_draws_cover_each_word_once_per_difficulty(compiled):
+    words, dictionary = compiled
+    drawn = []
+    for difficulty in DIFFICULTIES:
+        batch = dictionary.draw(difficulty, seed=3, n=len(words))
+        assert len(batch) == len(set(batch)) == sum(dictionary.bucket_sizes(difficulty).values())
+        assert dictionary.draw(difficulty, seed=3, n=10) == dictionary.draw(difficulty, seed=3, n=10)
+        drawn += batch
+    assert sorted(drawn) == words
+    assert sorted(b for d in DIFFICULTIES for b in difficulty_buckets(d)) == list(range(len(dictionary.header["buckets"])))
+
+def test_a_changed_word_list_is_recompiled(tmp_path, monkeypatch):
+    source, target = tmp_path / "words.txt", tmp_path / "words.words"
+    source.write_text("# words\ncat\ndog\n", encoding="utf-8")
+    compiles = []
+    original = spelling_game.compile_dictionary
+    monkeypatch.setattr(spelling_game, "compile_dictionary", lambda *a, **k: (compiles.append(1), original(*a, **k))[1])
+
+    assert "CAT" in open_dictionary(source, target) and len(compiles) == 1
+    assert "DOG" in open_dictionary(source, target) and len(compiles) == 1
+
+    # Same size and mtime, different words: the content hash still tells them apart
+    stat = source.stat()
+    source.write_text("# words\ncow\npig\n", encoding="utf-8")
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    dictionary = open_dictionary(source, target)
+    assert len(compiles) == 2 and "COW" in dictionary and "CAT" not in dictionary
+
+    # Another list compiled to the same file is never served the previous dictionary
+    other = tmp_path / "other.txt"
+    other.write_text("horse\n", encoding="utf-8")
+    dictionary = open_dictionary(other, target)
+    assert len(compiles) == 3 and "HORSE" in dictionary and "COW" not in dictionary
+    assert "COW" in open_dictionary(source, target) and len(compiles) == 4
@@ -0,0 +1,135 @@
+"""
+SignHub - Storage Tests
+Read-through cache consistency when reads race writes and log compaction; batched JSON write failures
+"""
+
+import threading
+import time
+
+import pytest
+
+import storage
+from progress_log import ProgressLog, points_awarded
+from storage import CachedStorage, JsonStorage, RecordCache, SQLiteStorage, save_json
+
+class PausingStore(SQLiteStorage):
+    """get_progress reads its row, then waits for the test before returning it"""
+
+    def __init__(self, path):
+        super().__init__(path, fsync=False)
+        self.pause = False
+        self.read_done = threading.Event()
+        self.resume = threading.Event()
+
+    def get_progress(self, username):
+        prog = super().get_progress(username)
+        if self.pause:
+            self.read_done.set()
+            self.resume.wait(10)
+        return prog
+
+def test_put_skips_values_read_before_an_invalidate():
+    cache = RecordCache()
+    generation = cache.generation("k")
+    cache.invalidate("k")
+    assert not cache.put("k", {"stale": True}, generation)
+    assert cache.get("k") is None
+    assert cache.put("k", {"fresh": True}, cache.generation("k"))
+    assert cache.get("k") == {"fresh": True}
+
+def test_read_racing_a_write_and_compaction_does_not_cache_a_stale_record(tmp_path):
+    store = PausingStore(tmp_path / "signhub.db")
+    cached = CachedStorage(store, RecordCache(ttl=300))
+    log = ProgressLog(tmp_path / "progress_events.jsonl", cached, fsync=False)
+    cached.add_user("ann", {"email": "ann@example.com"}, {"total_points": 0})
+
+    # A dashboard read loads the pre-write snapshot and stalls before caching it
+    store.pause = True
+    results = []
+    reader = threading.Thread(target=lambda: results.append(cached.get_progress("ann")))
+    reader.start()
+    assert store.read_done.wait(10)
+
+    # Meanwhile the quiz result is recorded and compacted out of the in-memory tail
+    log.record("ann", [points_awarded(50)])
+    assert log.compact() == 1
+    store.pause = False
+    store.resume.set()
+    reader.join(10)
+    assert results[0].get("total_points") == 0
+
+    # The stalled read must not have been cached over the compacted snapshot
+    assert log.overlay("ann", cached.get_progress("ann"))["total_points"] == 50
+    assert cached.get_progress("ann")["total_points"] == 50
+
+def json_store(tmp_path, users=("ann", "bob")):
+    store = JsonStorage(tmp_path / "users.json", tmp_path / "progress.json", tmp_path / "user_index.json", fsync=False)
+    for username in users:
+        store.add_user(username, {"email": f"{username}@example.com"}, {"total_points": 0})
+    return store
+
+def queue_together(store, calls):
+    """Run calls on threads whose changes are all merged into one batched write; their exceptions"""
+    path = store.progress_file
+    errors = [None] * len(calls)
+
+    def run(i, call):
+        try:
+            call()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    with store._write_locks[path]:
+        for thread in threads:
+            thread.start()
+        while len(store._pending[path]) < len(calls):
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join(10)
+    return errors
+
+def test_a_failing_change_is_raised_in_its_own_thread_only(tmp_path):
+    store = json_store(tmp_path)
+
+    def boom(prog):
+        prog["total_points"] = 99
+        raise ValueError("bad change")
+
+    errors = queue_together(store, [lambda: store.modify_progress("ann", boom),
+                                    lambda: store.update_progress("bob", {"total_points": 5})])
+    assert isinstance(errors[0], ValueError) and errors[1] is None
+    assert store.get_progress("ann")["total_points"] == 0
+    assert store.get_progress("bob")["total_points"] == 5
+
+def test_a_failed_write_is_raised_in_every_waiting_thread(tmp_path, monkeypatch):
+    store = json_store(tmp_path)
+    monkeypatch.setattr(storage, "save_json", lambda *args: False)
+    errors = queue_together(store, [lambda: store.update_progress("ann", {"total_points": 1}),
+                                    lambda: store.update_progress("bob", {"total_points": 2})])
+    assert all(isinstance(e, OSError) for e in errors)
+
+def test_save_json_leaves_no_temp_file_when_serialization_fails(tmp_path):
+    with pytest.raises(TypeError):
+        save_json(tmp_path / "users.json", {"bad": object()})
+    assert list(tmp_path.iterdir()) == []
+
+def test_emails_differing_only_in_case_are_one_email(tmp_path):
+    store = SQLiteStorage(tmp_path / "signhub.db", fsync=False)
+    assert store.add_user("ann", {"email": "Ann@x.com"}, {})
+    assert not store.add_user("ann2", {"email": " ann@X.com"}, {})
+    assert store.find_username("ANN@x.com") == "ann"
+    assert store.get_user("ann")["email"] == "Ann@x.com"
+
+@pytest.mark.parametrize("backend", ["sqlite", "json"])
+def test_importing_a_duplicate_email_is_rejected(tmp_path, backend):
+    store = SQLiteStorage(tmp_path / "signhub.db", fsync=False) if backend == "sqlite" else json_store(tmp_path, users=())
+    store.import_records({"ann": {"email": "ann@x.com"}}, {"ann": {}})
+    with pytest.raises(storage.DuplicateEmailError, match="ann@x.com"):
+        store.import_records({"bob": {"email": "Ann@x.com"}, "cy": {"email": "cy@x.com"}}, {})
+    with pytest.raises(storage.DuplicateEmailError, match="cy@x.com"):
+        store.import_records({"cy": {"email": "cy@x.com"}, "Cy": {"email": "CY@x.com"}}, {})
+    assert store.count_users() == 1 and store.find_username("ann@x.com") == "ann"
+    # Re-importing a user under its own email is not a clash
+    store.import_records({"ann": {"email": "ANN@x.com", "full_name": "Ann"}}, {})
+    assert store.find_username("ann@x.com") == "ann"